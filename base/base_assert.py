@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+"""
+接口响应断言与提取
+--------------------------------------------------
+在接口 YAML 中紧挨接口定义声明 checks 块，request_base 返回前自动执行：
+    login_api:
+      method: post
+      url: /api/login
+      json: {"username": "${username}"}
+      checks:
+        status: 200                      # 或 [200, 302]
+        expect:                          # 路径 -> 期望值（期望值可使用 ${占位符}）
+          $.code: 0
+          $.data.name: ${username}
+        extract:                         # 保存到提取上下文，后续请求的 ${token} 自动取值
+          token: $.data.token
+          first_id: $.data.items[0].id
+        schema:                          # JSON Schema 子集
+          type: object
+          required: [code, data]
+          properties:
+            code: {type: integer, enum: [0]}
+
+路径语法（JSONPath 子集）：$.a.b、$.list[0]、$.list[-1]、$['key with space']、$.list[*].id
+- 路径、schema 在接口计划生成时编译一次，之后每次只做取值与比较
+- 每个响应的 JSON 只解析一次，所有路径共享同一份解析结果
+- 期望值不含占位符时，按响应体内容缓存检查结果，相同响应体不重复解析与校验
+- 失败时抛出 ResponseAssertionError，一次列出所有不满足的检查项
+- 提取的变量只在当前用例内有效（get_context() 的 test 作用域），用例结束后自动清空
+--------------------------------------------------
+"""
+
+import re
+import threading
+
+try:
+    import orjson as _json_lib      # 可选依赖，解析更快
+    _loads = _json_lib.loads
+except ImportError:
+    import json as _json_lib
+    _loads = _json_lib.loads
+
+from base.base_context import get_context
+from base.base_yaml import CompiledYaml
+
+# 找不到路径时的占位对象
+MISSING = object()
+
+# 检查结果缓存：每个接口最多缓存的响应体个数、可缓存的最大响应体字节数
+_MEMO_SIZE = 1024
+_MEMO_BODY_SIZE = 8 * 1024
+
+
+class ResponseAssertionError(AssertionError):
+    """响应不满足 YAML 中声明的 checks"""
+
+
+# ---------------------------------------------------------------------------
+# 提取上下文
+# ---------------------------------------------------------------------------
+# 提取的变量保存在 test 作用域：conftest 为每个用例进入 test_scope，用例结束后随之清空，不会带到下一个用例
+_EXTRACTED_KEY = 'EXTRACTED'
+_extracted_lock = threading.Lock()
+_NO_EXTRACTED = {}
+
+
+def get_extracted() -> dict:
+    """当前用例已提取的变量（只读视图请勿修改）"""
+    return get_context().get(_EXTRACTED_KEY, _NO_EXTRACTED, scope='test')
+
+
+def update_extracted(values: dict) -> None:
+    """合并提取结果（写入时复制，已取得的 get_extracted() 结果不受影响）"""
+    with _extracted_lock:
+        merged = dict(get_extracted())
+        merged.update(values)
+        get_context().set(_EXTRACTED_KEY, merged, scope='test')
+
+
+def set_extracted(name: str, value) -> None:
+    update_extracted({name: value})
+
+
+def clear_extracted() -> None:
+    get_context().pop(_EXTRACTED_KEY, scope='test')
+
+
+# ---------------------------------------------------------------------------
+# 路径编译
+# ---------------------------------------------------------------------------
+_TOKEN = re.compile(r"""
+    \[\s*\*\s*\]|\.\*(?=[.\[]|$)                # [*] / .*（须在 .key 之前匹配）
+  | \.(?P<name>[^.\[\]]+)                       # .key
+  | \[\s*(?P<index>-?\d+)\s*\]                  # [0] / [-1]
+  | \[\s*(?P<quote>['"])(?P<key>.*?)(?P=quote)\s*\]   # ['key']
+""", re.VERBOSE)
+
+_WILDCARD = object()
+_path_cache = {}
+
+
+class CompiledPath(object):
+    """编译后的路径：一组 key / 下标 / 通配步骤"""
+
+    __slots__ = ('text', 'steps', 'multi')
+
+    def __init__(self, text: str):
+        self.text = text
+        body = text.strip()
+        if body.startswith('$'):
+            body = body[1:]
+        elif body and body[0] not in '.[':
+            body = '.' + body
+        steps = []
+        position = 0
+        while position < len(body):
+            match = _TOKEN.match(body, position)
+            if match is None:
+                raise ValueError('无法解析的路径：{}（位置 {}）'.format(text, position))
+            if match.group('name') is not None:
+                steps.append(match.group('name'))
+            elif match.group('index') is not None:
+                steps.append(int(match.group('index')))
+            elif match.group('quote') is not None:
+                steps.append(match.group('key'))
+            else:
+                steps.append(_WILDCARD)
+            position = match.end()
+        self.steps = tuple(steps)
+        self.multi = _WILDCARD in self.steps
+
+    def find(self, data):
+        """取值；路径不存在时返回 MISSING；含通配时返回列表"""
+        if self.multi:
+            return self._find_all(data, 0)
+        node = data
+        for step in self.steps:
+            try:
+                node = node[step]
+            except (KeyError, IndexError, TypeError):
+                return MISSING
+        return node
+
+    def _find_all(self, node, start):
+        nodes = [node]
+        for step in self.steps[start:]:
+            next_nodes = []
+            for item in nodes:
+                if step is _WILDCARD:
+                    if isinstance(item, dict):
+                        next_nodes.extend(item.values())
+                    elif isinstance(item, list):
+                        next_nodes.extend(item)
+                    continue
+                try:
+                    next_nodes.append(item[step])
+                except (KeyError, IndexError, TypeError):
+                    pass
+            nodes = next_nodes
+        return nodes
+
+    def __repr__(self):
+        return '<CompiledPath {}>'.format(self.text)
+
+
+def compile_path(text: str) -> CompiledPath:
+    """编译路径（按文本缓存）"""
+    compiled = _path_cache.get(text)
+    if compiled is None:
+        compiled = _path_cache[text] = CompiledPath(text)
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# Schema 编译（JSON Schema 子集）
+# ---------------------------------------------------------------------------
+# schema 类型 -> (Python 类型, 是否排除 bool)
+_SCHEMA_TYPES = {
+    'string': ((str,), False),
+    'integer': ((int,), True),
+    'number': ((int, float), True),
+    'boolean': ((bool,), False),
+    'object': ((dict,), False),
+    'array': ((list,), False),
+    'null': ((type(None),), False),
+}
+
+
+def _where(where) -> str:
+    """把 (父路径, 键) 链表形式的位置格式化为 $.a[0].b；只在出错时调用"""
+    parts = []
+    while where is not None:
+        where, key = where
+        parts.append('[{}]'.format(key) if isinstance(key, int) else '.{}'.format(key))
+    return '$' + ''.join(reversed(parts))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and type(value) is not bool
+
+
+def compile_schema(schema: dict):
+    """
+    把 schema 编译为校验函数 validate(value, where, errors)，where 为 (父路径, 键) 链表，根为 None
+    支持：type、enum、const、required、properties、items、minimum、maximum、
+          minLength、maxLength、minItems、maxItems、pattern
+    """
+    checks = []
+
+    if 'type' in schema:
+        names = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        py_types = tuple(t for name in names for t in _SCHEMA_TYPES[name][0])
+        # integer/number 不接受 bool（bool 是 int 的子类），除非同时声明了 boolean
+        exclude_bool = 'boolean' not in names and any(_SCHEMA_TYPES[name][1] for name in names)
+
+        def check_type(value, where, errors):
+            if not isinstance(value, py_types) or (exclude_bool and type(value) is bool):
+                errors.append('{} 类型应为 {}，实际为 {}'.format(_where(where), '/'.join(names), type(value).__name__))
+                return False
+            return True
+        checks.append(check_type)
+
+    if 'enum' in schema:
+        choices = list(schema['enum'])
+
+        def check_enum(value, where, errors):
+            if value not in choices:
+                errors.append('{} 取值 {!r} 不在 {!r} 中'.format(_where(where), value, choices))
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+
+        def check_const(value, where, errors):
+            if value != const:
+                errors.append('{} 取值应为 {!r}，实际为 {!r}'.format(_where(where), const, value))
+        checks.append(check_const)
+
+    for keyword, compare, message in (('minimum', lambda v, b: v >= b, '不应小于'),
+                                      ('maximum', lambda v, b: v <= b, '不应大于')):
+        if keyword in schema:
+            def check_bound(value, where, errors, bound=schema[keyword], compare=compare, message=message):
+                if _is_number(value) and not compare(value, bound):
+                    errors.append('{} 取值 {} {} {}'.format(_where(where), value, message, bound))
+            checks.append(check_bound)
+
+    for keyword, kind, compare, message in (('minLength', str, lambda n, b: n >= b, '长度不应小于'),
+                                            ('maxLength', str, lambda n, b: n <= b, '长度不应大于'),
+                                            ('minItems', list, lambda n, b: n >= b, '元素个数不应小于'),
+                                            ('maxItems', list, lambda n, b: n <= b, '元素个数不应大于')):
+        if keyword in schema:
+            def check_size(value, where, errors, bound=schema[keyword], kind=kind, compare=compare, message=message):
+                if isinstance(value, kind) and not compare(len(value), bound):
+                    errors.append('{} {} {}（实际 {}）'.format(_where(where), message, bound, len(value)))
+            checks.append(check_size)
+
+    if 'pattern' in schema:
+        pattern = re.compile(schema['pattern'])
+
+        def check_pattern(value, where, errors):
+            if isinstance(value, str) and not pattern.search(value):
+                errors.append('{} 取值 {!r} 不匹配 {}'.format(_where(where), value, pattern.pattern))
+        checks.append(check_pattern)
+
+    required = tuple(schema.get('required', ()))
+    properties = tuple((name, compile_schema(sub)) for name, sub in (schema.get('properties') or {}).items())
+    if required or properties:
+        def check_object(value, where, errors):
+            if type(value) is not dict:
+                return
+            for name in required:
+                if name not in value:
+                    errors.append('{} 缺少必填字段 {}'.format(_where(where), name))
+            for name, validate in properties:
+                if name in value:
+                    validate(value[name], (where, name), errors)
+        checks.append(check_object)
+
+    if 'items' in schema:
+        validate_item = compile_schema(schema['items'])
+
+        def check_items(value, where, errors):
+            if type(value) is list:
+                for index, item in enumerate(value):
+                    validate_item(item, (where, index), errors)
+        checks.append(check_items)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value, where, errors):
+        for check in checks:
+            # 类型不符时不再做其余检查，避免连锁报错
+            if check(value, where, errors) is False:
+                return
+    return validate
+
+
+# ---------------------------------------------------------------------------
+# 响应解析
+# ---------------------------------------------------------------------------
+def parsed_body(response):
+    """
+    响应 JSON（每个响应只解析一次，结果缓存在响应对象上）
+    非 JSON 响应返回 MISSING
+    """
+    cached = getattr(response, '_parsed_body', None)
+    if cached is not None:
+        return cached
+    try:
+        data = _loads(response.content)
+    except ValueError:
+        data = MISSING
+    try:
+        response._parsed_body = data
+    except AttributeError:          # 使用 __slots__ 的响应对象无法缓存
+        pass
+    return data
+
+
+# ---------------------------------------------------------------------------
+# 一个接口的 checks
+# ---------------------------------------------------------------------------
+class ResponseChecks(object):
+    """接口 checks 块的编译结果，随 RequestPlan 缓存"""
+
+    __slots__ = ('api_name', 'status', 'expect', 'expect_template', 'extract', 'schema', 'needs_body', '_memo')
+
+    def __init__(self, api_name: str, node: dict):
+        self.api_name = api_name
+        status = node.get('status')
+        if status is None:
+            self.status = None
+        else:
+            self.status = frozenset(int(code) for code in (status if isinstance(status, list) else [status]))
+
+        expect = node.get('expect') or {}
+        self.expect = [(compile_path(path), value) for path, value in expect.items()]
+        # 期望值中含占位符时，每次按 change_data 渲染
+        template = CompiledYaml(expect)
+        self.expect_template = template if template.slots else None
+
+        self.extract = [(name, compile_path(path)) for name, path in (node.get('extract') or {}).items()]
+        self.schema = compile_schema(node['schema']) if node.get('schema') else None
+        self.needs_body = bool(self.expect or self.extract or self.schema)
+        # 响应体 -> (错误列表, 提取结果)；只缓存较小的响应体
+        self._memo = {}
+
+    def _check_body(self, data, expect) -> tuple:
+        errors = []
+        extracted = {}
+        for path, expected in expect:
+            actual = path.find(data)
+            if actual is MISSING:
+                errors.append('{} 不存在'.format(path.text))
+            elif actual != expected:
+                errors.append('{} 应为 {!r}，实际为 {!r}'.format(path.text, expected, actual))
+        for name, path in self.extract:
+            value = path.find(data)
+            if value is MISSING:
+                errors.append('提取 {} 失败：{} 不存在'.format(name, path.text))
+            else:
+                extracted[name] = value
+        if self.schema is not None:
+            self.schema(data, None, errors)
+        return errors, extracted
+
+    def run(self, response, change_data=None) -> dict:
+        """
+        执行检查并保存提取值
+        :return: 本次提取到的变量
+        """
+        errors = []
+        if self.status is not None and response.status_code not in self.status:
+            errors.append('响应码应为 {}，实际为 {}'.format(sorted(self.status), response.status_code))
+
+        extracted = {}
+        if self.needs_body:
+            templated = self.expect_template is not None and change_data
+            content = response.content
+            memo_key = content if not templated and content is not None and len(content) <= _MEMO_BODY_SIZE else None
+            cached = self._memo.get(memo_key) if memo_key is not None else None
+            if cached is not None:
+                body_errors, extracted = cached
+            else:
+                data = parsed_body(response)
+                if data is MISSING:
+                    body_errors, extracted = ['响应体不是合法的 JSON'], {}
+                else:
+                    expect = self.expect
+                    if templated:
+                        rendered = self.expect_template.render(change_data)
+                        expect = [(path, rendered[path.text]) for path, _ in self.expect]
+                    body_errors, extracted = self._check_body(data, expect)
+                if memo_key is not None and len(self._memo) < _MEMO_SIZE:
+                    self._memo[memo_key] = (body_errors, extracted)
+            errors.extend(body_errors)
+
+        if extracted:
+            update_extracted(extracted)
+            extracted = dict(extracted)
+        if errors:
+            raise ResponseAssertionError('【{} 响应检查失败】\n  {}'.format(self.api_name, '\n  '.join(errors)))
+        return extracted
+
+
+# ---------------------------------------------------------------------------
+# 基准：10 万次响应检查
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import json
+    import time
+    import requests
+
+    checks = ResponseChecks('login_api', {
+        'status': 200,
+        'expect': {'$.code': 0, '$.data.name': 'admin'},
+        'extract': {'token': '$.data.token', 'first_id': '$.data.items[0].id'},
+        'schema': {'type': 'object', 'required': ['code', 'data'],
+                   'properties': {'code': {'type': 'integer'},
+                                  'data': {'type': 'object', 'required': ['token'],
+                                           'properties': {'items': {'type': 'array',
+                                                                    'items': {'type': 'object',
+                                                                              'required': ['id']}}}}}},
+    })
+    body = json.dumps({'code': 0, 'data': {'name': 'admin', 'token': 'abc',
+                                           'items': [{'id': i} for i in range(10)]}}).encode()
+
+    count = 100000
+    for label, bodies in (('相同响应体', [body] * count),
+                          ('各不相同的响应体', [body.replace(b'"abc"', b'"%d"' % i) for i in range(count)])):
+        responses = []
+        for content in bodies:
+            response = requests.Response()
+            response.status_code = 200
+            response._content = content
+            responses.append(response)
+        start = time.perf_counter()
+        for response in responses:
+            checks.run(response)
+        cost = time.perf_counter() - start
+        print('{} 次检查，{}（{}）：{:.2f} 秒，{:.2f} us/次'.format(
+            count, label, _json_lib.__name__, cost, cost / count * 1e6))
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+接口登录态缓存（跨进程共享）
+--------------------------------------------------
+带 auth 块的接口（通常是登录接口）由 request_base 自动走缓存：
+同一 TEST_URL + 同一组请求参数（账号、密码等）在有效期内只真正登录一次，
+之后直接回放保存的登录响应，并把当时的 cookie / token 写回 session。
+    login_api:
+      method: post
+      url: /web/guest/home
+      data: {"_58_login": "${username}", "_58_password": "${password}"}
+      auth:
+        ttl: 1800                       # 有效期（秒），缺省取 [接口自动化配置] auth_ttl
+        expires_in: $.data.expires_in   # 可选：响应中的有效期（秒），优先于 ttl
+        refresh_before: 60              # 到期前多少秒主动刷新，缺省取 auth_refresh_before
+        token: $.data.token             # 可选：把 token 写入 session 请求头
+        header: Authorization
+        prefix: "Bearer "
+只需默认配置时可写 auth: yes
+
+- 缓存键 = 请求指纹（方法 + 完整 URL + params + data/json），不同账号、不同环境互不影响
+- 缓存文件位于 data/temp/auth_cache/<键>.json，写入先落临时文件再替换，读取无需加锁
+- 需要登录时按键加文件锁（POSIX 用 fcntl，Windows 用 msvcrt），并行的 worker 进程只有一个真正登录，
+  其余等待后直接读取结果
+- 进入 refresh_before 窗口但尚未过期时，拿到锁的进程刷新，拿不到锁的继续使用旧登录态，不会阻塞；
+  refresh_before 最多取条目有效期的一半，短期 cookie 的条目同样能命中
+- 只保存登录响应（含重定向）下发的 cookie，session 中其他用户、其他接口留下的 cookie 不会混入
+- cookie 自带的过期时间早于 ttl 时以 cookie 为准；响应码 >= 400 或 checks 失败的登录不会写入缓存
+--------------------------------------------------
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from base.base_assert import MISSING, compile_path, parsed_body
+from base.base_cassette import canonical_request, fingerprint
+from base.base_config import get_config
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+from base.base_response import build_response
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:             # Windows
+    fcntl = None
+    import msvcrt
+
+logger = Logger('base_auth_cache.py').get_logger()
+
+
+# ---------------------------------------------------------------------------
+# 文件锁
+# ---------------------------------------------------------------------------
+class FileLock(object):
+    """
+    跨进程排他锁（锁住 path 文件本身，内容无意义）
+    同一进程内的多个线程各自打开文件，同样互斥
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """获取锁；blocking=False 时拿不到立即返回 False"""
+        self._file = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.05)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ---------------------------------------------------------------------------
+# auth 块
+# ---------------------------------------------------------------------------
+class AuthPolicy(object):
+    """接口 auth 块的编译结果，随 RequestPlan 缓存"""
+
+    __slots__ = ('api_name', 'ttl', 'expires_in', 'refresh_before', 'token', 'header', 'prefix')
+
+    def __init__(self, api_name: str, node):
+        node = node if isinstance(node, dict) else {}
+        self.api_name = api_name
+        self.ttl = float(node['ttl']) if node.get('ttl') is not None else None
+        self.expires_in = compile_path(node['expires_in']) if node.get('expires_in') else None
+        self.refresh_before = float(node['refresh_before']) if node.get('refresh_before') is not None else None
+        self.token = compile_path(node['token']) if node.get('token') else None
+        self.header = node.get('header', 'Authorization')
+        self.prefix = node.get('prefix', '')
+
+
+# ---------------------------------------------------------------------------
+# 缓存
+# ---------------------------------------------------------------------------
+class AuthSlot(object):
+    """
+    一次登录请求的处理结果：
+    - response 不为 None：缓存命中，cookie / token 已写回 session，直接使用该响应
+    - response 为 None：需要真正登录，成功后调用 store(response)
+    """
+
+    __slots__ = ('cache', 'policy', 'key', 'session', 'response')
+
+    def __init__(self, cache, policy: AuthPolicy, key: str, session, response=None):
+        self.cache = cache
+        self.policy = policy
+        self.key = key
+        self.session = session
+        self.response = response
+
+    def store(self, response) -> None:
+        self.cache.store(self, response)
+
+
+class AuthCache(object):
+    """
+    登录态缓存
+    用法：
+        with cache.acquire(policy, session, yaml_dict) as slot:
+            response = slot.response or session.request(**yaml_dict)
+            ...（检查响应）
+            if slot.response is None:
+                slot.store(response)
+    """
+
+    def __init__(self, directory: str, ttl: float = 1800, refresh_before: float = 60):
+        self.directory = directory
+        self.ttl = ttl
+        self.refresh_before = refresh_before
+        os.makedirs(directory, exist_ok=True)
+        # 键 -> 条目，进程内命中时不读文件
+        self._memo = {}
+        self.hits = 0
+        self.logins = 0
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key, '.json'), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memo[key] = entry
+        return entry
+
+    def _write(self, key: str, entry: dict) -> None:
+        path = self._path(key, '.json')
+        temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self._memo[key] = entry
+
+    def _state(self, entry, policy: AuthPolicy, now: float) -> str:
+        """fresh：可直接使用；refresh：未过期但应刷新；expired：不可用"""
+        if entry is None or now >= entry['expires_at']:
+            return 'expired'
+        margin = policy.refresh_before if policy.refresh_before is not None else self.refresh_before
+        # 有效期比 refresh_before 还短（如短期会话 cookie）时最多提前一半刷新，否则条目永远不是 fresh、每次都重新登录
+        created_at = entry.get('created_at')
+        if created_at is not None:
+            margin = min(margin, (entry['expires_at'] - created_at) / 2)
+        return 'fresh' if now < entry['expires_at'] - margin else 'refresh'
+
+    # ----------------------
+    #  回放
+    # ----------------------
+    @staticmethod
+    def _apply(entry: dict, policy: AuthPolicy, session) -> None:
+        """把登录态写回 session"""
+        for cookie in entry['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                                secure=cookie['secure'], expires=cookie['expires'])
+        if entry.get('token') is not None and policy.token is not None:
+            session.headers[policy.header] = '{}{}'.format(policy.prefix, entry['token'])
+
+    def _replay(self, key: str, entry: dict, policy: AuthPolicy, session) -> AuthSlot:
+        self._apply(entry, policy, session)
+        response = build_response(entry['status'], entry['reason'], entry['headers'],
+                                  base64.b64decode(entry['body']), entry['encoding'], entry['elapsed'], entry['url'])
+        response.from_auth_cache = True
+        self.hits += 1
+        return AuthSlot(self, policy, key, session, response)
+
+    @contextmanager
+    def acquire(self, policy: AuthPolicy, session, yaml_dict: dict):
+        """
+        :param policy:    接口的 AuthPolicy
+        :param session:   登录使用（以及写回登录态）的 Session
+        :param yaml_dict: 交给 session.request 的请求字典
+        """
+        key = fingerprint(canonical_request(yaml_dict))
+        now = time.time()
+        entry = self._memo.get(key)
+        state = self._state(entry, policy, now)
+        if state != 'fresh':
+            # 其他进程可能已经刷新
+            entry = self._read(key)
+            state = self._state(entry, policy, now)
+        if state == 'fresh':
+            yield self._replay(key, entry, policy, session)
+            return
+
+        lock = FileLock(self._path(key, '.lock'))
+        if not lock.acquire(blocking=state == 'expired'):
+            # 即将过期：其他进程正在刷新，继续使用旧登录态
+            yield self._replay(key, entry, policy, session)
+            return
+        try:
+            entry = self._read(key)
+            if self._state(entry, policy, time.time()) == 'fresh':
+                yield self._replay(key, entry, policy, session)
+            else:
+                yield AuthSlot(self, policy, key, session)
+        finally:
+            lock.release()
+
+    # ----------------------
+    #  写入
+    # ----------------------
+    def _expires_at(self, policy: AuthPolicy, response, cookies: list, now: float) -> float:
+        ttl = policy.ttl if policy.ttl is not None else self.ttl
+        if policy.expires_in is not None:
+            data = parsed_body(response)
+            value = MISSING if data is MISSING else policy.expires_in.find(data)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                ttl = float(value)
+        expires_at = now + ttl
+        for cookie in cookies:
+            if cookie['expires']:
+                expires_at = min(expires_at, cookie['expires'])
+        return expires_at
+
+    @staticmethod
+    def _login_cookies(response) -> list:
+        """
+        只取本次登录交互（含重定向）中服务端下发的 cookie
+        session.cookies 是所有接口共用的，可能还留着其他用户的会话，不能整个存进当前用户的条目
+        """
+        cookies = {}
+        for r in list(response.history) + [response]:
+            for c in r.cookies:
+                cookies[(c.name, c.domain, c.path)] = {'name': c.name, 'value': c.value, 'domain': c.domain,
+                                                       'path': c.path, 'secure': c.secure, 'expires': c.expires}
+        return list(cookies.values())
+
+    def store(self, slot: AuthSlot, response) -> None:
+        """保存一次成功的登录；响应码 >= 400 时不保存"""
+        if response.status_code >= 400:
+            return
+        session, policy = slot.session, slot.policy
+        cookies = self._login_cookies(response)
+        token = None
+        if policy.token is not None:
+            data = parsed_body(response)
+            token = MISSING if data is MISSING else policy.token.find(data)
+            if token is MISSING:
+                logger.warning('【登录态缓存】%s 响应中没有 token（%s），不写入缓存', policy.api_name, policy.token.text)
+                return
+        now = time.time()
+        entry = {
+            'api': policy.api_name,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'body': base64.b64encode(response.content or b'').decode('ascii'),
+            'encoding': response.encoding,
+            'elapsed': response.elapsed.total_seconds(),
+            'url': response.url,
+            'cookies': cookies,
+            'token': token,
+            'created_at': now,
+            'expires_at': self._expires_at(policy, response, cookies, now),
+        }
+        self._write(slot.key, entry)
+        self._apply(entry, policy, session)
+        self.logins += 1
+        logger.info('【登录态缓存】%s 已登录并缓存，%.0f 秒后过期', policy.api_name, entry['expires_at'] - now)
+
+    def clear(self) -> None:
+        """删除所有缓存的登录态（如被测系统重置了账号）"""
+        self._memo.clear()
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+# ---------------------------------------------------------------------------
+# 进程级缓存
+# ---------------------------------------------------------------------------
+_auth_cache = None
+_auth_cache_lock = threading.Lock()
+
+
+def get_auth_cache():
+    """[接口自动化配置] auth_cache = no 时返回 None"""
+    global _auth_cache
+    api_config = get_config()['接口自动化配置']
+    if not api_config.get_bool('auth_cache', True):
+        return None
+    if _auth_cache is None:
+        with _auth_cache_lock:
+            if _auth_cache is None:
+                _auth_cache = AuthCache(BP.AUTH_CACHE_DIR, api_config.get_float('auth_ttl', 1800),
+                                        api_config.get_float('auth_refresh_before', 60))
+    return _auth_cache
@@ -5,19 +5,267 @@
 - 统一 YAML 管理接口定义
 - 统一 session 保持会话
 - 统一日志、异常与超时处理
+- 每个接口首次调用时编译为 RequestPlan，之后每次请求只做占位符替换 + 发送
 """
 
+import contextvars
+import logging
+import threading
+import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from urllib.parse import urljoin          # 拼接相对/绝对 URL
+
 import requests
 import urllib3
-from urllib.parse import urljoin          # 拼接相对/绝对 URL
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning  # 关闭 HTTPS 警告用
+from urllib3.util.retry import Retry
 
+from base.base_assert import ResponseChecks, get_extracted   # 响应检查 / 提取
+from base.base_auth_cache import AuthPolicy, get_auth_cache  # 登录态缓存
+from base.base_cassette import get_cassette    # 接口录制 / 回放
+from base.base_config import get_config        # 全局配置快照
 from base.base_data import DataBase            # 读取 YAML/Excel 基础类
 from base.base_logger import Logger            # 自研日志封装
+from base.base_response import BodyPreview, ValuePreview, save_to_file, DEFAULT_CHUNK_SIZE
+from base.base_yaml import load_compiled_yaml  # 预编译 YAML 缓存
 
 # 生成当前文件的日志实例
 logger = Logger('base_auto_api.py').get_logger()
 
+# 关闭 SSL 警告（进程内执行一次即可）
+urllib3.disable_warnings(InsecureRequestWarning)
+
+# 接口节点中不属于请求参数的子节点（mock 服务的响应定义、响应检查、登录态缓存），构建请求时跳过
+NON_REQUEST_KEYS = frozenset(('mock', 'checks', 'auth'))
+
+# 只读化后发给 requests 的字段（requests 会把它们合并成新字典，不会修改原对象）
+_FROZEN_FIELDS = ('headers', 'params')
+
+
+# ==========================
+# 接口请求计划
+# ==========================
+class RequestPlan(object):
+    """
+    单个接口的预编译请求计划：
+    - 不含占位符的字段只准备一次（绝对 URL、只读 headers/params）
+    - 含占位符的顶层字段记为动态槽位，每次请求只渲染这些槽位
+    - checks 块编译为 ResponseChecks（无 checks 时为 None）
+    - auth 块编译为 AuthPolicy（无 auth 时为 None）
+    """
+
+    __slots__ = ('api_name', 'base_url', 'static', 'dynamic', 'url_dynamic', 'checks', 'auth')
+
+    def __init__(self, api_name: str, compiled, base_url: str):
+        """
+        :param api_name: 接口节点名称
+        :param compiled: 接口节点的 CompiledYaml（DataBase.get_compiled(api_name)）
+        :param base_url: 拼接相对路径用的 TEST_URL
+        """
+        self.api_name = api_name
+        self.base_url = base_url
+        dynamic_keys = []
+        for path, _, _ in compiled.slots:
+            if path[0] not in dynamic_keys and path[0] not in NON_REQUEST_KEYS:
+                dynamic_keys.append(path[0])
+        self.dynamic = [(key, compiled.select(key)) for key in dynamic_keys]
+        self.url_dynamic = 'url' in dynamic_keys
+
+        static = {k: v for k, v in compiled.render().items()
+                  if k not in dynamic_keys and k not in NON_REQUEST_KEYS}
+        if 'url' in static:
+            static['url'] = urljoin(base_url, static['url'])
+        for field in _FROZEN_FIELDS:
+            if isinstance(static.get(field), dict):
+                static[field] = MappingProxyType(static[field])
+        self.static = static
+        checks = compiled.data.get('checks')
+        self.checks = ResponseChecks(api_name, checks) if checks else None
+        auth = compiled.data.get('auth')
+        self.auth = AuthPolicy(api_name, auth) if auth else None
+
+    def build(self, change_data=None) -> dict:
+        """渲染一次请求，返回可直接交给 session.request 的字典"""
+        request = dict(self.static)
+        for key, compiled in self.dynamic:
+            request[key] = compiled.render(change_data)
+        if self.url_dynamic:
+            request['url'] = urljoin(self.base_url, request['url'])
+        return request
+
+    def build_many(self, rows) -> list:
+        """批量渲染：每个动态槽位对所有行一次性渲染"""
+        rows = list(rows)
+        request_list = [dict(self.static) for _ in rows]
+        for key, compiled in self.dynamic:
+            for request, value in zip(request_list, compiled.render_many(rows)):
+                request[key] = value
+        if self.url_dynamic:
+            joined = {}
+            for request in request_list:
+                url = request['url']
+                if url not in joined:
+                    joined[url] = urljoin(self.base_url, url)
+                request['url'] = joined[url]
+        return request_list
+
+
+# ==========================
+# 连接池 / 超时 / 重试
+# ==========================
+def get_timeout(api_config=None) -> tuple:
+    """(连接超时, 读取超时)，取自 [接口自动化配置]"""
+    if api_config is None:
+        api_config = get_config()['接口自动化配置']
+    return api_config.get_float('connect_timeout', 5.0), api_config.get_float('read_timeout', 30.0)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    记录新建连接数与请求数的 HTTPAdapter，用于确认压测时连接确实被复用
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.opened = 0
+        self.sent = 0
+        adapter = self
+        pool_classes = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            class CountingConnection(pool_cls.ConnectionCls):
+                def connect(self):
+                    super().connect()
+                    adapter._count('opened')
+
+            pool_classes[scheme] = type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': CountingConnection})
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def send(self, request, *args, **kwargs):
+        self._count('sent')
+        return super().send(request, *args, **kwargs)
+
+
+def build_session(api_config=None) -> requests.Session:
+    """
+    按 [接口自动化配置] 创建 Session：
+    - 挂载指定连接池大小的 HTTPAdapter
+    - 只对幂等方法（GET/HEAD/PUT/DELETE/OPTIONS/TRACE）做指数退避重试
+    - keep_alive = no 时每个请求都带 Connection: close
+    """
+    if api_config is None:
+        api_config = get_config()['接口自动化配置']
+    retry_total = api_config.get_int('retry_total', 0)
+    retry = 0       # 不重试时保持 requests 默认行为（ReadTimeout 等异常类型不变）
+    if retry_total > 0:
+        retry = Retry(
+            total=retry_total,
+            backoff_factor=api_config.get_float('retry_backoff', 0.3),
+            status_forcelist=[int(code) for code in api_config.get_list('retry_status', ())],
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+    adapter = PooledHTTPAdapter(
+        pool_connections=api_config.get_int('pool_connections', 10),
+        pool_maxsize=api_config.get_int('pool_maxsize', 10),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not api_config.get_bool('keep_alive', True):
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def pool_stats(*sessions) -> dict:
+    """
+    统计 Session 的连接使用情况（只统计 build_session 挂载的 PooledHTTPAdapter）
+    - connections：新建的 TCP 连接数（包括长连接被服务端关闭后的重连）
+    - requests   ：发出的请求数
+    - reused     ：复用已有连接的请求数
+    """
+    connections = sent = 0
+    for session in sessions:
+        for adapter in set(session.adapters.values()):
+            if isinstance(adapter, PooledHTTPAdapter):
+                connections += adapter.opened
+                sent += adapter.sent
+    return {'connections': connections, 'requests': sent, 'reused': max(sent - connections, 0)}
+
+
+# ==========================
+# 批量请求结果
+# ==========================
+def percentile(sorted_values, pct: float) -> float:
+    """最近秩法取百分位数；sorted_values 需已升序排列"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)      # ceil(pct/100 * n)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class BatchResult(object):
+    """
+    request_batch 的返回结果
+    - responses：与输入行顺序一致的 requests.Response，失败的行为 None
+    - timings  ：每次调用耗时（秒），与 responses 一一对应
+    - errors   ：失败行下标 -> 异常
+    - pool     ：各线程 session 的连接池统计（见 pool_stats）
+    """
+
+    def __init__(self, api_name: str, responses: list, timings: list, errors: dict, elapsed: float,
+                 pool: dict = None):
+        self.api_name = api_name
+        self.responses = responses
+        self.timings = timings
+        self.errors = errors
+        self.elapsed = elapsed
+        self.pool = pool or {}
+
+    def __len__(self):
+        return len(self.responses)
+
+    def __iter__(self):
+        return iter(self.responses)
+
+    def __getitem__(self, index):
+        return self.responses[index]
+
+    @property
+    def throughput(self) -> float:
+        """吞吐量（req/s）"""
+        return len(self.responses) / self.elapsed if self.elapsed else 0.0
+
+    def latency(self, pct: float) -> float:
+        """耗时百分位（秒），如 latency(95)"""
+        return percentile(sorted(self.timings), pct)
+
+    def summary(self) -> dict:
+        ordered = sorted(self.timings)
+        return {
+            'api': self.api_name,
+            'count': len(self.responses),
+            'errors': len(self.errors),
+            'elapsed': round(self.elapsed, 3),
+            'req/s': round(self.throughput, 1),
+            'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+            'connections': self.pool.get('connections', 0),
+            'reused': self.pool.get('reused', 0),
+        }
+
+    def __repr__(self):
+        return '<BatchResult {}>'.format(self.summary())
+
 
 # ==========================
 # 接口底层核心类
@@ -30,63 +278,282 @@ class ApiBase(DataBase):
     3. 统一发送请求、记录日志
     """
 
-    # 整个进程共享同一个 session，自动携带 cookie/authorization
-    session = requests.Session()
+    # 整个进程共享同一个 session，自动携带 cookie/authorization；连接池与重试策略取自 [接口自动化配置]
+    session = build_session()
+
+    # 请求计划缓存：(文件路径, 接口名, base_url) -> (CompiledYaml, RequestPlan)
+    _plans = {}
 
-    def __init__(self, yaml_name: str):
+    def __init__(self, yaml_name: str, base_url: str = None):
         """
         :param yaml_name: YAML 文件名（无需 .yaml 后缀）
+        :param base_url:  接口地址前缀，默认取 config.ini 中的 TEST_URL
         """
         super().__init__(yaml_name)      # 加载 YAML 数据
         self.yaml_name = yaml_name       # 保留文件名，方便日志
-        self.timeout = 5                 # 默认超时 5 秒（也可通过 kwargs 覆盖）
+        self.base_url = base_url or self.run_config['TEST_URL']
+        api_config = self.config['接口自动化配置']
+        self.timeout = get_timeout(api_config)       # (连接, 读取) 超时，可通过 kwargs 覆盖
+        self.log_body_limit = api_config.get_int('log_body_limit', 2048)   # 日志中请求/响应体最多输出的长度
+
+    def get_plan(self, api_name: str) -> RequestPlan:
+        """
+        取接口的请求计划；YAML 文件未修改时直接复用，修改后自动重新编译
+        :param api_name: YAML 中接口节点名称，如 login_api
+        """
+        compiled = load_compiled_yaml(self.abs_path)
+        key = (self.abs_path, api_name, self.base_url)
+        cached = ApiBase._plans.get(key)
+        if cached is not None and cached[0] is compiled:
+            return cached[1]
+        plan = RequestPlan(api_name, compiled.select(api_name), self.base_url)
+        ApiBase._plans[key] = (compiled, plan)
+        return plan
 
     # -------------------------------------------------
     # 统一请求入口：所有 HTTP 方法都走这里
     # -------------------------------------------------
-    def request_base(self, api_name: str, change_data=None, **kwargs):
+    def request_base(self, api_name: str, change_data=None, checks: bool = True, **kwargs):
         """
         根据 YAML 中定义的接口模板发送请求
         :param api_name:     YAML 中接口节点名称，如 login_api
-        :param change_data:  动态替换模板中的 {placeholder}
-        :param kwargs:       可覆盖 YAML 中的任何字段（method/url/data/json/headers...）
+        :param change_data:  动态替换模板中的 ${placeholder}；未提供的占位符取之前 extract 提取的变量
+        :param checks:       是否执行 YAML 中声明的 checks（stream=True 时不执行）
+        :param kwargs:       可覆盖 YAML 中的任何字段（method/url/data/json/headers...）；
+                             stream=True 时不预先下载响应体，可配合 base_response.iter_chunks / save_to_file 使用
         :return:             requests.Response 对象
         """
         try:
             # ① 日志：开始调用
             logger.info('【%s：%s 接口调用开始】', self.yaml_name, api_name)
 
-            # ② 读取并合并 YAML 模板
-            yaml_dict = self.get_data(change_data)[api_name]          # 解析后的字典
-            yaml_dict['url'] = urljoin(self.run_config['TEST_URL'],  # 自动拼接 host + path
-                                       yaml_dict['url'])
+            # ② 按请求计划渲染（URL、headers 等静态部分已预先准备好），kwargs 覆盖 YAML 字段
+            plan = self.get_plan(api_name)
+            change_data = self._with_extracted(change_data)
+            yaml_dict = plan.build(change_data)
+            yaml_dict.update(kwargs)
+            yaml_dict.setdefault('timeout', self.timeout)
+
+            # ③ 日志：请求方式与地址；完整请求数据只在 DEBUG 级别输出
+            self._log_request(api_name, yaml_dict)
+
+            # 带 auth 块的登录接口：有效期内直接回放缓存的登录态
+            auth_cache = get_auth_cache() if plan.auth is not None and not yaml_dict.get('stream') else None
+            if auth_cache is not None:
+                with auth_cache.acquire(plan.auth, ApiBase.session, yaml_dict) as slot:
+                    result = self._request(plan, slot.response, yaml_dict, change_data, checks)
+                    if slot.response is None:
+                        slot.store(result)
+                return result
+            return self._request(plan, None, yaml_dict, change_data, checks)
+
+        except Exception as e:
+            logger.error('【接口请求失败！原因：%s】', e)
+            raise
+
+    def _request(self, plan: RequestPlan, result, yaml_dict: dict, change_data, checks: bool):
+        """result 为 None 时真正发请求，否则直接使用（登录态缓存命中）"""
+        # ④ 真正发请求（录制/回放模式下经过 cassette）
+        if result is None:
+            result = self._send(ApiBase.session, yaml_dict)
+
+        # ⑤ 日志：响应码 & 响应体（debug 级别）、调用结束
+        self._log_response(plan.api_name, result)
+
+        # ⑥ 响应检查与变量提取
+        if checks:
+            self._run_checks(plan, result, yaml_dict, change_data)
+        return result
+
+    @staticmethod
+    def _with_extracted(change_data):
+        """把已提取的变量作为 change_data 的后备取值"""
+        extracted = get_extracted()
+        if not extracted:
+            return change_data
+        return ChainMap(change_data, extracted) if change_data else extracted
+
+    @staticmethod
+    def _run_checks(plan: RequestPlan, result, yaml_dict: dict, change_data) -> None:
+        if plan.checks is not None and not yaml_dict.get('stream'):
+            plan.checks.run(result, change_data)
+
+    @staticmethod
+    def _send(session: requests.Session, yaml_dict: dict) -> requests.Response:
+        cassette = get_cassette()
+        if cassette is None:
+            return session.request(**yaml_dict)
+        return cassette.play(session, yaml_dict)
+
+    # -------------------------------------------------
+    # 线程池批量请求
+    # -------------------------------------------------
+    @staticmethod
+    def pool_stats() -> dict:
+        """共享 session 的连接池统计：新建连接数 / 请求数 / 复用次数"""
+        return pool_stats(ApiBase.session)
+
+    @staticmethod
+    def _clone_session() -> requests.Session:
+        """以共享 session 为模板创建线程私有 session（复制 headers / cookies / 认证信息，按配置挂载连接池）"""
+        shared = ApiBase.session
+        session = build_session()
+        session.headers.update(shared.headers)
+        session.cookies.update(shared.cookies)
+        session.auth = shared.auth
+        session.verify = shared.verify
+        session.proxies.update(shared.proxies)
+        return session
+
+    def request_batch(self, api_name: str, rows, workers: int = 8, checks: bool = True, **kwargs) -> BatchResult:
+        """
+        用多行 change_data 在线程池中并发调用同一个接口
+        requests.Session 不是线程安全的，每个工作线程使用一个从 ApiBase.session 复制出来的私有 session，
+        批量请求中产生的 cookie 不会写回共享 session
+        :param api_name: YAML 中接口节点名称，如 login_api
+        :param rows:     可迭代的 change_data（如 DataDriver().get_case_data('login')）
+        :param workers:  线程数
+        :param checks:   是否执行 YAML 中声明的 checks，检查失败的行记入 errors
+        :param kwargs:   可覆盖 YAML 中的任何字段，对每一行生效
+        :return:         BatchResult，responses 与 rows 顺序一致
+        """
+        plan = self.get_plan(api_name)
+        rows = [self._with_extracted(row) for row in rows]
+        request_list = plan.build_many(rows)
+        for yaml_dict in request_list:
+            yaml_dict.update(kwargs)
+            yaml_dict.setdefault('timeout', self.timeout)
+        count = len(request_list)
+        responses = [None] * count
+        timings = [0.0] * count
+        errors = {}
+        local = threading.local()
+        sessions = []
+
+        def send(index: int):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = self._clone_session()
+                sessions.append(session)
+            yaml_dict = request_list[index]
+            start = time.perf_counter()
+            try:
+                self._log_request(api_name, yaml_dict)
+                result = self._send(session, yaml_dict)
+                self._log_response(api_name, result)
+                responses[index] = result
+                if checks:
+                    self._run_checks(plan, result, yaml_dict, rows[index])
+            except Exception as e:
+                logger.error('【接口请求失败！第 %s 行，原因：%s】', index, e)
+                errors[index] = e
+            timings[index] = time.perf_counter() - start
 
-            # ③ 日志：打印完整请求数据
-            logger.info('【获取 %s 文件 %s 接口请求数据：%s】', self.yaml_name, api_name, yaml_dict)
-            logger.info('【接口请求方式：%s】', yaml_dict['method'])
-            logger.info('【接口请求地址：%s】', yaml_dict['url'])
+        logger.info('【%s：%s 批量调用开始，共 %s 条，%s 线程】', self.yaml_name, api_name, count, workers)
+        start = time.perf_counter()
+        try:
+            # 工作线程不会继承调用线程的 ContextVar（当前用例标识），每个任务在调用线程上下文的副本中执行，
+            # checks 提取的变量才会写入当前用例的 test 作用域
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, send, index) for index in range(count)]
+                for future in futures:
+                    future.result()
+            elapsed = time.perf_counter() - start
+            pool = pool_stats(*sessions)
+        finally:
+            for session in sessions:
+                session.close()
+        result = BatchResult(api_name, responses, timings, errors, elapsed, pool)
+        logger.info('【%s：%s 批量调用结束：%s】', self.yaml_name, api_name, result.summary())
+        return result
+
+    # -------------------------------------------------
+    # 请求/响应日志（同步与异步接口共用，保证输出一致）
+    # -------------------------------------------------
+    def _log_request(self, api_name: str, yaml_dict: dict, log=logger):
+        log.info('【接口请求：%s %s】', yaml_dict['method'], yaml_dict['url'])
+        if log.isEnabledFor(logging.DEBUG):
+            limit = self.log_body_limit
+            log.debug('【获取 %s 文件 %s 接口请求数据：%s】', self.yaml_name, api_name, ValuePreview(yaml_dict, limit))
             if 'data' in yaml_dict:
-                logger.info('【接口请求体(data)：%s】', yaml_dict['data'])
+                log.debug('【接口请求体(data)：%s】', ValuePreview(yaml_dict['data'], limit))
             elif 'json' in yaml_dict:
-                logger.info('【接口请求体(json)：%s】', yaml_dict['json'])
+                log.debug('【接口请求体(json)：%s】', ValuePreview(yaml_dict['json'], limit))
 
-            # ④ 关闭 SSL 警告（仅对当前请求生效）
-            urllib3.disable_warnings(InsecureRequestWarning)
+    def _log_response(self, api_name: str, result, log=logger):
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('【接口响应码：%s】', result.status_code)
+            # 只截取前 log_body_limit 字节；流式响应不会因日志而被提前下载
+            log.debug('【接口响应体：%s】', BodyPreview(result, self.log_body_limit))
+        log.info('【%s：%s 接口调用结束】', self.yaml_name, api_name)
+
+    # -------------------------------------------------
+    # 流式下载
+    # -------------------------------------------------
+    def download(self, api_name: str, path: str, change_data=None, hash_name: str = 'sha256',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> dict:
+        """
+        以 stream=True 调用接口并把响应体直接写入 path，内存中只保留一个块
+        :return: {'path', 'status_code', 'size', hash_name}
+        """
+        result = self.request_base(api_name, change_data, stream=True, **kwargs)
+        size, digest = save_to_file(result, path, hash_name, chunk_size)
+        logger.info('【%s：%s 下载完成：%s，%s 字节，%s=%s】', self.yaml_name, api_name, path, size, hash_name, digest)
+        return {'path': path, 'status_code': result.status_code, 'size': size, hash_name: digest}
+
+    # -------------------------------------------------
+    # 批量渲染：一次得到多组 change_data 对应的请求数据
+    # -------------------------------------------------
+    def build_requests(self, api_name: str, rows) -> list:
+        """
+        用多行数据批量渲染同一个接口模板，返回可直接交给 session.request 的字典列表
+        :param api_name: YAML 中接口节点名称，如 login_api
+        :param rows:     可迭代的 change_data（如 DataDriver().get_case_data('login')）
+        :return:         与 rows 一一对应的请求字典（url 已拼接 TEST_URL）
+        """
+        return self.get_plan(api_name).build_many(rows)
 
-            # ⑤ 真正发请求（允许 kwargs 覆盖 YAML 任何字段）
-            result = ApiBase.session.request(**yaml_dict, **kwargs)
 
-            # ⑥ 日志：响应码 & 响应体（debug 级别）
-            logger.debug('【接口响应码：%s】', result.status_code)
-            logger.debug('【接口响应体：%s】', result.text)
+# ==========================
+# 基准：本地桩服务上对比旧流程与请求计划的吞吐
+# ==========================
+def _benchmark(count: int = 2000):
+    """
+    需 config.ini 中 AUTO_TYPE 非 CLIENT、TEST_PROJECT = project_auto_test
+    旧流程：每次重读 YAML + Template 文本替换 + safe_load + urljoin + disable_warnings + 格式化完整请求日志
+    """
+    import time
+    import yaml
+    from string import Template
+    from ext_tools.stub_server import StubServer
 
-            # ⑦ 日志：调用结束
-            logger.info('【%s：%s 接口调用结束】', self.yaml_name, api_name)
-            return result
+    with StubServer() as server:
+        api = ApiBase('接口元素信息-登录', base_url=server.url)
+        change_data = {'username': 'admin', 'password': '123456'}
 
-        except Exception as e:
-            logger.error('【接口请求失败！原因：%s】', e)
-            raise
+        def legacy():
+            with open(api.abs_path, 'r', encoding='utf-8') as f:
+                yaml_dict = yaml.safe_load(Template(f.read()).safe_substitute(**change_data))['login_api']
+            yaml_dict['url'] = urljoin(server.url, yaml_dict['url'])
+            '{} {} {} {}'.format(yaml_dict, yaml_dict['method'], yaml_dict['url'], yaml_dict['data'])
+            urllib3.disable_warnings(InsecureRequestWarning)
+            return ApiBase.session.request(**yaml_dict)
+
+        def planned():
+            return ApiBase.session.request(**api.get_plan('login_api').build(change_data))
+
+        for name, func in (('旧流程', legacy), ('请求计划', planned)):
+            func()      # 预热连接
+            start = time.perf_counter()
+            for _ in range(count):
+                func()
+            cost = time.perf_counter() - start
+            print('{}：{:.0f} req/s（单次 {:.3f} ms）'.format(name, count / cost, cost / count * 1000))
+        print('共享 session 连接池：{}'.format(ApiBase.pool_stats()))
+
+        rows = [change_data] * count
+        for workers in (1, 4, 16):
+            print('request_batch（{} 线程）：{}'.format(workers, api.request_batch('login_api', rows, workers).summary()))
 
 
 # ==========================
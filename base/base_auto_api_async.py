@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+接口自动化异步封装
+--------------------------------
+- 与 ApiBase 读取同一份 YAML 接口定义、使用同一套请求计划（RequestPlan）
+- 基于 aiohttp 连接池，支持总并发上限与单 host 连接数上限（[接口自动化配置]）
+- 日志输出与 ApiBase.request_base 完全一致
+- aiohttp 为可选依赖，只有使用本模块时才需要安装
+- 与 request_base 一样经过录制 / 回放（base_cassette）
+- 不经过登录态缓存（base_auth_cache）：缓存的 cookie / token 只能写回 requests.Session，
+  带 auth 块的登录接口请用 ApiBase.request_base 登录，或在异步用例中自行登录
+用法：
+    async with AsyncApiBase('接口元素信息-登录') as api:
+        resp = await api.arequest('login_api', {'username': 'admin'})
+        resp_list = await api.arequest_many('login_api', rows)
+"""
+
+import asyncio
+import datetime
+import json
+
+from requests.structures import CaseInsensitiveDict
+
+from base.base_auto_api import ApiBase
+from base.base_cassette import get_cassette
+from base.base_logger import Logger
+
+# 生成当前文件的日志实例
+logger = Logger('base_auto_api_async.py').get_logger()
+
+try:
+    import aiohttp
+except ImportError:      # aiohttp 为可选依赖
+    aiohttp = None
+
+# requests 参数名 -> aiohttp 参数名（其余同名参数直接透传）
+_RENAMED_KWARGS = {'verify': 'ssl'}
+# aiohttp 无法对应的 requests 参数
+_UNSUPPORTED_KWARGS = ('files', 'stream', 'cert', 'hooks', 'auth')
+
+
+# ==========================
+# 响应对象
+# ==========================
+class AsyncResponse(object):
+    """
+    响应体已读取完毕的异步响应，属性与 requests.Response 常用部分一致：
+    status_code / reason / url / headers / content / text / json()
+    """
+
+    __slots__ = ('status_code', 'reason', 'url', 'headers', 'content', 'encoding', 'elapsed', 'from_cassette',
+                 '_parsed_body')
+
+    def __init__(self, status_code, reason, url, headers, content, encoding, elapsed: float):
+        self.status_code = status_code
+        self.reason = reason
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.elapsed = datetime.timedelta(seconds=elapsed or 0)     # 与 requests.Response.elapsed 一致
+        self.from_cassette = False
+        self._parsed_body = None    # base_assert.parsed_body 的解析缓存
+
+    @classmethod
+    def from_cassette_entry(cls, entry) -> 'AsyncResponse':
+        """由 Cassette.lookup 返回的录制数据构造"""
+        status, reason, headers, body, encoding, elapsed, final_url = entry
+        response = cls(status, reason, final_url, CaseInsensitiveDict(headers), body, encoding, elapsed)
+        response.from_cassette = True
+        return response
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+    def __repr__(self):
+        return '<AsyncResponse [{}]>'.format(self.status_code)
+
+
+# ==========================
+# 异步接口底层核心类
+# ==========================
+class AsyncApiBase(ApiBase):
+    """
+    ApiBase 的异步版本；ClientSession 绑定事件循环，在第一次 arequest 时创建，用完需 close()
+    """
+
+    def __init__(self, yaml_name: str, base_url: str = None, concurrency: int = None,
+                 limit_per_host: int = None):
+        """
+        :param yaml_name:      YAML 文件名（无需 .yaml 后缀）
+        :param base_url:       接口地址前缀，默认取 config.ini 中的 TEST_URL
+        :param concurrency:    同时在途的请求数上限，默认取 [接口自动化配置] async_concurrency
+        :param limit_per_host: 单个 host 的连接数上限，默认取 [接口自动化配置] async_limit_per_host（0 为不限制）
+        """
+        if aiohttp is None:
+            raise ImportError('异步接口需要安装 aiohttp：pip install aiohttp')
+        super().__init__(yaml_name, base_url)
+        api_config = self.config['接口自动化配置']
+        self.concurrency = concurrency or api_config.get_int('async_concurrency', 100)
+        self.limit_per_host = (api_config.get_int('async_limit_per_host', 0)
+                               if limit_per_host is None else limit_per_host)
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.limit_per_host)
+            # 与 ApiBase.session 一样，会话内自动保存 cookie
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    def _to_aiohttp(self, yaml_dict: dict) -> dict:
+        """把 requests 风格的请求字典转换为 aiohttp 参数"""
+        kwargs = {}
+        for key, value in yaml_dict.items():
+            if key in _UNSUPPORTED_KWARGS:
+                raise ValueError('异步接口不支持参数 {}'.format(key))
+            if key == 'timeout':
+                if isinstance(value, tuple):
+                    value = aiohttp.ClientTimeout(sock_connect=value[0], sock_read=value[1])
+                elif value is not None:
+                    value = aiohttp.ClientTimeout(total=value)
+            elif key in ('headers', 'params', 'cookies') and value is not None:
+                # aiohttp 的 params 只接受字符串取值
+                value = {k: (v if isinstance(v, str) or key != 'params' else str(v)) for k, v in value.items()}
+            kwargs[_RENAMED_KWARGS.get(key, key)] = value
+        return kwargs
+
+    # -------------------------------------------------
+    # 统一请求入口
+    # -------------------------------------------------
+    async def arequest(self, api_name: str, change_data=None, checks: bool = True, **kwargs) -> AsyncResponse:
+        """
+        根据 YAML 中定义的接口模板异步发送请求
+        :param api_name:     YAML 中接口节点名称，如 login_api
+        :param change_data:  动态替换模板中的 ${placeholder}；未提供的占位符取之前 extract 提取的变量
+        :param checks:       是否执行 YAML 中声明的 checks
+        :param kwargs:       可覆盖 YAML 中的任何字段（method/url/data/json/headers...）
+        :return:             AsyncResponse 对象
+        """
+        try:
+            logger.info('【%s：%s 接口调用开始】', self.yaml_name, api_name)
+
+            plan = self.get_plan(api_name)
+            change_data = self._with_extracted(change_data)
+            yaml_dict = plan.build(change_data)
+            yaml_dict.update(kwargs)
+            yaml_dict.setdefault('timeout', self.timeout)
+            self._log_request(api_name, yaml_dict, log=logger)
+
+            # 录制 / 回放：命中时不发请求
+            cassette = get_cassette()
+            key, canonical, entry = cassette.match(yaml_dict) if cassette is not None else (None, None, None)
+            if entry is not None:
+                result = AsyncResponse.from_cassette_entry(entry)
+            else:
+                result = await self._send_async(yaml_dict)
+                if cassette is not None:
+                    cassette.record(key, canonical, result)
+
+            self._log_response(api_name, result, log=logger)
+            if checks:
+                self._run_checks(plan, result, yaml_dict, change_data)
+            return result
+
+        except Exception as e:
+            logger.error('【接口请求失败！原因：%s】', e)
+            raise
+
+    async def _send_async(self, yaml_dict: dict) -> AsyncResponse:
+        session = self._get_session()
+        request_kwargs = self._to_aiohttp(yaml_dict)
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            start = loop.time()
+            async with session.request(**request_kwargs) as resp:
+                content = await resp.read()
+                return AsyncResponse(resp.status, resp.reason, str(resp.url), resp.headers,
+                                     content, resp.get_encoding(), loop.time() - start)
+
+    async def arequest_many(self, api_name: str, rows, **kwargs) -> list:
+        """
+        用多行 change_data 并发调用同一个接口，返回与 rows 顺序一致的响应列表
+        并发数受 concurrency 限制；任一请求失败时抛出异常
+        """
+        return await asyncio.gather(*(self.arequest(api_name, row, **kwargs) for row in rows))
+
+
+# ==========================
+# 基准：本地桩服务上对比同步与异步
+# ==========================
+def _benchmark(count: int = 2000, latency: float = 0.04):
+    """
+    需 config.ini 中 AUTO_TYPE 非 CLIENT、TEST_PROJECT = project_auto_test
+    桩服务每个请求延迟 latency 秒，模拟真实被测系统的响应时间
+    """
+    import time
+    from ext_tools.stub_server import StubServer, _StubHandler
+
+    class _SlowHandler(_StubHandler):
+        def _reply(self):
+            time.sleep(latency)
+            super()._reply()
+
+        do_GET = do_POST = _reply
+
+    rows = [{'username': 'user%d' % i, 'password': '123456'} for i in range(count)]
+    with StubServer(handler=_SlowHandler) as server:
+        api = ApiBase('接口元素信息-登录', base_url=server.url)
+        sync_count = max(count // 20, 1)
+        start = time.perf_counter()
+        for row in rows[:sync_count]:
+            api.request_base('login_api', row)
+        cost = time.perf_counter() - start
+        print('同步 request_base：{:.0f} req/s'.format(sync_count / cost))
+
+        async def run():
+            async with AsyncApiBase('接口元素信息-登录', base_url=server.url) as async_api:
+                start = time.perf_counter()
+                await async_api.arequest_many('login_api', rows)
+                return async_api.concurrency, time.perf_counter() - start
+
+        concurrency, cost = asyncio.run(run())
+        print('异步 arequest（并发 {}）：{:.0f} req/s'.format(concurrency, count / cost))
+
+
+# ==========================
+# 脚本自测入口
+# ==========================
+if __name__ == '__main__':
+    async def _main():
+        async with AsyncApiBase('接口元素信息-登录') as api:
+            resp = await api.arequest('home_api')
+            print(resp.text)
+
+    asyncio.run(_main())
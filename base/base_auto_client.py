@@ -37,11 +37,11 @@ class Locator(DataBase):
         super().__init__()
         # 读取 config.ini 中的「客户端自动化配置」
         cfg = self.config['客户端自动化配置']
-        self.duration = float(cfg['duration'])  # 鼠标移动/拖拽的动画时长
-        self.interval = float(cfg['interval'])  # 两次点击之间的间隔
-        self.min_search_time = float(cfg['minSearchTime'])  # 图像识别最大等待时间
-        self.confidence = float(cfg['confidence'])  # 图像识别置信度阈值
-        self.gray_scale = bool(cfg['grayScale'])  # 是否启用灰度匹配
+        self.duration = cfg.get_float('duration')  # 鼠标移动/拖拽的动画时长
+        self.interval = cfg.get_float('interval')  # 两次点击之间的间隔
+        self.min_search_time = cfg.get_float('minSearchTime')  # 图像识别最大等待时间
+        self.confidence = cfg.get_float('confidence')  # 图像识别置信度阈值
+        self.gray_scale = cfg.get_bool('grayScale')  # 是否启用灰度匹配
 
     # -------------------- 路径合法性检查 --------------------
     def is_path_exist(self, element: str) -> str:
@@ -9,15 +9,16 @@ web 端 UI 自动化底层公共库
 
 # ---------- Selenium 官方模块 ----------
 from selenium.webdriver.remote.webelement import WebElement  # 元素对象类型标注
-from selenium.webdriver.support.wait import WebDriverWait    # 显式等待
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.select import Select         # 下拉框处理
 from selenium.webdriver.common.action_chains import ActionChains  # 鼠标/键盘链式操作
 from selenium.common.exceptions import TimeoutException      # 超时异常
 
 # ---------- 业务基础模块 ----------
+from base.base_context import get_context  # 分作用域的运行上下文
 from base.base_data import DataBase   # 读取 yaml/Excel 等测试数据基类
 from base.base_logger import Logger        # 自研日志封装
+from base.base_wait import ElementWait     # 退避轮询 / 页面内等待
 
 # ---------- 日志对象 ----------
 logger = Logger('base_auto_web.py').get_logger()
@@ -36,9 +37,23 @@ class Locator(DataBase):
         :param yaml_name: yaml 文件名称（无需 .yaml 后缀）
         """
         super().__init__(yaml_name)          # 加载 yaml 数据
-        self.driver = self.gm.get_value('driver')  # 从全局管理器获取浏览器驱动实例
-        self.time = 0.5                        # 轮询间隔
-        self.timeout = 5                       # 默认最大等待时间
+        self._driver = None                    # 显式指定的驱动；为空时取当前用例上下文中的 driver
+        web_config = self.config['WEB自动化配置']
+        self.time = web_config.get_float('poll_start', 0.005)   # 首次轮询间隔，之后逐次翻倍直到 poll_max
+        self.timeout = web_config.get_float('timeout', 5)       # 默认最大等待时间
+
+    @property
+    def driver(self):
+        """浏览器驱动：每次使用时从上下文取当前用例（test 作用域）的 driver，用例并行时互不干扰"""
+        return self._driver or get_context().get('driver')
+
+    @driver.setter
+    def driver(self, value):
+        self._driver = value
+
+    def waiter(self) -> ElementWait:
+        """当前 driver 的等待器（策略取 [WEB自动化配置] wait_strategy）"""
+        return ElementWait(self.driver, self.timeout, self.time)
 
     # ----------------------
     #  解析 yaml 中的定位表达式
@@ -50,11 +65,20 @@ class Locator(DataBase):
         :param change_data: 动态替换定位符中的 {placeholder}
         :return:            (By.ID, "kw") / (By.XPATH, "//div[text()='{}']") ...
         """
-        _element = self.get_data(change_data)      # 支持数据驱动替换
         item = items.split('/')                    # 支持多级索引，如 page/element
-        element_data = tuple(_element[item[0]][item[1]])  # 取出 (by, value)
+        element_data = tuple(self.get_compiled(item[0], item[1]).render(change_data))  # 取出 (by, value)
         return element_data
 
+    def get_locator_data_many(self, items: str, rows) -> list:
+        """
+        批量渲染同一个定位表达式
+        :param items: 例 "login/loginbtn"
+        :param rows:  可迭代的 change_data
+        :return:      与 rows 一一对应的 (by, value) 元组列表
+        """
+        item = items.split('/')
+        return [tuple(data) for data in self.get_compiled(item[0], item[1]).render_many(rows)]
+
     # ----------------------
     #  显式等待查找单个/全部元素
     # ----------------------
@@ -71,12 +95,7 @@ class Locator(DataBase):
                 logger.error('element参数类型错误，必须传列表或元组类型，element = ["id","value"]')
             logger.debug('正在定位元素信息：定位方式=%s，value=%s', locator[0], locator[1])
 
-            if not is_all:
-                _element = WebDriverWait(self.driver, self.timeout, self.time).until(
-                    EC.presence_of_element_located(locator))
-            else:
-                _element = WebDriverWait(self.driver, self.timeout, self.time).until(
-                    EC.presence_of_all_elements_located(locator))
+            _element = self.waiter().find(locator, is_all)
 
             logger.debug('定位元素 %s 成功', locator)
             return _element
@@ -172,14 +191,14 @@ class Operator(Locator):
     def is_title(self, _title=''):
         """显式等待页面 title 完全等于预期"""
         try:
-            return WebDriverWait(self.driver, self.timeout, self.time).until(EC.title_is(_title))
+            return self.waiter().until(EC.title_is(_title), 'title')
         except:
             return False
 
     def is_title_contains(self, _title=''):
         """显式等待页面 title 包含预期字符串"""
         try:
-            return WebDriverWait(self.driver, self.timeout, self.time).until(EC.title_contains(_title))
+            return self.waiter().until(EC.title_contains(_title), 'title')
         except:
             return False
 
@@ -187,8 +206,7 @@ class Operator(Locator):
         """显式等待指定元素文本包含预期字符串"""
         try:
             locator = self.get_locator_data(locator, change_data)
-            return WebDriverWait(self.driver, self.timeout, self.time).until(
-                EC.text_to_be_present_in_element(locator, _text))
+            return self.waiter().until(EC.text_to_be_present_in_element(locator, _text), '{}={}'.format(*locator))
         except:
             return False
 
@@ -196,15 +214,15 @@ class Operator(Locator):
         """显式等待指定元素 value 属性包含预期字符串"""
         try:
             locator = self.get_locator_data(locator, change_data)
-            return WebDriverWait(self.driver, self.timeout, self.time).until(
-                EC.text_to_be_present_in_element_value(locator, _value))
+            return self.waiter().until(EC.text_to_be_present_in_element_value(locator, _value),
+                                       '{}={}'.format(*locator))
         except:
             return False
 
     def is_alert(self):
         """判断弹窗是否出现，若出现则返回 alert 对象"""
         try:
-            return WebDriverWait(self.driver, self.timeout, self.time).until(EC.alert_is_present())
+            return self.waiter().until(EC.alert_is_present(), 'alert')
         except:
             return False
 
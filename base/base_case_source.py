@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+惰性用例数据源
+--------------------------------------------------
+用于 @pytest.mark.parametrize：收集阶段只产出轻量的 CaseHandle（只记录下标），
+用例真正执行、第一次读取字段时才解析对应的那一行数据。
+    @pytest.mark.parametrize('login_data', DataDriver().get_lazy_case_data('login'))
+    def test_login(self, login_data):
+        login_data['username']      # 此时才加载该行
+
+- YamlCaseSource ：只扫描顶层 "- " 列表项的字节偏移，按需解析单条用例；顶层不是列表时报错
+- ExcelCaseSource：收集阶段只读第一列计数，执行阶段通过工作簿缓存加载整表
+- LineCaseSource ：CSV / JSONL，基于 mmap 行偏移索引按下标读取单行
+--------------------------------------------------
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+
+import yaml
+from openpyxl import load_workbook
+
+from base.base_excel import get_excel_book
+from base.base_logger import Logger
+from base.base_yaml import SafeLoader, read_yaml
+
+logger = Logger('base_case_source.py').get_logger()
+
+
+# ---------------------------------------------------------------------------
+# 单条用例句柄
+# ---------------------------------------------------------------------------
+class CaseHandle(Mapping):
+    """
+    单条用例的惰性句柄，支持 login_data['username'] / .get() / dict(login_data) 等字典式读取
+    """
+
+    __slots__ = ('_source', 'index', '_row')
+
+    def __init__(self, source, index: int):
+        self._source = source
+        self.index = index
+        self._row = None
+
+    @property
+    def row(self):
+        """真正的用例数据（首次访问时加载）"""
+        if self._row is None:
+            self._row = self._source.load(self.index)
+        return self._row
+
+    def __getitem__(self, key):
+        return self.row[key]
+
+    def __iter__(self):
+        return iter(self.row)
+
+    def __len__(self):
+        return len(self.row)
+
+    def __repr__(self):
+        return '<CaseHandle {}[{}]>'.format(self._source.name, self.index)
+
+
+# ---------------------------------------------------------------------------
+# 数据源基类
+# ---------------------------------------------------------------------------
+class CaseSource(Sequence):
+    """
+    惰性数据源：len() 与下标访问只返回 CaseHandle，不解析数据
+    子类实现 _count() 与 load(index)
+    """
+
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+        self._length = None
+
+    def __len__(self):
+        if self._length is None:
+            self._length = self._count()
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [CaseHandle(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('{} 只有 {} 条用例'.format(self.name, len(self)))
+        return CaseHandle(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield CaseHandle(self, index)
+
+    def __repr__(self):
+        return '<{} {} cases={}>'.format(type(self).__name__, self.name, len(self))
+
+    def _count(self) -> int:
+        raise NotImplementedError
+
+    def load(self, index: int):
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# YAML
+# ---------------------------------------------------------------------------
+class YamlCaseSource(CaseSource):
+    """
+    顶层为块状列表的 YAML 用例文件：
+        - username: '201901010103'
+          password: '123'
+        - username: ...
+    收集阶段只记录每个 "- " 列表项的起始字节偏移；文件不是这种结构时退化为整体解析
+    """
+
+    def __init__(self, path: str, name: str = None):
+        super().__init__(path, name or path)
+        self._offsets = None     # array('Q')：每条用例的起始偏移，最后追加文件长度
+        self._rows = None        # 退化为整体解析时的数据
+
+    def _scan(self):
+        offsets = array('Q')
+        position = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                first = line[:1]
+                if first == b'-' and line[1:2] in (b' ', b'\n', b'\r', b''):
+                    if line.startswith(b'---'):
+                        return None          # 多文档，无法按行切分
+                    offsets.append(position)
+                elif first not in (b' ', b'\t', b'#', b'\n', b'\r', b''):
+                    return None              # 顶层不是块状列表
+                position += len(line)
+        offsets.append(position)
+        return offsets
+
+    def _count(self) -> int:
+        self._offsets = self._scan()
+        if self._offsets is None:
+            logger.debug('【惰性用例】%s 不是顶层块状列表，改为整体解析', self.path)
+            rows = read_yaml(self.path)
+            if not isinstance(rows, list):
+                raise ValueError('{} 的顶层必须是用例列表（- 开头的每项一条用例），实际为 {}'.format(
+                    self.path, type(rows).__name__))
+            self._rows = rows
+            return len(rows)
+        return len(self._offsets) - 1
+
+    def load(self, index: int):
+        len(self)
+        if self._rows is not None:
+            return self._rows[index]
+        start, end = self._offsets[index], self._offsets[index + 1]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            chunk = f.read(end - start)
+        try:
+            return yaml.load(chunk, Loader=SafeLoader)[0]
+        except yaml.YAMLError:
+            # 例如用例之间使用了锚点/别名，只能整体解析
+            self._rows = read_yaml(self.path)
+            return self._rows[index]
+
+
+# ---------------------------------------------------------------------------
+# Excel
+# ---------------------------------------------------------------------------
+class ExcelCaseSource(CaseSource):
+    """
+    Excel 用例表：收集阶段只读第一列逐行计数（不依赖可能过期的维度信息）；
+    第一次加载用例时通过 get_excel_book 读取整张表，之后按下标 O(1) 取行
+    """
+
+    def __init__(self, path: str, sheet_name: str = None, name: str = None):
+        super().__init__(path, name or path)
+        self.sheet_name = sheet_name
+        self._table = None
+
+    def _count(self) -> int:
+        wb = load_workbook(self.path, read_only=True)
+        try:
+            if self.sheet_name is None:
+                self.sheet_name = 'Sheet1' if 'Sheet1' in wb.sheetnames else wb.sheetnames[0]
+            ws = wb[self.sheet_name]
+            # 文件中的维度信息可能过期（其他工具写入后未更新），不能直接用 max_row；只取第一列逐行数
+            ws.reset_dimensions()
+            rows = sum(1 for _ in ws.iter_rows(max_col=1, values_only=True))
+        finally:
+            wb.close()
+        return max(rows - 1, 0)
+
+    def load(self, index: int):
+        if self._table is None:
+            len(self)
+            self._table = get_excel_book(self.path).table(self.sheet_name)
+        return self._table[index]
+
+
+# ---------------------------------------------------------------------------
+# CSV / JSONL
+# ---------------------------------------------------------------------------
+class LineCaseSource(CaseSource):
+    """
+    CSV / JSONL 用例文件：收集阶段建立行偏移索引（只扫描换行符），执行时按下标解析单行
+    """
+
+    def __init__(self, data_file, name: str = None):
+        """
+        :param data_file: LineDataFile（CsvDataFile / JsonlDataFile）
+        """
+        super().__init__(data_file.path, name or data_file.path)
+        self.data_file = data_file
+
+    def _count(self) -> int:
+        return len(self.data_file)
+
+    def load(self, index: int):
+        return self.data_file[index]
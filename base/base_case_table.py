@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+列式用例表
+--------------------------------------------------
+大规模数据驱动时，每条用例都是一个完整 dict，重复的 key 字符串和 dict 本身的开销
+会占满执行进程的内存。CaseTable 按列存储：
+- 每一列只存一份；字符串做 sys.intern，相同取值共享同一对象
+- 纯整数/纯浮点列存为 NumPy 数组（未安装 NumPy 时用标准库 array）
+- 每条用例是只有两个槽位的 CaseRow 视图，仍支持 login_data['username'] 读取
+--------------------------------------------------
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+try:
+    import numpy
+except ImportError:      # NumPy 为可选依赖
+    numpy = None
+
+# 异构行中缺失的字段
+_MISSING = object()
+
+# array('q') 可表示的整数范围
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _build_column(values: list):
+    """
+    根据取值类型选择列的存储方式
+    :return: (列存储, 取值函数, 列类型)
+    """
+    types = {type(v) for v in values if v is not None and v is not _MISSING}
+    complete = values and all(v is not None and v is not _MISSING for v in values)
+
+    if complete and types == {int} and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        column = numpy.array(values, dtype=numpy.int64) if numpy else array('q', values)
+        return column, (column.item if numpy else column.__getitem__), int
+    if complete and types == {float}:
+        column = numpy.array(values, dtype=numpy.float64) if numpy else array('d', values)
+        return column, (column.item if numpy else column.__getitem__), float
+
+    intern = sys.intern
+    column = tuple(intern(v) if type(v) is str else v for v in values)
+    if len(types) == 1:
+        column_type = types.pop()
+    else:
+        column_type = tuple(sorted(types, key=lambda t: t.__name__))
+    return column, column.__getitem__, column_type
+
+
+# ---------------------------------------------------------------------------
+# 行视图
+# ---------------------------------------------------------------------------
+class CaseRow(Mapping):
+    """
+    CaseTable 中一行的只读视图，只保存 (表, 行号) 两个引用
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        value = self._table._getters[key](self._index)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        if not self._table._sparse:
+            return iter(self._table.headers)
+        return (h for h in self._table.headers if self._table._getters[h](self._index) is not _MISSING)
+
+    def __len__(self):
+        if not self._table._sparse:
+            return len(self._table.headers)
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        # 序列化（如跨进程传递）时退化为普通 dict
+        return dict, (dict(self),)
+
+
+# ---------------------------------------------------------------------------
+# 列式表
+# ---------------------------------------------------------------------------
+class CaseTable(Sequence):
+    """
+    列式存储的用例表，可直接交给 pytest.mark.parametrize
+        table = CaseTable.from_rows('login', rows)
+        table[0]['username']
+        table.columns['username']     # 整列
+        table.column_types['age']     # int
+    """
+
+    __slots__ = ('name', 'headers', 'columns', 'column_types', '_getters', '_length', '_sparse', '__weakref__')
+
+    def __init__(self, name: str, headers, columns: dict, length: int):
+        """
+        :param name:    表名（用于日志）
+        :param headers: 列名顺序
+        :param columns: 列名 -> 取值 list（缺失字段用 _MISSING 占位）
+        :param length:  行数
+        """
+        self.name = name
+        self.headers = tuple(headers)
+        self._length = length
+        self.columns = {}
+        self.column_types = {}
+        self._getters = {}
+        self._sparse = False
+        for header in self.headers:
+            values = columns[header]
+            if not self._sparse and any(v is _MISSING for v in values):
+                self._sparse = True
+            self.columns[header], self._getters[header], self.column_types[header] = _build_column(values)
+
+    @classmethod
+    def from_rows(cls, name: str, rows) -> 'CaseTable':
+        """由 List[Dict] 构建；各行字段不完全一致时取并集，缺失字段读取时抛 KeyError"""
+        headers, columns = [], {}
+        length = 0
+        for index, row in enumerate(rows):
+            for key in row:
+                if key not in columns:
+                    headers.append(key)
+                    columns[key] = [_MISSING] * index
+            for key, values in columns.items():
+                values.append(row.get(key, _MISSING))
+            length = index + 1
+        return cls(name, headers, columns, length)
+
+    @classmethod
+    def from_tuples(cls, name: str, headers, rows) -> 'CaseTable':
+        """由表头 + 行元组（如 openpyxl iter_rows(values_only=True)）构建，不创建中间 dict"""
+        headers = list(headers)
+        columns = {h: [] for h in headers}
+        appenders = [columns[h].append for h in headers]
+        width = len(headers)
+        length = 0
+        for values in rows:
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            for append, value in zip(appenders, values):
+                append(value)
+            length += 1
+        return cls(name, headers, columns, length)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [CaseRow(self, i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('{} 只有 {} 行'.format(self.name, self._length))
+        return CaseRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield CaseRow(self, index)
+
+    def __repr__(self):
+        return '<CaseTable {} rows={} headers={}>'.format(self.name, self._length, list(self.headers))
+
+
+def is_row_list(data) -> bool:
+    """是否为可转成 CaseTable 的 List[Dict]"""
+    return isinstance(data, list) and bool(data) and all(isinstance(row, dict) for row in data)
+
+
+# ---------------------------------------------------------------------------
+# 内存对比：List[Dict] vs CaseTable
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import gc
+    import tracemalloc
+
+    def make_rows(count):
+        # 模拟从 YAML/Excel 解析出来的数据：每行都是独立的 dict 和独立的字符串对象
+        return [{'username': 'user%06d' % i, 'password': str(i % 1000),
+                 'flag': ''.join(['stu', 'dent']) if i % 2 else ''.join(['tea', 'cher']), 'age': i % 80}
+                for i in range(count)]
+
+    for count in (10000, 100000):
+        gc.collect()
+        tracemalloc.start()
+        rows = make_rows(count)
+        dict_size = tracemalloc.get_traced_memory()[0]
+        table = CaseTable.from_rows('bench', rows)
+        del rows
+        gc.collect()
+        table_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert table[count - 1]['age'] == (count - 1) % 80
+        print('{} 行：List[Dict] {:.1f} MB，CaseTable {:.1f} MB（NumPy：{}）'.format(
+            count, dict_size / 1024 / 1024, table_size / 1024 / 1024, '是' if numpy else '否'))
+        del table
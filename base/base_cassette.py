@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+接口录制 / 回放（cassette）
+--------------------------------------------------
+把接口请求的指纹与响应保存在 SQLite 文件中（data/cassettes/<项目名>.sqlite），
+离线运行接口用例时直接从本地返回响应，不再访问被测系统。
+- off    ：不录制也不回放（默认）
+- record ：始终请求被测系统，并覆盖写入 cassette
+- replay ：只从 cassette 返回响应，找不到匹配的请求时抛出 CassetteMismatchError
+- auto   ：cassette 中有就回放，没有就请求并录制
+模式取自 [接口自动化配置] record_mode，pytest 可用 --record-mode 覆盖
+
+请求指纹 = 方法 + URL + params + data/json 的规范化结果（字典按键排序），
+headers、timeout、stream 等不参与匹配。响应体超过 256 字节时 zlib 压缩存储；
+录制流式响应时需要读取完整响应体，内存占用与非流式相同
+--------------------------------------------------
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+
+from base.base_config import get_config
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+from base.base_response import build_response
+
+logger = Logger('base_cassette.py').get_logger()
+
+RECORD_MODES = ('off', 'record', 'replay', 'auto')
+
+# 小于该长度的响应体不压缩
+_COMPRESS_MIN_SIZE = 256
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS interactions (
+    fingerprint TEXT PRIMARY KEY,
+    method      TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    status      INTEGER NOT NULL,
+    reason      TEXT,
+    headers     TEXT NOT NULL,
+    body        BLOB,
+    compressed  INTEGER NOT NULL,
+    encoding    TEXT,
+    elapsed     REAL,
+    final_url   TEXT,
+    recorded_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_endpoint ON interactions (method, url);
+'''
+
+
+class CassetteMismatchError(LookupError):
+    """回放模式下 cassette 中没有与当前请求匹配的记录"""
+
+
+# ---------------------------------------------------------------------------
+# 请求指纹
+# ---------------------------------------------------------------------------
+def _normalize(value):
+    """把请求体 / 参数转换为可稳定序列化的结构"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, 'items'):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+
+def canonical_request(yaml_dict: dict) -> dict:
+    """
+    请求的规范化表示：方法大写、URL 中的查询串并入 params
+    :param yaml_dict: 交给 session.request 的请求字典
+    """
+    scheme, netloc, path, query, _ = urlsplit(yaml_dict['url'])
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    params.update(_normalize(yaml_dict.get('params')) or {})
+    return {
+        'method': yaml_dict['method'].upper(),
+        'url': urlunsplit((scheme, netloc, path, '', '')),
+        'params': params,
+        'data': _normalize(yaml_dict.get('data')),
+        'json': _normalize(yaml_dict.get('json')),
+    }
+
+
+def fingerprint(canonical: dict) -> str:
+    text = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _diff(expected: dict, actual: dict) -> list:
+    """列出两个规范化请求的差异字段"""
+    lines = []
+    for part in ('params', 'data', 'json'):
+        left, right = expected.get(part), actual.get(part)
+        if isinstance(left, dict) and isinstance(right, dict):
+            for key in sorted(set(left) | set(right)):
+                if left.get(key) != right.get(key):
+                    lines.append('{}.{}：录制 {!r} / 当前 {!r}'.format(part, key, left.get(key), right.get(key)))
+        elif left != right:
+            lines.append('{}：录制 {!r} / 当前 {!r}'.format(part, left, right))
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# cassette 存储
+# ---------------------------------------------------------------------------
+class Cassette(object):
+    """
+    单个 cassette 文件
+    用法：
+        cassette = Cassette('data/cassettes/demo.sqlite', mode='auto')
+        response = cassette.play(session, yaml_dict)
+    """
+
+    def __init__(self, path: str, mode: str = 'auto'):
+        if mode not in RECORD_MODES:
+            raise ValueError('record_mode 只能是 {}，当前为 {!r}'.format('/'.join(RECORD_MODES), mode))
+        self.path = path
+        self.mode = mode
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # 指纹 -> 已解压的响应数据，同一请求重复回放时不再查库
+        self._memo = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+
+    # ----------------------
+    #  读取
+    # ----------------------
+    def lookup(self, key: str):
+        """按指纹查找，返回 (status, reason, headers, body, encoding, elapsed, final_url) 或 None"""
+        entry = self._memo.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, reason, headers, body, compressed, encoding, elapsed, final_url '
+                'FROM interactions WHERE fingerprint = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body, compressed, encoding, elapsed, final_url = row
+        body = zlib.decompress(body) if compressed else (body or b'')
+        entry = (status, reason, json.loads(headers), body, encoding, elapsed, final_url)
+        self._memo[key] = entry
+        return entry
+
+    def _nearest(self, canonical: dict) -> list:
+        """同一方法 + URL 下已录制的请求差异，用于提示回放失败的原因"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT request FROM interactions WHERE method = ? AND url = ? LIMIT 20',
+                (canonical['method'], canonical['url'])).fetchall()
+        if not rows:
+            return []
+        diffs = [_diff(json.loads(row[0]), canonical) for row in rows]
+        return min(diffs, key=len)
+
+    @staticmethod
+    def _build_response(entry) -> requests.Response:
+        response = build_response(*entry)
+        response.from_cassette = True
+        return response
+
+    # ----------------------
+    #  写入
+    # ----------------------
+    def record(self, key: str, canonical: dict, response: requests.Response) -> None:
+        body = response.content or b''
+        compressed = len(body) >= _COMPRESS_MIN_SIZE
+        stored = zlib.compress(body) if compressed else body
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, canonical['method'], canonical['url'],
+                 json.dumps(canonical, sort_keys=True, ensure_ascii=False),
+                 response.status_code, response.reason, json.dumps(dict(response.headers)),
+                 stored, int(compressed), response.encoding,
+                 response.elapsed.total_seconds(), response.url, time.time()))
+        self._memo.pop(key, None)
+        self.recorded += 1
+
+    # ----------------------
+    #  录制 / 回放入口
+    # ----------------------
+    def match(self, yaml_dict: dict):
+        """
+        按当前模式查找录制的响应（同步、异步接口共用）
+        :return: (指纹, 规范化请求, 录制的响应数据)；需要真正发请求时响应数据为 None，
+                 之后调用 record(指纹, 规范化请求, 响应) 录制
+        """
+        canonical = canonical_request(yaml_dict)
+        key = fingerprint(canonical)
+
+        if self.mode in ('replay', 'auto'):
+            entry = self.lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return key, canonical, entry
+            self.misses += 1
+            if self.mode == 'replay':
+                lines = self._nearest(canonical)
+                hint = ('\n同一地址已有录制，差异：\n  ' + '\n  '.join(lines)) if lines else '\n该地址没有任何录制记录'
+                raise CassetteMismatchError('【回放失败】{} 中没有匹配的请求：{} {}（指纹 {}）{}'.format(
+                    self.path, canonical['method'], canonical['url'], key, hint))
+        return key, canonical, None
+
+    def play(self, session: requests.Session, yaml_dict: dict) -> requests.Response:
+        """
+        按当前模式处理一次请求
+        :param session:   真正发请求时使用的 Session
+        :param yaml_dict: 交给 session.request 的请求字典
+        """
+        key, canonical, entry = self.match(yaml_dict)
+        if entry is not None:
+            return self._build_response(entry)
+        response = session.request(**yaml_dict)
+        self.record(key, canonical, response)
+        return response
+
+
+# ---------------------------------------------------------------------------
+# 进程级 cassette
+# ---------------------------------------------------------------------------
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+# pytest --record-mode 设置的模式，优先于 config.ini
+_mode_override = None
+
+
+def set_record_mode(mode: str = None) -> None:
+    """覆盖 config.ini 中的 record_mode；传 None 恢复为读取配置"""
+    global _mode_override
+    if mode is not None and mode not in RECORD_MODES:
+        raise ValueError('record_mode 只能是 {}，当前为 {!r}'.format('/'.join(RECORD_MODES), mode))
+    _mode_override = mode
+
+
+def get_cassette():
+    """
+    按当前模式返回进程内共享的 Cassette；off 模式返回 None
+    文件名取 [接口自动化配置] cassette，未配置时使用 TEST_PROJECT
+    """
+    config = get_config()
+    api_config = config['接口自动化配置']
+    mode = _mode_override or api_config.get('record_mode', 'off').strip().lower() or 'off'
+    if mode == 'off':
+        return None
+    name = api_config.get('cassette', '').strip() or config['项目运行设置']['TEST_PROJECT']
+    path = os.path.join(BP.CASSETTE_DIR, name + '.sqlite')
+    cassette = _cassettes.get((path, mode))
+    if cassette is None:
+        with _cassettes_lock:
+            cassette = _cassettes.get((path, mode))
+            if cassette is None:
+                cassette = _cassettes[(path, mode)] = Cassette(path, mode)
+                logger.info('【接口录制回放】模式 %s，cassette：%s', mode, path)
+    return cassette
+
+
+# ---------------------------------------------------------------------------
+# 基准：回放耗时
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import tempfile
+    import timeit
+    from ext_tools.stub_server import StubServer
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    request = {'method': 'post', 'url': '', 'params': {'p_p_id': '58'},
+               'data': {'_58_login': 'admin', '_58_password': '123456'}}
+    with StubServer() as server:
+        request['url'] = server.url + '/web/guest/home'
+        session = requests.Session()
+        Cassette(path, 'record').play(session, request)
+        network = timeit.timeit(lambda: session.request(**request), number=200) / 200
+
+    replay = Cassette(path, 'replay')
+    replay.play(session, request)
+    number = 20000
+    cost = timeit.timeit(lambda: replay.play(session, request), number=number) / number
+    print('请求桩服务：{:.1f} us/次'.format(network * 1e6))
+    print('cassette 回放：{:.1f} us/次'.format(cost * 1e6))
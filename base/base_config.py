@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+全局配置快照
+--------------------------------------------------
+- 每个进程只解析一次 config.ini，得到不可变的 ConfigSnapshot
+- 依据文件 mtime 自动失效，修改配置后下一次 get_config() 即可拿到新快照
+- 提供 get_int / get_float / get_bool / get_list 类型化读取，转换结果只计算一次
+- 兼容 RawConfigParser 的读取方式：config['项目运行设置']['TEST_URL']（键名不区分大小写）
+--------------------------------------------------
+"""
+
+import os
+import threading
+from ast import literal_eval
+from collections.abc import Mapping
+from configparser import RawConfigParser
+from types import MappingProxyType
+
+from base.base_path import BasePath as BP
+
+# 与 RawConfigParser.getboolean 保持一致的布尔取值
+_BOOLEAN_STATES = RawConfigParser.BOOLEAN_STATES
+
+# 未传默认值时的占位对象
+_MISSING = object()
+
+
+# ---------------------------------------------------------------------------
+# 单个小节
+# ---------------------------------------------------------------------------
+class ConfigSection(Mapping):
+    """
+    config.ini 中的一个小节，只读
+    用法：
+        section = get_config()['客户端自动化配置']
+        section['duration']               # '0.1'（原始字符串，兼容旧代码）
+        section.get_float('duration')     # 0.1
+        section.get_bool('grayScale')     # True
+    """
+
+    def __init__(self, name: str, items):
+        self.name = name
+        # RawConfigParser 会把键名转成小写，这里保持一致
+        self._raw = MappingProxyType({k.lower(): v for k, v in items})
+        # 类型转换结果缓存：(转换类型, 键名) -> 值
+        self._typed = {}
+
+    def __getitem__(self, key):
+        return self._raw[key.lower()]
+
+    def __contains__(self, key):
+        return isinstance(key, str) and key.lower() in self._raw
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __repr__(self):
+        return '<ConfigSection [{}] {}>'.format(self.name, dict(self._raw))
+
+    # ----------------------
+    #  类型化读取
+    # ----------------------
+    def _coerce(self, kind: str, key: str, convert, default):
+        cache_key = (kind, key.lower())
+        try:
+            return self._typed[cache_key]
+        except KeyError:
+            pass
+        if key not in self:
+            if default is _MISSING:
+                raise KeyError('[{}] 小节中不存在配置项 {}'.format(self.name, key))
+            return default
+        try:
+            value = convert(self[key])
+        except (ValueError, SyntaxError) as e:
+            raise ValueError('[{}] {} = {!r} 无法转换为 {}：{}'.format(
+                self.name, key, self[key], kind, e))
+        self._typed[cache_key] = value
+        return value
+
+    def get_int(self, key: str, default=_MISSING) -> int:
+        return self._coerce('int', key, int, default)
+
+    def get_float(self, key: str, default=_MISSING) -> float:
+        return self._coerce('float', key, float, default)
+
+    def get_bool(self, key: str, default=_MISSING) -> bool:
+        return self._coerce('bool', key, _to_bool, default)
+
+    def get_list(self, key: str, default=_MISSING) -> tuple:
+        return self._coerce('list', key, _to_list, default)
+
+
+def _to_bool(value: str) -> bool:
+    """'True'/'yes'/'on'/'1' -> True；'False'/'no'/'off'/'0' -> False"""
+    try:
+        return _BOOLEAN_STATES[value.strip().lower()]
+    except KeyError:
+        raise ValueError('不是合法的布尔值')
+
+
+def _to_list(value: str) -> tuple:
+    """
+    支持两种写法：
+    - Python 字面量：['a@qq.com', 'b@qq.com']
+    - 逗号分隔：a@qq.com, b@qq.com
+    返回 tuple，保证快照不可变
+    """
+    value = value.strip()
+    if not value:
+        return ()
+    if value[0] in '[(':
+        return tuple(literal_eval(value))
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+# ---------------------------------------------------------------------------
+# 整个配置文件
+# ---------------------------------------------------------------------------
+class ConfigSnapshot(Mapping):
+    """
+    config.ini 的只读快照，行为与 RawConfigParser 的字典式读取一致
+    """
+
+    def __init__(self, path: str, mtime_ns: int, size: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+        parser = RawConfigParser()
+        parser.read(path, encoding='utf-8')
+        self._sections = MappingProxyType({
+            name: ConfigSection(name, parser.items(name)) for name in parser.sections()
+        })
+
+    def __getitem__(self, name):
+        return self._sections[name]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __repr__(self):
+        return '<ConfigSnapshot {} sections={}>'.format(self.path, list(self._sections))
+
+    def sections(self):
+        return list(self._sections)
+
+
+# ---------------------------------------------------------------------------
+# 进程级缓存
+# ---------------------------------------------------------------------------
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def get_config(config_path: str = BP.CONFIG_FILE) -> ConfigSnapshot:
+    """
+    获取配置快照；文件未修改时直接返回缓存对象，只付出一次 os.stat 的代价
+    :param config_path: 配置文件路径，默认 config/config.ini
+    :return: ConfigSnapshot
+    """
+    stat = os.stat(config_path)
+    snapshot = _snapshots.get(config_path)
+    if snapshot is not None and snapshot.mtime_ns == stat.st_mtime_ns and snapshot.size == stat.st_size:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(config_path)
+        if snapshot is None or snapshot.mtime_ns != stat.st_mtime_ns or snapshot.size != stat.st_size:
+            snapshot = ConfigSnapshot(config_path, stat.st_mtime_ns, stat.st_size)
+            _snapshots[config_path] = snapshot
+        return snapshot
+
+
+# ---------------------------------------------------------------------------
+# 微基准：模拟一次页面对象实例化时的配置读取开销
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import timeit
+    from base.utils import read_config_ini
+
+    def _old():
+        cfg = read_config_ini(BP.CONFIG_FILE)
+        client = cfg['客户端自动化配置']
+        return (cfg['项目运行设置']['TEST_PROJECT'], float(client['duration']),
+                float(client['interval']), float(client['confidence']))
+
+    def _new():
+        cfg = get_config()
+        client = cfg['客户端自动化配置']
+        return (cfg['项目运行设置']['TEST_PROJECT'], client.get_float('duration'),
+                client.get_float('interval'), client.get_float('confidence'))
+
+    number = 10000
+    old_cost = timeit.timeit(_old, number=number) / number * 1e6
+    new_cost = timeit.timeit(_new, number=number) / number * 1e6
+    print('RawConfigParser 每次解析：{:.2f} us/次'.format(old_cost))
+    print('ConfigSnapshot 进程快照：{:.2f} us/次'.format(new_cost))
+    print('加速比：{:.1f}x'.format(old_cost / new_cost))
@@ -1,37 +1,36 @@
+from base.base_context import get_context
+
+
 class GlobalManager(object):
     """
-    全局单例管理器
+    全局单例管理器（兼容旧代码，实际数据保存在 base_context.ContextStore 中）
     作用：在程序运行期间，跨模块/跨函数共享少量全局变量
     用法：
         gm = GlobalManager()
         gm.set_value("token", "abc123")
         print(gm.get_value("token"))
+    新代码请直接使用 get_context()，并按需要选择 thread / test / worker / session 作用域
     """
 
-    # 存储所有全局变量的字典（类变量，所有实例共享）
-    _global_dict = {}
     # 单例实例引用（类变量，确保只生成一个对象）
     _instance = None
 
-    def set_value(self, key, value):
+    def set_value(self, key, value, scope='session'):
         """
         设置全局变量
         :param key: 变量名，建议统一使用大写字符串，避免重复
         :param value: 任意类型，需要存储的值
+        :param scope: 作用域，默认 session（整轮运行共享）
         """
-        self._global_dict[key] = value
+        get_context().set(key, value, scope)
 
-    def get_value(self, key):
+    def get_value(self, key, default=None):
         """
-        读取全局变量
+        读取全局变量（按 thread -> test -> worker -> session 查找）
         :param key: 变量名
-        :return: 对应值；若 key 不存在，打印提示并返回 None
+        :return: 对应值；若 key 不存在返回 default
         """
-        try:
-            return self._global_dict[key]
-        except KeyError:
-            print(f"{key} 变量不存在")
-            return None
+        return get_context().get(key, default)
 
     def __new__(cls, *args, **kwargs):
         """
@@ -40,4 +39,4 @@ class GlobalManager(object):
         """
         if not cls._instance:
             cls._instance = super().__new__(cls, *args, **kwargs)
-        return cls._instance
\ No newline at end of file
+        return cls._instance
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+分作用域的运行上下文
+--------------------------------------------------
+替代进程级的 GlobalManager 字典，按作用域隔离共享对象，支持多线程 / 多进程并行执行用例：
+- thread ：当前线程私有
+- test   ：当前用例私有（conftest 在每个用例开始时进入 test_scope，结束后自动清空），
+           如 WebDriver；用例在线程中并行执行时互不干扰；不在用例中时归入同一个默认分区
+- worker ：当前进程私有（pytest-xdist 的一个 worker），fork 出的子进程不会继承
+- session：整轮运行共享，如配置；跨进程时通过 handoff / receive 显式传递（pickle）
+get 不指定作用域时按 thread -> test -> worker -> session 查找，取到第一个为止
+
+读取不加锁：session / worker / test 作用域写入时复制出新字典再整体替换（copy-on-write），
+读取方拿到的字典永远不会再被修改；thread 作用域本身只有一个线程访问
+用法：
+    context = get_context()
+    context.set('driver', driver, scope='test')
+    driver = context.get('driver')
+--------------------------------------------------
+"""
+
+import contextvars
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from base.base_logger import Logger
+
+logger = Logger('base_context.py').get_logger()
+
+# 查找顺序：由内到外
+SCOPES = ('thread', 'test', 'worker', 'session')
+
+# 不在任何用例中时 test 作用域使用的分区
+_NO_TEST = ''
+
+# 当前用例标识（ContextVar：线程、协程各自独立）
+_current_test = contextvars.ContextVar('current_test', default=_NO_TEST)
+
+_EMPTY = MappingProxyType({})
+_MISSING = object()
+
+
+class ContextMissingError(KeyError):
+    """上下文中没有该变量"""
+
+
+class _ThreadValues(threading.local):
+    """每个线程首次访问时初始化（避免 getattr 缺省值触发 AttributeError 的开销）"""
+
+    def __init__(self):
+        self.values = {}
+
+
+class ContextStore(object):
+    """分作用域的键值存储，一个进程一个实例（get_context）"""
+
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._session = {}
+        self._worker = {}
+        self._tests = {}            # 用例标识 -> {变量}
+        self._local = _ThreadValues()
+        # 从未写入过 thread 作用域时，get 跳过线程局部存储的查找
+        self._thread_used = False
+
+    # ----------------------
+    #  读取（不加锁）
+    # ----------------------
+    def _scope_values(self, scope: str):
+        if scope == 'thread':
+            return self._local.values
+        if scope == 'test':
+            return self._tests.get(_current_test.get(), _EMPTY)
+        if scope == 'worker':
+            return self._worker
+        if scope == 'session':
+            return self._session
+        raise ValueError('scope 只能是 {}，当前为 {!r}'.format('/'.join(SCOPES), scope))
+
+    def get(self, key: str, default=None, scope: str = None):
+        """
+        :param scope: 指定作用域；为空时按 thread -> test -> worker -> session 查找
+        :return:      不存在时返回 default
+        """
+        if scope is not None:
+            return self._scope_values(scope).get(key, default)
+        if self._thread_used:
+            value = self._local.values.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        for values in (self._tests.get(_current_test.get(), _EMPTY), self._worker, self._session):
+            value = values.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return default
+
+    def require(self, key: str, scope: str = None):
+        """同 get，不存在时抛出 ContextMissingError"""
+        value = self.get(key, _MISSING, scope)
+        if value is _MISSING:
+            raise ContextMissingError('上下文中没有 {}（作用域：{}）'.format(key, scope or '/'.join(SCOPES)))
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def snapshot(self, scope: str) -> MappingProxyType:
+        """某个作用域当前全部变量的只读视图"""
+        return MappingProxyType(dict(self._scope_values(scope)))
+
+    # ----------------------
+    #  写入（copy-on-write）
+    # ----------------------
+    def set(self, key: str, value, scope: str = 'session') -> None:
+        if scope == 'thread':
+            self._thread_used = True
+            self._local.values[key] = value
+            return
+        with self._write_lock:
+            if scope == 'test':
+                test_id = _current_test.get()
+                tests = dict(self._tests)
+                values = dict(tests.get(test_id, _EMPTY))
+                values[key] = value
+                tests[test_id] = values
+                self._tests = tests
+            else:
+                values = dict(self._scope_values(scope))
+                values[key] = value
+                self._replace(scope, values)
+
+    def update(self, values: dict, scope: str = 'session') -> None:
+        """一次写入多个变量（只复制一次）"""
+        if scope == 'thread':
+            self._thread_used = True
+            self._local.values.update(values)
+            return
+        with self._write_lock:
+            if scope == 'test':
+                test_id = _current_test.get()
+                tests = dict(self._tests)
+                tests[test_id] = dict(tests.get(test_id, _EMPTY), **values)
+                self._tests = tests
+            else:
+                merged = dict(self._scope_values(scope))
+                merged.update(values)
+                self._replace(scope, merged)
+
+    def pop(self, key: str, default=None, scope: str = 'session'):
+        if scope == 'thread':
+            return self._local.values.pop(key, default)
+        with self._write_lock:
+            if scope == 'test':
+                test_id = _current_test.get()
+                values = dict(self._tests.get(test_id, _EMPTY))
+                value = values.pop(key, default)
+                tests = dict(self._tests)
+                tests[test_id] = values
+                self._tests = tests
+                return value
+            values = dict(self._scope_values(scope))
+            value = values.pop(key, default)
+            self._replace(scope, values)
+            return value
+
+    def clear(self, scope: str) -> None:
+        if scope == 'thread':
+            self._local.values = {}
+            return
+        with self._write_lock:
+            if scope == 'test':
+                tests = dict(self._tests)
+                tests.pop(_current_test.get(), None)
+                self._tests = tests
+            else:
+                self._replace(scope, {})
+
+    def _replace(self, scope: str, values: dict) -> None:
+        if scope == 'worker':
+            self._worker = values
+        elif scope == 'session':
+            self._session = values
+        else:
+            raise ValueError('scope 只能是 {}，当前为 {!r}'.format('/'.join(SCOPES), scope))
+
+    # ----------------------
+    #  用例作用域
+    # ----------------------
+    @contextmanager
+    def test_scope(self, test_id: str):
+        """
+        在 with 块内 test 作用域指向 test_id，退出时删除该用例的全部变量
+        :param test_id: 用例标识，如 pytest 的 item.nodeid
+        """
+        token = _current_test.set(test_id)
+        try:
+            yield self
+        finally:
+            _current_test.reset(token)
+            with self._write_lock:
+                if test_id in self._tests:
+                    tests = dict(self._tests)
+                    del tests[test_id]
+                    self._tests = tests
+
+    @staticmethod
+    def current_test() -> str:
+        return _current_test.get()
+
+    @staticmethod
+    def worker_id() -> str:
+        """pytest-xdist 的 worker 名称（gw0、gw1...），非并行运行时为 master"""
+        return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+    # ----------------------
+    #  跨进程传递
+    # ----------------------
+    def handoff(self, keys=None) -> bytes:
+        """
+        把 session 作用域打包，交给子进程 / xdist worker 后用 receive 还原
+        :param keys: 只传递这些变量；为空时传递全部可 pickle 的变量（不可 pickle 的跳过并记录日志）
+        """
+        session = self._session
+        if keys is not None:
+            missing = [key for key in keys if key not in session]
+            if missing:
+                raise ContextMissingError('session 作用域中没有 {}'.format(', '.join(missing)))
+            return pickle.dumps({key: session[key] for key in keys}, pickle.HIGHEST_PROTOCOL)
+        values = {}
+        for key, value in session.items():
+            try:
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.debug('【上下文传递】%s 无法序列化，跳过：%s', key, e)
+                continue
+            values[key] = value
+        return pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+    def receive(self, blob: bytes) -> dict:
+        """还原 handoff 的结果并合并到 session 作用域，返回收到的变量"""
+        values = pickle.loads(blob)
+        self.update(values, scope='session')
+        return values
+
+    def _after_fork(self) -> None:
+        """fork 出的子进程：只保留 session 作用域"""
+        self._write_lock = threading.Lock()
+        self._worker = {}
+        self._tests = {}
+        self._local = _ThreadValues()
+        self._thread_used = False
+
+
+# ---------------------------------------------------------------------------
+# 进程级实例
+# ---------------------------------------------------------------------------
+_context = ContextStore()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: _context._after_fork())
+
+
+def get_context() -> ContextStore:
+    return _context
+
+
+# ---------------------------------------------------------------------------
+# 基准：读取耗时
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import timeit
+
+    context = get_context()
+    context.set('CONFIG_INFO', {'TEST_URL': 'http://127.0.0.1'})
+    with context.test_scope('demo::test_case'):
+        context.set('driver', object(), scope='test')
+        number = 1000000
+        for key in ('driver', 'CONFIG_INFO'):
+            cost = timeit.timeit(lambda: context.get(key), number=number) / number
+            print('get({!r})：{:.0f} ns/次'.format(key, cost * 1e9))
+    print('用例结束后 driver：', context.get('driver'))
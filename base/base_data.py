@@ -4,21 +4,23 @@
 统一数据管理模块
 --------------------------------------------------
 - DataBase：负责读取 *元素层* 数据（YAML 格式），支持占位符替换
-- DataDriver：负责读取 *用例层* 数据，支持 YAML / Excel 两种驱动方式
+- DataDriver：负责读取 *用例层* 数据，支持 YAML / Excel / CSV / JSONL 四种驱动方式
 --------------------------------------------------
 """
 
 import os
-from string import Template
-import yaml
 
 # 项目内部公共库
 from base.base_container import GlobalManager
 from base.base_logger import Logger
 from base.base_path import BasePath as BP
-from base.utils import read_config_ini
-from base.base_yaml import read_yaml
-from base.base_excel import ExcelRead
+from base.base_config import get_config
+from base.base_yaml import read_yaml, load_compiled_yaml
+from base.base_excel import ExcelRead, get_excel_book
+from base.base_file_index import get_file_index
+from base.base_case_source import YamlCaseSource, ExcelCaseSource, LineCaseSource
+from base.base_case_table import CaseTable, is_row_list
+from base.base_line_data import LINE_DATA_DRIVERS
 
 
 logger = Logger('base_data.py').get_logger()
@@ -29,7 +31,10 @@ logger = Logger('base_data.py').get_logger()
 # ---------------------------------------------------------------------------
 def init_file_path(file_path):
     """
-    递归遍历指定目录，返回 *文件名 → 绝对路径* 的映射字典
+    返回指定目录的 *文件名 → 绝对路径* 索引
+
+    索引在进程内只建立一次，之后按目录 mtime 增量刷新（见 base_file_index）；
+    是否持久化为磁盘清单由 [数据缓存配置] FILE_INDEX_MANIFEST 决定
 
     参数
     ----
@@ -38,27 +43,13 @@ def init_file_path(file_path):
 
     返回
     ----
-    dict
-        key   : 不带扩展名的文件名
+    FileIndex
+        key   : 不带扩展名的文件名（也可用带扩展名的完整文件名查找）
         value : 文件绝对路径
     """
-    doc_path = {}
-    path = None
-    # os.walk 返回三元组 (dirpath, surnames, filenames)
-    path_lists = [item for item in os.walk(file_path)]
-
-    for lists_item in path_lists:
-        for item in lists_item:
-            if isinstance(item, str):
-                # 记录当前目录
-                path = item
-            if isinstance(item, list):
-                # 遍历当前目录下的文件
-                for file_name in item:
-                    # 去掉扩展名作为 key
-                    key = file_name.split('.')[0]
-                    doc_path[key] = os.path.join(path, file_name)
-    return doc_path
+    config = get_config()
+    persist = '数据缓存配置' in config and config['数据缓存配置'].get_bool('FILE_INDEX_MANIFEST', False)
+    return get_file_index(file_path, persist=persist)
 
 
 def is_file_exist(file_path_map, file_name):
@@ -67,7 +58,7 @@ def is_file_exist(file_path_map, file_name):
 
     参数
     ----
-    file_path_map : dict
+    file_path_map : FileIndex / dict
         init_file_path 生成的映射表
     file_name : str
         待查找的文件名（不含扩展名）
@@ -85,6 +76,16 @@ def is_file_exist(file_path_map, file_name):
     return abs_path
 
 
+def split_doc_name(doc_name):
+    """
+    拆分用例文件名与工作表名：'workbook/sheet' -> ('workbook', 'sheet')，'login' -> ('login', None)
+    """
+    if doc_name and '/' in doc_name:
+        file_name, sheet_name = doc_name.split('/', 1)
+        return file_name, sheet_name
+    return doc_name, None
+
+
 # ---------------------------------------------------------------------------
 # 元素层数据读取
 # ---------------------------------------------------------------------------
@@ -100,15 +101,14 @@ class DataBase(object):
         # 元素文件名（不含扩展名）
         self.doc_name = doc_name
 
-        # 读取全局配置文件 config.ini
-        self.config = read_config_ini(BP.CONFIG_FILE)
+        # 全局配置快照（进程内只解析一次，文件修改后自动刷新）
+        self.config = get_config()
         self.run_config = self.config['项目运行设置']
 
-        # 根据 TEST_PROJECT 拼接出元素层根目录，并建立索引
+        # 根据 TEST_PROJECT 拼接出元素层根目录，取进程级索引（不再每次 os.walk）
         self.api_path = init_file_path(
             os.path.join(BP.DATA_ELEMENTS_DIR, self.run_config['TEST_PROJECT'])
         )
-        print('[DataBase] 元素层索引表：', self.api_path)
 
         # 非客户端模式时，必须确保文件存在
         if self.run_config['AUTO_TYPE'] != 'CLIENT':
@@ -118,6 +118,9 @@ class DataBase(object):
         """
         读取 YAML 并返回 Python 对象；支持占位符替换
 
+        文件按 (路径, mtime) 只解析一次，占位符只在预编译的叶子节点上替换，
+        每次返回独立拷贝，调用方可以放心修改返回值
+
         参数
         ----
         change_data : dict, optional
@@ -128,16 +131,23 @@ class DataBase(object):
         dict / list
             反序列化后的 YAML 内容
         """
-        if change_data:
-            # 需要动态替换
-            with open(self.abs_path, 'r', encoding='utf-8') as f:
-                raw_content = f.read()
-                # 使用 string.Template 做安全替换
-                changed_content = Template(raw_content).safe_substitute(**change_data)
-                return yaml.safe_load(changed_content)
-        else:
-            # 直接读取
-            return read_yaml(self.abs_path)
+        return load_compiled_yaml(self.abs_path).render(change_data)
+
+    def get_compiled(self, *path):
+        """
+        取元素文件中某个节点的预编译对象，只渲染需要的子树
+
+        参数
+        ----
+        path : str
+            逐级节点名，如 get_compiled('login_api') / get_compiled('login', 'username')
+
+        返回
+        ----
+        CompiledYaml
+            render(change_data) 渲染单条，render_many(rows) 批量渲染
+        """
+        return load_compiled_yaml(self.abs_path).select(*path)
 
 
 # ---------------------------------------------------------------------------
@@ -146,13 +156,15 @@ class DataBase(object):
 class DataDriver(object):
     """
     根据 DATA_DRIVER_TYPE 决定用例层数据源：
-    - yaml_driver : 读取 YAML
-    - excel_driver: 读取 Excel，返回 list[dict]
+    - yaml_driver : 读取 YAML，List[Dict] 以列式 CaseTable 返回
+    - excel_driver: 读取 Excel，返回列式 CaseTable；支持 'workbook/sheet' 指定工作表，
+                    同一工作簿每进程只加载一次
+    - csv_driver / jsonl_driver：mmap 映射文件，按下标或流式读取，不把数据集读入内存
     """
 
     def __init__(self, doc_name=None):
         self.gm = GlobalManager()
-        self.config = read_config_ini(BP.CONFIG_FILE)
+        self.config = get_config()
 
     def get_case_data(self, doc_name=None):
         """
@@ -161,28 +173,86 @@ class DataDriver(object):
         参数
         ----
         doc_name : str, optional
-            用例文件名（不含扩展名），默认为 None
+            用例文件名（不含扩展名），默认为 None；
+            Excel 驱动可写成 'workbook/sheet'，未指定工作表时取 Sheet1
 
         返回
         ----
-        dict / list / None
-            YAML 驱动：返回 dict / list
-            Excel 驱动：返回 list[dict]，每行转换为一个字典
+        dict / list / CaseTable / None
+            YAML 驱动：List[Dict] 转为列式 CaseTable，其它结构原样返回 dict / list
+            Excel 驱动：返回 CaseTable，每行是支持 row['列名'] 读取的 CaseRow
+            CSV / JSONL 驱动：返回 LineDataFile，可 len()、按下标读取或迭代，每行为 Dict
         """
         data_type = self.config['项目运行设置']['DATA_DRIVER_TYPE']
-        test_project = self.config['项目运行设置']['TEST_PROJECT']
+        file_name, sheet_name = split_doc_name(doc_name) if data_type == 'excel_driver' else (doc_name, None)
+        data_path = self._case_file_path(file_name)
+
+        if data_type == 'yaml_driver':
+            data = read_yaml(data_path)
+            return CaseTable.from_rows(doc_name, data) if is_row_list(data) else data
+        elif data_type == 'excel_driver':
+            return get_excel_book(data_path).table(sheet_name)
+        elif data_type in LINE_DATA_DRIVERS:
+            return LINE_DATA_DRIVERS[data_type](data_path)
+        return None
+
+    def get_lazy_case_data(self, doc_name=None):
+        """
+        惰性读取用例数据，供 @pytest.mark.parametrize 使用
 
-        # 拼接用例层根目录：data_driver / yaml_driver|excel_driver / project
+        收集阶段只返回 CaseHandle 句柄（不解析数据），用例执行时才加载对应的行，
+        用法与 get_case_data 相同：login_data['username']
+
+        参数
+        ----
+        doc_name : str, optional
+            用例文件名（不含扩展名），Excel 驱动可写成 'workbook/sheet'
+
+        返回
+        ----
+        CaseSource
+            可按下标访问、可迭代的 CaseHandle 序列
+        """
+        data_type = self.config['项目运行设置']['DATA_DRIVER_TYPE']
+        if data_type == 'excel_driver':
+            file_name, sheet_name = split_doc_name(doc_name)
+            return ExcelCaseSource(self._case_file_path(file_name), sheet_name, name=doc_name)
+        if data_type in LINE_DATA_DRIVERS:
+            return LineCaseSource(LINE_DATA_DRIVERS[data_type](self._case_file_path(doc_name)), name=doc_name)
+        return YamlCaseSource(self._case_file_path(doc_name), name=doc_name)
+
+    def _case_file_path(self, file_name):
+        """拼接用例层根目录 data_driver / <DATA_DRIVER_TYPE> / project，并查找文件"""
+        data_type = self.config['项目运行设置']['DATA_DRIVER_TYPE']
+        test_project = self.config['项目运行设置']['TEST_PROJECT']
         abs_path = init_file_path(
             os.path.join(BP.DATA_DRIVE_DIR, data_type, test_project)
         )
-        data_path = is_file_exist(abs_path, doc_name)
+        return is_file_exist(abs_path, file_name)
 
-        if data_type == 'yaml_driver':
-            return read_yaml(data_path)
-        elif data_type == 'excel_driver':
-            return ExcelRead(data_path).dict_data()
-        return None
+    def iter_case_data(self, doc_name=None):
+        """
+        逐行读取用例数据（生成器）
+
+        Excel 驱动下以只读流式模式逐行解析，整张表不会同时驻留内存；
+        YAML 驱动下依次产出列表中的每一项
+
+        参数
+        ----
+        doc_name : str, optional
+            用例文件名（不含扩展名），Excel 驱动可写成 'workbook/sheet'
+        """
+        data_type = self.config['项目运行设置']['DATA_DRIVER_TYPE']
+        if data_type == 'excel_driver':
+            file_name, sheet_name = split_doc_name(doc_name)
+            with ExcelRead(self._case_file_path(file_name), sheet_name or 'Sheet1') as excel:
+                yield from excel.iter_rows()
+        elif data_type in LINE_DATA_DRIVERS:
+            with LINE_DATA_DRIVERS[data_type](self._case_file_path(doc_name)) as data_file:
+                yield from data_file.stream()
+        else:
+            data = read_yaml(self._case_file_path(doc_name))
+            yield from data if isinstance(data, list) else (data,)
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+WebDriver 预热池
+--------------------------------------------------
+每个 worker 进程启动 pool_size 个浏览器并反复复用，用例之间只做重置，不再每个用例启动 / 关闭一次浏览器：
+- lease   ：取一个空闲浏览器（命中）；没有空闲且未达上限时新启动一个；已达上限时等待归还
+- release ：重置后放回池中 —— 关闭多余窗口，依次在当前页面、TEST_URL 与 reset_origins 所在的站点清除
+            cookie 与 local/sessionStorage，最后打开 about:blank；
+            重置失败（浏览器崩溃、弹窗卡死等）或使用次数达到 pool_max_uses 时关闭该浏览器（回收），
+            下次 lease 时重新启动
+- stats   ：命中 / 启动 / 回收次数与平均耗时
+配置取自 [WEB自动化配置]：browser、pool_size、pool_max_uses、reset_origins
+
+重置不等于全新的浏览器：
+- 浏览器只允许页面读写自己站点的 storage，上面列出的站点之外（如单点登录、第三方站点）的
+  local/sessionStorage、IndexedDB、缓存不会被清除
+- Chrome 通过 CDP 一次清除所有站点的 cookie；IE、Firefox 没有 CDP，只能清除上面列出的站点的 cookie
+用例会访问其他站点时，把它们加入 reset_origins，或设置 pool_max_uses 定期换新浏览器
+用法：
+    pool = DriverPool(lambda: create_driver('chrome'), size=2)
+    with pool.leased() as driver:
+        driver.get(url)
+--------------------------------------------------
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from base.base_config import get_config
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+
+logger = Logger('base_driver_pool.py').get_logger()
+
+# 重置时清空页面存储的脚本（about:blank 等页面访问 storage 会抛异常，一并忽略）
+_CLEAR_STORAGE_JS = '''
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+'''
+
+
+def create_driver(browser: str = None):
+    """
+    按浏览器类型启动一个 WebDriver
+    :param browser: ie、firefox、chrome、chromeheadless；为空时取 [WEB自动化配置] browser
+    """
+    from selenium import webdriver
+    browser = browser or get_config()['WEB自动化配置']['browser']
+    if browser == 'ie':
+        driver = webdriver.Ie(executable_path=os.path.join(BP.DRIVER_DIR, 'IEDriverServer.exe'))
+    elif browser == 'firefox':
+        driver = webdriver.Firefox(executable_path=os.path.join(BP.DRIVER_DIR, 'gecokdriver.exe'))
+    elif browser == 'chrome':
+        driver = webdriver.Chrome(executable_path=os.path.join(BP.DRIVER_DIR, 'chromedriver.exe'))
+    elif browser in ('chromeheadless', 'chromeheadles'):
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument('--headless')
+        driver = webdriver.Chrome(executable_path=os.path.join(BP.DRIVER_DIR, 'chromedriver.exe'),
+                                  options=chrome_options)
+        driver.set_window_size(1920, 1080)
+    else:
+        raise ValueError('不支持的浏览器类型：{}'.format(browser))
+    # 不设置隐式等待：元素等待统一由 base_wait.ElementWait 完成，两者叠加会放大每次查找的耗时
+    return driver
+
+
+def _origin(url: str):
+    """http(s) 页面所在的站点，其余（about:blank、data: 等）返回 None"""
+    parts = urlsplit(url or '')
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    return '{}://{}'.format(parts.scheme, parts.netloc)
+
+
+def reset_origins() -> list:
+    """归还时需要清理的站点：TEST_URL 与 [WEB自动化配置] reset_origins"""
+    config = get_config()
+    urls = [config['项目运行设置']['TEST_URL']]
+    urls.extend(config['WEB自动化配置'].get_list('reset_origins', ()))
+    origins = []
+    for url in urls:
+        origin = _origin(url)
+        if origin and origin not in origins:
+            origins.append(origin)
+    return origins
+
+
+def reset_driver(driver, origins=None) -> None:
+    """
+    尽量把浏览器恢复到干净状态（限制见模块说明）；任何一步失败都抛出异常，由调用方回收该浏览器
+    :param origins: 需要清理的站点，默认取 reset_origins()；当前页面所在的站点总会被清理
+    """
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    origins = reset_origins() if origins is None else list(origins)
+    current = _origin(driver.current_url)
+    targets = ([current] if current else []) + [origin for origin in origins if origin != current]
+    # 没有 CDP 时 delete_all_cookies 只能清当前站点，需要逐个站点打开后清除
+    cdp = hasattr(driver, 'execute_cdp_cmd')
+    for origin in targets:
+        if origin != current:
+            driver.get(origin + '/')
+        driver.execute_script(_CLEAR_STORAGE_JS)
+        if not cdp:
+            driver.delete_all_cookies()
+    # Chrome 可通过 CDP 一次清除所有站点的 cookie
+    if cdp:
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+    driver.get('about:blank')
+
+
+class DriverPool(object):
+    """线程安全的浏览器池，一个 worker 进程一个（conftest 的 session 级 driver_pool 夹具）"""
+
+    def __init__(self, factory, size: int = 1, max_uses: int = 0, reset=reset_driver):
+        """
+        :param factory:  无参函数，返回新启动的 WebDriver
+        :param size:     池中最多同时存在的浏览器数
+        :param max_uses: 单个浏览器最多被租用的次数，达到后回收；0 为不限制
+        :param reset:    归还时的重置函数
+        """
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_uses = int(max_uses)
+        self.reset = reset
+        self._idle = deque()
+        self._uses = {}             # id(driver) -> 已租用次数
+        self._leased = set()
+        self._created = 0           # 当前存活（含启动中）的浏览器数
+        self._cond = threading.Condition()
+        self._closed = False
+        self.leases = 0
+        self.hits = 0
+        self.launches = 0
+        self.recycles = 0
+        self.launch_time = 0.0
+        self.reset_time = 0.0
+        self.resets = 0
+
+    # ----------------------
+    #  启动 / 预热
+    # ----------------------
+    def _launch(self):
+        start = time.perf_counter()
+        try:
+            driver = self.factory()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        cost = time.perf_counter() - start
+        with self._cond:
+            self.launches += 1
+            self.launch_time += cost
+            self._uses[id(driver)] = 0
+        logger.info('【浏览器池】启动浏览器，耗时 %.2f 秒', cost)
+        return driver
+
+    def warm(self, count: int = None) -> None:
+        """并行预启动浏览器，补足到 count 个（默认 size）"""
+        with self._cond:
+            count = min(self.size, count or self.size) - self._created
+            if count <= 0:
+                return
+            self._created += count
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self._launch) for _ in range(count)]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        with self._cond:
+            self._idle.extend(future.result() for future in futures if future.exception() is None)
+            self._cond.notify_all()
+        if errors:
+            raise errors[0]
+
+    # ----------------------
+    #  租用 / 归还
+    # ----------------------
+    def lease(self, timeout: float = None):
+        """
+        取一个浏览器
+        :param timeout: 池已满时最多等待的秒数；None 为一直等待
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('浏览器池已关闭')
+                if self._idle:
+                    driver = self._idle.popleft()
+                    self.hits += 1
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    driver = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError('浏览器池已满（{} 个）且 {} 秒内无人归还'.format(self.size, timeout))
+                self._cond.wait(remaining)
+        if driver is None:
+            driver = self._launch()
+        with self._cond:
+            self.leases += 1
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            self._leased.add(driver)
+        return driver
+
+    def release(self, driver) -> None:
+        """归还浏览器：重置成功放回池中，失败则回收"""
+        with self._cond:
+            self._leased.discard(driver)
+            worn_out = self.max_uses and self._uses.get(id(driver), 0) >= self.max_uses
+        if not worn_out and not self._closed:
+            start = time.perf_counter()
+            try:
+                self.reset(driver)
+            except Exception as e:
+                logger.warning('【浏览器池】重置浏览器失败，回收：%s', e)
+            else:
+                with self._cond:
+                    self.resets += 1
+                    self.reset_time += time.perf_counter() - start
+                    self._idle.append(driver)
+                    self._cond.notify()
+                return
+        self._recycle(driver)
+
+    def _recycle(self, driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug('【浏览器池】关闭浏览器出错：%s', e)
+        with self._cond:
+            self._uses.pop(id(driver), None)
+            self._created -= 1
+            self.recycles += 1
+            self._cond.notify()
+
+    @contextmanager
+    def leased(self, timeout: float = None):
+        driver = self.lease(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    # ----------------------
+    #  关闭 / 统计
+    # ----------------------
+    def close(self) -> None:
+        """关闭池中全部浏览器（包括尚未归还的）"""
+        with self._cond:
+            self._closed = True
+            drivers = list(self._idle) + list(self._leased)
+            self._idle.clear()
+            self._leased.clear()
+            self._cond.notify_all()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.debug('【浏览器池】关闭浏览器出错：%s', e)
+
+    def stats(self) -> dict:
+        """hit_rate = 直接拿到空闲浏览器的租用次数 / 总租用次数"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'leases': self.leases,
+                'hits': self.hits,
+                'launches': self.launches,
+                'recycles': self.recycles,
+                'hit_rate': round(self.hits / self.leases, 4) if self.leases else 0.0,
+                'avg_launch_s': round(self.launch_time / self.launches, 3) if self.launches else 0.0,
+                'avg_reset_s': round(self.reset_time / self.resets, 3) if self.resets else 0.0,
+                'alive': self._created,
+            }
+
+    def __repr__(self):
+        return '<DriverPool {}>'.format(self.stats())
@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 """
 兼容 Python 3.8 的 .xlsx 读写工具
-读取：openpyxl -> list[dict]
-写入：openpyxl <- list[dict]
+读取：openpyxl -> list[dict]（默认只读流式模式，按行 iter_rows(values_only=True) 解析）
+缓存：get_excel_book(path).table("Sheet1")，每个工作簿每进程只加载一次，所有工作表都作为列式用例表（CaseTable）提供
+写入：openpyxl <- list[dict]；大批量结果用 ExcelStreamWrite（write_only 流式写入，支持追加）
 """
-from typing import List, Dict, Optional          # 兼容 3.8 泛型
+import os
+import threading
+import weakref
+from itertools import chain, islice
+from typing import List, Dict, Iterable, Iterator, Optional  # 兼容 3.8 泛型
 from openpyxl import load_workbook, Workbook     # 读写 xlsx
 
+from base.base_case_table import CaseTable       # 列式用例表
+
 
 # -------------------- 读取 --------------------
 class ExcelRead:
@@ -15,50 +22,192 @@ class ExcelRead:
     用法：
         excel = ExcelRead("demo.xlsx", "Sheet1")
         data  = excel.dict_data()   # List[Dict]
+        for row in excel.iter_rows():   # 流式逐行读取，不占用整表内存
+            ...
+
+    默认以 read_only 模式打开：不构建单元格对象，内存占用与行数无关；
+    第一次随机访问（get_row_info / get_col_info / get_cell_info）时物化一次行索引，之后均为 O(1)
     """
 
-    def __init__(self, excel_path: str, sheet_name: str = "Sheet1"):
+    def __init__(self, excel_path: str, sheet_name: str = "Sheet1", read_only: bool = True):
         """
         加载工作簿
         :param excel_path: 文件路径
         :param sheet_name: 工作表名
+        :param read_only:  是否以只读流式模式打开（默认 True）
         """
-        self.wb = load_workbook(excel_path)
+        self.excel_path = excel_path
+        self.wb = load_workbook(excel_path, read_only=read_only)
         self.ws = self.wb[sheet_name]
-        self.row_num = self.ws.max_row
-        self.col_num = self.ws.max_column
         # 第一行当表头
-        self.headers: List[str] = [
-            self.ws.cell(row=1, column=j).value for j in range(1, self.col_num + 1)
-        ]
+        first_row = next(self.ws.iter_rows(max_row=1, values_only=True), ())
+        self.headers: List[str] = list(first_row)
+        self.col_num = len(self.headers)
+        # 行索引 / 列索引：首次随机访问时才物化
+        self._rows: Optional[List[Dict[str, object]]] = None
+        self._cols: Dict[str, List[object]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """只读模式下工作簿会一直持有文件句柄，用完需关闭"""
+        self.wb.close()
+
+    @property
+    def row_num(self) -> int:
+        """总行数（含表头）"""
+        if self._rows is not None:
+            return len(self._rows) + 1
+        return self.ws.max_row or 0
+
+    def iter_rows(self) -> Iterator[Dict[str, object]]:
+        """按行流式产出 Dict，不物化整张表"""
+        if self._rows is not None:
+            yield from self._rows
+            return
+        headers = self.headers
+        for values in self.ws.iter_rows(min_row=2, max_col=self.col_num, values_only=True):
+            yield dict(zip(headers, values))
+
+    def _row_index(self) -> List[Dict[str, object]]:
+        """一次性物化行索引，之后关闭只读工作簿释放文件句柄"""
+        if self._rows is None:
+            self._rows = list(self.iter_rows())
+            self.close()
+        return self._rows
 
     def dict_data(self) -> List[Dict[str, object]]:
-        """转为 List[Dict] 返回"""
-        if self.row_num <= 1:
+        """转为 List[Dict] 返回（每次返回新的字典，调用方可随意修改）"""
+        rows = self._row_index()
+        if not rows:
             print("总行数 <= 1，无数据")
             return []
-
-        ret: List[Dict[str, object]] = []
-        for row in range(2, self.row_num + 1):
-            ret.append(
-                {self.headers[col - 1]: self.ws.cell(row=row, column=col).value
-                 for col in range(1, self.col_num + 1)}
-            )
-        return ret
+        return [dict(row) for row in rows]
 
     def get_row_info(self, row: int) -> Optional[Dict[str, object]]:
         """取第 row 行（从 2 开始）数据"""
-        return None if self.row_num <= 1 else self.dict_data()[row - 2]
+        rows = self._row_index()
+        return rows[row - 2] if rows else None
 
     def get_col_info(self, col_name: str) -> List[object]:
         """取整列数据"""
-        return [row[col_name] for row in self.dict_data()]
+        if col_name not in self._cols:
+            self._cols[col_name] = [row[col_name] for row in self._row_index()]
+        return list(self._cols[col_name])
 
     def get_cell_info(self, row: int, col_name: str) -> object:
         """取单个单元格"""
         return self.get_row_info(row)[col_name]
 
 
+# -------------------- 工作簿缓存 --------------------
+def _read_table(ws, name: str) -> CaseTable:
+    # 不信任文件中的维度信息，读到最后一行为止（与 ExcelCaseSource 的计数一致）
+    ws.reset_dimensions()
+    rows = ws.iter_rows(values_only=True)
+    headers = list(next(rows, ()))
+    return CaseTable.from_tuples(name, headers, rows)
+
+
+class ExcelBook:
+    """
+    工作簿级缓存：一个 .xlsx 在进程内只 load_workbook 一次，其中每个工作表都是一张用例表
+    用法：
+        book  = get_excel_book("cases.xlsx")
+        login = book.table("login")        # CaseTable
+    已交给调用方的工作表只被弱引用，调用方不再持有时即被回收；再次请求时只重新读取该工作表
+    """
+
+    def __init__(self, excel_path: str):
+        self.excel_path = excel_path
+        self.mtime_ns = os.stat(excel_path).st_mtime_ns
+        self.sheet_names: List[str] = []
+        # 已交给调用方的工作表（弱引用）
+        self._tables = weakref.WeakValueDictionary()
+        # 已加载但尚未被请求的工作表（强引用，首次请求后转为弱引用）
+        self._pending: Dict[str, CaseTable] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load_all(self) -> None:
+        """一次性读取全部工作表"""
+        wb = load_workbook(self.excel_path, read_only=True)
+        try:
+            self.sheet_names = list(wb.sheetnames)
+            for name in self.sheet_names:
+                self._pending[name] = _read_table(wb[name], name)
+        finally:
+            wb.close()
+        self._loaded = True
+
+    def _load_one(self, sheet_name: str) -> CaseTable:
+        """工作表已被回收后再次请求：只重新读取这一张"""
+        wb = load_workbook(self.excel_path, read_only=True)
+        try:
+            return _read_table(wb[sheet_name], sheet_name)
+        finally:
+            wb.close()
+
+    def default_sheet(self) -> str:
+        """未指定工作表时的默认值：优先 Sheet1，否则第一张"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load_all()
+        return "Sheet1" if "Sheet1" in self.sheet_names else self.sheet_names[0]
+
+    def table(self, sheet_name: str = None) -> CaseTable:
+        """
+        获取工作表对应的用例表
+        :param sheet_name: 工作表名，默认 Sheet1（不存在时取第一张）
+        """
+        if sheet_name is None:
+            sheet_name = self.default_sheet()
+        table = self._tables.get(sheet_name)
+        if table is not None:
+            return table
+        with self._lock:
+            if not self._loaded:
+                self._load_all()
+            if sheet_name not in self.sheet_names:
+                raise KeyError("%s 中不存在工作表 %s，可选：%s" % (self.excel_path, sheet_name, self.sheet_names))
+            table = self._tables.get(sheet_name) or self._pending.pop(sheet_name, None)
+            if table is None:
+                table = self._load_one(sheet_name)
+            self._tables[sheet_name] = table
+            return table
+
+    def release(self) -> None:
+        """丢弃尚未被请求过的工作表"""
+        with self._lock:
+            self._pending.clear()
+
+
+# 文件路径 -> ExcelBook
+_books: Dict[str, ExcelBook] = {}
+_books_lock = threading.Lock()
+
+
+def get_excel_book(excel_path: str) -> ExcelBook:
+    """
+    获取工作簿缓存；文件被修改（mtime 变化）后自动重新加载
+    :param excel_path: .xlsx 文件路径
+    """
+    excel_path = os.path.abspath(excel_path)
+    book = _books.get(excel_path)
+    if book is None or book.mtime_ns != os.stat(excel_path).st_mtime_ns:
+        with _books_lock:
+            book = _books.get(excel_path)
+            if book is None or book.mtime_ns != os.stat(excel_path).st_mtime_ns:
+                book = ExcelBook(excel_path)
+                _books[excel_path] = book
+    return book
+
+
 # -------------------- 写入 --------------------
 class ExcelWrite:
     """
@@ -94,6 +243,157 @@ class ExcelWrite:
         print(f"已保存 -> {save_path}")
 
 
+class ExcelStreamWrite:
+    """
+    流式写入 *.xlsx（openpyxl write_only 模式），内存占用与行数无关
+    用法：
+        w = ExcelStreamWrite("Sheet1")
+        w.write_excel(row_generator(), "result.xlsx")               # 覆盖写
+        w.write_excel(row_generator(), "result.xlsx", append=True)  # 追加到已有文件
+    """
+
+    def __init__(self, sheet_name: str = "Sheet1", chunk_size: int = 1000):
+        """
+        :param sheet_name: 工作表名
+        :param chunk_size: 每次从数据源拉取的行数
+        """
+        self.sheet_name = sheet_name
+        self.chunk_size = chunk_size
+
+    def _copy_existing(self, wb, save_path: str, headers: List[str]) -> List[str]:
+        """
+        追加模式：把已有文件逐行拷贝到新工作簿，返回目标工作表的表头
+        其它工作表原样保留；目标工作表新增的列补在原表头宽度之后
+        """
+        src = load_workbook(save_path, read_only=True)
+        try:
+            for name in src.sheetnames:
+                rows = src[name].iter_rows(values_only=True)
+                if name != self.sheet_name:
+                    ws = wb.create_sheet(name)
+                    for values in rows:
+                        ws.append(values)
+                    continue
+                # 表头按原位置保留（包括空单元格），新增的列接在原表头宽度之后，已有数据整行拷贝
+                old_headers = list(next(rows, ()))
+                headers = old_headers + [h for h in headers if h not in old_headers]
+                ws = wb.create_sheet(name)
+                ws.append(headers)
+                for values in rows:
+                    ws.append(values)
+            return headers
+        finally:
+            src.close()
+
+    def write_excel(self, data: Iterable[Dict[str, object]], save_path: str, append: bool = False) -> int:
+        """
+        将 Dict 行数据流式写入 .xlsx 并保存
+        :param data: 任意可迭代对象/生成器，每个元素为一行 Dict；表头取第一行的 key
+        :param save_path: 输出文件路径（须以 .xlsx 结尾）
+        :param append: 文件已存在时追加到同名工作表末尾，而不是覆盖
+        :return: 本次写入的数据行数
+        """
+        rows = iter(data)
+        first = next(rows, None)
+        headers = list(first.keys()) if first else []
+        rows = chain([first], rows) if first else rows
+
+        wb = Workbook(write_only=True)
+        if append and os.path.exists(save_path):
+            headers = self._copy_existing(wb, save_path, headers)
+            ws = wb[self.sheet_name] if self.sheet_name in wb.sheetnames else None
+        else:
+            ws = None
+        if ws is None:
+            ws = wb.create_sheet(self.sheet_name)
+            ws.append(headers)
+
+        count = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            for row in chunk:
+                ws.append([row.get(h) for h in headers])
+            count += len(chunk)
+
+        # 先写临时文件再替换，避免写到一半中断时破坏已有结果
+        tmp_path = "%s.%s.tmp.xlsx" % (save_path, os.getpid())
+        wb.save(tmp_path)
+        os.replace(tmp_path, save_path)
+        print(f"已保存 {count} 行 -> {save_path}")
+        return count
+
+
+# -------------------- 基准 --------------------
+def _benchmark_read(rows: int = 100000) -> None:
+    """对比旧版全量加载 + 逐单元格读取与只读流式读取的耗时和峰值内存"""
+    import tempfile
+    import time
+    import tracemalloc
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.xlsx")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["username", "password", "flag", "age"])
+    for i in range(rows):
+        ws.append(["user%06d" % i, str(i % 1000), "student" if i % 2 else "teacher", i % 80])
+    wb.save(path)
+
+    def legacy():
+        # 旧实现：全量 load_workbook + 每个单元格一次 ws.cell()
+        ws_ = load_workbook(path)["Sheet1"]
+        headers = [ws_.cell(row=1, column=j).value for j in range(1, ws_.max_column + 1)]
+        return [{headers[c - 1]: ws_.cell(row=r, column=c).value for c in range(1, ws_.max_column + 1)}
+                for r in range(2, ws_.max_row + 1)]
+
+    def streaming():
+        with ExcelRead(path) as excel:
+            return sum(1 for _ in excel.iter_rows())
+
+    def indexed():
+        excel = ExcelRead(path)
+        return excel.dict_data(), excel.get_cell_info(rows + 1, "age")
+
+    for name, func in (("旧版全量读取", legacy), ("只读流式遍历", streaming), ("只读+行索引", indexed)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        cost = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%s：%.2f s，峰值内存 %.1f MB" % (name, cost, peak / 1024 / 1024))
+    os.remove(path)
+
+
+def _benchmark_write(rows: int = 200000) -> None:
+    """对比 ExcelWrite（先构建 List 再逐单元格写）与 ExcelStreamWrite（生成器流式写）的耗时和峰值内存"""
+    import tempfile
+    import time
+    import tracemalloc
+
+    tmp_dir = tempfile.mkdtemp()
+
+    def gen():
+        for i in range(rows):
+            yield {"case_id": i, "api": "login_api", "status": 200, "elapsed_ms": i % 97 / 3.0, "result": "pass"}
+
+    def legacy():
+        ExcelWrite("Sheet1").write_excel(list(gen()), os.path.join(tmp_dir, "legacy.xlsx"))
+
+    def streaming():
+        ExcelStreamWrite("Sheet1").write_excel(gen(), os.path.join(tmp_dir, "stream.xlsx"))
+
+    for name, func in (("ExcelWrite", legacy), ("ExcelStreamWrite", streaming)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        cost = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%s：%.2f s，峰值内存 %.1f MB" % (name, cost, peak / 1024 / 1024))
+
+
 # -------------------- 自测 --------------------
 if __name__ == "__main__":
     # 1. 读示例
@@ -106,4 +406,8 @@ if __name__ == "__main__":
         {"ID": 1, "用户名": "admin", "密码": "123456"},
         {"ID": 2, "用户名": "guest", "密码": "abcde"}
     ]
-    # ExcelWrite("Sheet1").write_excel(demo, "output_demo.xlsx")
\ No newline at end of file
+    # ExcelWrite("Sheet1").write_excel(demo, "output_demo.xlsx")
+
+    # 3. 基准：10 万行读取 / 20 万行写入
+    _benchmark_read()
+    _benchmark_write()
\ No newline at end of file
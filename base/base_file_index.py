@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+数据文件索引
+--------------------------------------------------
+- 为 data_elements / data_driver 等目录建立 *文件名 → 绝对路径* 索引
+- 每个目录在进程内只建立一次索引，之后依据各级目录 mtime 增量刷新
+  （新增/删除/重命名文件都会改变所在目录的 mtime，只重扫发生变化的目录）
+- 可选持久化为磁盘清单（manifest），下次启动时只校验 mtime 而不必全量遍历
+- 检测重名：同一个不带扩展名的文件名出现多次时告警，查找时直接报错，
+  不再像 file_name.split('.')[0] 那样静默覆盖
+--------------------------------------------------
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+
+logger = Logger('base_file_index.py').get_logger()
+
+# 清单文件格式版本，结构变化时递增
+_MANIFEST_VERSION = 1
+
+
+class DuplicateFileError(FileExistsError):
+    """索引中存在多个同名文件，无法确定要使用哪一个"""
+
+
+def _file_key(file_name: str) -> str:
+    """去掉扩展名作为索引 key（与历史行为保持一致：取第一个 '.' 之前的部分）"""
+    return file_name.split('.')[0]
+
+
+# ---------------------------------------------------------------------------
+# 索引对象
+# ---------------------------------------------------------------------------
+class FileIndex(Mapping):
+    """
+    递归目录索引，可像 dict 一样使用：
+        index = get_file_index(root)
+        index['login']            # 按不带扩展名的文件名查找
+        index.get('student.png')  # 也支持带扩展名的完整文件名
+    """
+
+    def __init__(self, root: str, manifest_path: str = None):
+        self.root = os.path.abspath(root)
+        self.manifest_path = manifest_path
+        # 目录 -> (mtime_ns, 文件名列表, 子目录列表)
+        self._dirs = {}
+        # key / 完整文件名 -> [绝对路径, ...]
+        self._by_key = {}
+        self._by_name = {}
+        # 已告警过的重名 key，避免每次刷新重复刷屏
+        self._warned = set()
+        self._lock = threading.Lock()
+
+        if manifest_path:
+            self._load_manifest()
+        self.refresh()
+
+    # ----------------------
+    #  扫描与刷新
+    # ----------------------
+    def _scan_dir(self, dir_path: str, mtime_ns: int):
+        """扫描单个目录（不递归），返回新增的子目录"""
+        files, subdirs = [], []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        subdirs.append(entry.path)
+                    else:
+                        files.append(entry.name)
+        except FileNotFoundError:
+            self._drop_dir(dir_path)
+            return []
+        old = self._dirs.get(dir_path)
+        self._dirs[dir_path] = (mtime_ns, sorted(files), sorted(subdirs))
+        known = set(old[2]) if old else set()
+        # 旧的子目录已不存在则一并移除
+        for gone in known.difference(subdirs):
+            self._drop_dir(gone)
+        return [d for d in subdirs if d not in self._dirs]
+
+    def _drop_dir(self, dir_path: str):
+        """从索引中移除目录及其所有子目录"""
+        entry = self._dirs.pop(dir_path, None)
+        if entry:
+            for sub in entry[2]:
+                self._drop_dir(sub)
+
+    def refresh(self) -> bool:
+        """
+        校验所有已知目录的 mtime，只重扫发生变化的目录
+        :return: 索引是否发生变化
+        """
+        with self._lock:
+            changed = False
+            pending = []
+            if self.root not in self._dirs:
+                pending.append(self.root)
+            for dir_path in list(self._dirs):
+                if dir_path not in self._dirs:      # 已随父目录一起移除
+                    continue
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except FileNotFoundError:
+                    self._drop_dir(dir_path)
+                    changed = True
+                    continue
+                if mtime_ns != self._dirs[dir_path][0]:
+                    pending.extend(self._scan_dir(dir_path, mtime_ns))
+                    changed = True
+
+            # 新出现的目录（含根目录首次扫描）递归建立索引
+            while pending:
+                dir_path = pending.pop()
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                pending.extend(self._scan_dir(dir_path, mtime_ns))
+                changed = True
+
+            if changed or not self._by_key:
+                self._rebuild()
+            if changed and self.manifest_path:
+                self._save_manifest()
+            return changed
+
+    def _rebuild(self):
+        by_key, by_name = {}, {}
+        for dir_path, (_, files, _) in self._dirs.items():
+            for file_name in files:
+                abs_path = os.path.join(dir_path, file_name)
+                by_key.setdefault(_file_key(file_name), []).append(abs_path)
+                by_name.setdefault(file_name, []).append(abs_path)
+        self._by_key, self._by_name = by_key, by_name
+        for key, paths in self.duplicates().items():
+            if key in self._warned:
+                continue
+            self._warned.add(key)
+            logger.warning('【文件索引】%s 下存在重名文件 %s：%s', self.root, key, paths)
+
+    # ----------------------
+    #  查询
+    # ----------------------
+    def __getitem__(self, name):
+        paths = self._by_key.get(name) or self._by_name.get(name)
+        if not paths:
+            raise KeyError(name)
+        if len(paths) > 1:
+            raise DuplicateFileError('{} 在 {} 下存在多个同名文件：{}'.format(name, self.root, paths))
+        return paths[0]
+
+    def __contains__(self, name):
+        return name in self._by_key or name in self._by_name
+
+    def __iter__(self):
+        return iter(self._by_key)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __repr__(self):
+        return '<FileIndex {} files={}>'.format(self.root, len(self._by_key))
+
+    def duplicates(self) -> dict:
+        """返回重名文件：key -> [路径, ...]"""
+        return {key: paths for key, paths in self._by_key.items() if len(paths) > 1}
+
+    def as_dict(self) -> dict:
+        """导出为普通 dict（重名文件只保留最后一个，与旧版 init_file_path 行为一致）"""
+        return {key: paths[-1] for key, paths in self._by_key.items()}
+
+    # ----------------------
+    #  磁盘清单
+    # ----------------------
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get('version') != _MANIFEST_VERSION or manifest.get('root') != self.root:
+            return
+        self._dirs = {
+            os.path.join(self.root, rel) if rel else self.root:
+                (mtime_ns, files, [os.path.join(self.root, s) for s in subdirs])
+            for rel, (mtime_ns, files, subdirs) in manifest['dirs'].items()
+        }
+
+    def _save_manifest(self):
+        def rel(path):
+            path = os.path.relpath(path, self.root)
+            return '' if path == '.' else path
+
+        manifest = {
+            'version': _MANIFEST_VERSION,
+            'root': self.root,
+            'dirs': {rel(d): [mtime_ns, files, [rel(s) for s in subdirs]]
+                     for d, (mtime_ns, files, subdirs) in self._dirs.items()},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = '{}.{}.tmp'.format(self.manifest_path, os.getpid())
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning('【文件索引】写入清单 %s 失败：%s', self.manifest_path, e)
+
+
+# ---------------------------------------------------------------------------
+# 进程级缓存
+# ---------------------------------------------------------------------------
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _manifest_path(root: str) -> str:
+    digest = hashlib.md5(os.path.abspath(root).encode('utf-8')).hexdigest()
+    return os.path.join(BP.FILE_INDEX_DIR, '{}.json'.format(digest))
+
+
+def get_file_index(root: str, persist: bool = False) -> FileIndex:
+    """
+    获取目录索引；同一目录在进程内只建立一次，之后按目录 mtime 增量刷新
+    :param root:    待索引的根目录
+    :param persist: 是否同时维护磁盘清单（data/temp/file_index）；
+                    已缓存的索引未维护清单时，persist=True 会为它补上清单
+    :return:        FileIndex
+    """
+    root = os.path.abspath(root)
+    index = _indexes.get(root)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(root)
+            if index is None:
+                index = FileIndex(root, _manifest_path(root) if persist else None)
+                _indexes[root] = index
+                return index
+    if persist and index.manifest_path is None:
+        with _indexes_lock:
+            if index.manifest_path is None:
+                index.manifest_path = _manifest_path(root)
+                index.refresh()
+                index._save_manifest()
+                return index
+    index.refresh()
+    return index
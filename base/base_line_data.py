@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+按行存储的大数据文件（CSV / JSONL）读取
+--------------------------------------------------
+- 使用 mmap 映射文件，不把数据集读入内存，适合 GB 级的线上流量回放数据
+- 第一次随机访问时扫描一遍换行符，建立行偏移索引（array('Q')，每行 8 字节）
+- 支持按下标读取任意一行，也支持不建索引的顺序流式读取
+- CSV 第一行为表头，每条记录必须在同一行内（不支持引号内换行）
+- 建议用 with 或显式 close()；未关闭的对象被回收时自动关闭映射和文件
+--------------------------------------------------
+"""
+
+import csv
+import io
+import json
+import mmap
+import weakref
+from array import array
+from collections.abc import Sequence
+
+from base.base_logger import Logger
+
+logger = Logger('base_line_data.py').get_logger()
+
+
+class LineDataFile(Sequence):
+    """
+    行数据文件基类：子类实现 _parse(line: bytes) 把一行转换为 Python 对象
+    用法：
+        with JsonlDataFile('traffic.jsonl') as data:
+            data[100000]           # 随机访问
+            for row in data.stream():
+                ...
+    """
+
+    # 数据行之前需要跳过的行数（如 CSV 表头）
+    header_lines = 0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:       # 空文件无法映射
+            self._mm = None
+        # DataDriver 等不用 with 的调用方：对象被回收时也会关闭映射和文件
+        self._finalizer = weakref.finalize(self, self._release, self._mm, self._file)
+        self._offsets = None
+        self._data_start = self._skip_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self._finalizer()
+        self._mm = None
+
+    @staticmethod
+    def _release(mm, file) -> None:
+        if mm is not None:
+            mm.close()
+        file.close()
+
+    def _skip_header(self) -> int:
+        """返回第一条数据行的起始偏移"""
+        position = 0
+        for _ in range(self.header_lines):
+            if self._mm is None:
+                break
+            end = self._mm.find(b'\n', position)
+            position = len(self._mm) if end < 0 else end + 1
+        return position
+
+    # ----------------------
+    #  行偏移索引
+    # ----------------------
+    def _build_index(self):
+        offsets = array('Q')
+        mm = self._mm
+        if mm is not None:
+            size = len(mm)
+            position = self._data_start
+            find = mm.find
+            while position < size:
+                end = find(b'\n', position)
+                if end < 0:
+                    end = size
+                if mm[position:end].strip():        # 跳过空行
+                    offsets.append(position)
+                position = end + 1
+        logger.debug('【行数据】%s 建立索引完成，共 %s 行', self.path, len(offsets))
+        return offsets
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._offsets = self._build_index()
+        return self._offsets
+
+    def _line_at(self, position: int) -> bytes:
+        end = self._mm.find(b'\n', position)
+        return self._mm[position:] if end < 0 else self._mm[position:end]
+
+    # ----------------------
+    #  读取
+    # ----------------------
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._parse(self._line_at(self.offsets[index]))
+
+    def __iter__(self):
+        return self.stream()
+
+    def stream(self):
+        """顺序流式读取，不建立索引；使用局部偏移，多个迭代器同时读取互不影响"""
+        mm = self._mm
+        if mm is None:
+            return
+        size = len(mm)
+        position = self._data_start
+        find = mm.find
+        while position < size:
+            end = find(b'\n', position)
+            if end < 0:
+                end = size
+            line = mm[position:end]
+            position = end + 1
+            if line.strip():
+                yield self._parse(line.rstrip(b'\r'))
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.path)
+
+    def _parse(self, line: bytes):
+        raise NotImplementedError
+
+
+class JsonlDataFile(LineDataFile):
+    """每行一个 JSON 对象"""
+
+    def _parse(self, line: bytes):
+        return json.loads(line)
+
+
+class CsvDataFile(LineDataFile):
+    """第一行为表头的 CSV，每行转换为 Dict"""
+
+    header_lines = 1
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        if self._mm is None or self._data_start == 0:
+            self.headers = []
+        else:
+            first_line = self._mm[:self._data_start].decode('utf-8-sig')
+            self.headers = next(csv.reader(io.StringIO(first_line)), [])
+
+    def _parse(self, line: bytes):
+        values = next(csv.reader([line.decode('utf-8').rstrip('\r')]))
+        return dict(zip(self.headers, values))
+
+
+# DATA_DRIVER_TYPE -> 读取类
+LINE_DATA_DRIVERS = {
+    'csv_driver': CsvDataFile,
+    'jsonl_driver': JsonlDataFile,
+}
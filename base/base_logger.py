@@ -2,9 +2,9 @@ import logging
 import time
 import os
 from base.base_path import BasePath as BP
-from base.utils import read_config_ini
+from base.base_config import get_config
 
-config = read_config_ini(BP.CONFIG_FILE)['日志打印配置']
+config = get_config()['日志打印配置']
 log_time = time.strftime('%Y%m%d-%H-%M-%S', time.localtime(time.time())) + '.log'
 
 
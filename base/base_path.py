@@ -8,9 +8,14 @@ class BasePath(object):
     DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
     DATA_DRIVE_DIR = os.path.join(DATA_DIR, 'data_driver')
     DATA_ELEMENTS_DIR = os.path.join(DATA_DIR, 'data_elements')
+    CASSETTE_DIR = os.path.join(DATA_DIR, 'cassettes')
     DATA_TEMP_DIR = os.path.join(DATA_DIR, 'temp')
     TEST_CASES = os.path.join(DATA_TEMP_DIR, 'test_cases.yaml')
     TEMP_CASES = os.path.join(DATA_TEMP_DIR, 'temp_cases.yaml')
+    FILE_INDEX_DIR = os.path.join(DATA_TEMP_DIR, 'file_index')
+    YAML_CACHE_DIR = os.path.join(DATA_TEMP_DIR, 'yaml_cache')
+    AUTH_CACHE_DIR = os.path.join(DATA_TEMP_DIR, 'auth_cache')
+    STORAGE_STATE_DIR = os.path.join(DATA_TEMP_DIR, 'storage_state')
     SCREENSHOT_DIR = os.path.join(DATA_TEMP_DIR, 'screenshots')
     SCREENSHOT_PIC = os.path.join(SCREENSHOT_DIR, 'test_error.png')
     DRIVER_DIR = os.path.join(DATA_DIR, 'driver')
@@ -20,5 +25,6 @@ class BasePath(object):
     ALLURE_RESULT_DIR = os.path.join(ALLURE_DIR, 'result')
     HTML_DIR = os.path.join(PROJECT_ROOT, 'reports', 'html')
     XML_DIR = os.path.join(PROJECT_ROOT, 'reports', 'xml')
+    LOAD_DIR = os.path.join(PROJECT_ROOT, 'reports', 'load')
     TEST_SUITS_DIR = os.path.join(PROJECT_ROOT, 'test_suits')
 
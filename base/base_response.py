@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+接口响应处理
+--------------------------------------------------
+- build_response：由保存的状态码 / 响应头 / 响应体构造 requests.Response
+- BodyPreview / ValuePreview：日志用的惰性预览，只有日志真正输出时才截取、解码，且最多 limit 字节
+- 流式响应（request_base(..., stream=True)）：
+    iter_chunks   ：按块迭代响应体
+    save_to_file  ：边下载边写盘，同时计算摘要
+    digest_body   ：只计算摘要与大小，不保存响应体
+  三者读完后都会关闭响应、归还连接；响应体不会整体驻留内存
+--------------------------------------------------
+"""
+
+import datetime
+import hashlib
+import os
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# 默认块大小 64KB
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def build_response(status: int, reason: str, headers, body: bytes, encoding: str = None,
+                   elapsed: float = 0, url: str = None) -> requests.Response:
+    """由已保存的数据构造 requests.Response（录制回放、认证缓存使用），支持 iter_content"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response._content_consumed = True
+    response.encoding = encoding
+    response.url = url
+    response.elapsed = datetime.timedelta(seconds=elapsed or 0)
+    return response
+
+
+# ---------------------------------------------------------------------------
+# 日志预览
+# ---------------------------------------------------------------------------
+class BodyPreview(object):
+    """
+    响应体预览，作为日志参数使用：logger.debug('%s', BodyPreview(resp, 2048))
+    - 流式响应且未读取时，不触发下载，只输出 Content-Type / Content-Length
+    - 已读取的响应只解码前 limit 字节（不做编码探测，缺省按 UTF-8）
+    """
+
+    __slots__ = ('response', 'limit')
+
+    def __init__(self, response, limit: int):
+        self.response = response
+        self.limit = limit
+
+    def __str__(self):
+        response = self.response
+        headers = getattr(response, 'headers', None) or {}
+        if getattr(response, '_content_consumed', True) is False:
+            return '<流式响应，未读取 Content-Type={} Content-Length={}>'.format(
+                headers.get('Content-Type'), headers.get('Content-Length'))
+        content = response.content or b''
+        text = content[:self.limit].decode(response.encoding or 'utf-8', errors='replace')
+        if len(content) > self.limit:
+            text += '...（共 {} 字节，已截断）'.format(len(content))
+        return text
+
+
+class ValuePreview(object):
+    """请求数据预览：repr 超过 limit 个字符时截断"""
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit: int):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) > self.limit:
+            return '{}...（共 {} 字符，已截断）'.format(text[:self.limit], len(text))
+        return text
+
+
+# ---------------------------------------------------------------------------
+# 流式读取
+# ---------------------------------------------------------------------------
+def iter_chunks(response, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """按块迭代响应体（bytes），迭代结束或中断时关闭响应"""
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        response.close()
+
+
+def digest_body(response, hash_name: str = 'sha256', chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """
+    流式计算响应体摘要
+    :return: (字节数, 十六进制摘要)
+    """
+    digest = hashlib.new(hash_name)
+    size = 0
+    for chunk in iter_chunks(response, chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def save_to_file(response, path: str, hash_name: str = 'sha256', chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """
+    流式写盘：先写入 path + '.part'，完成后再替换为 path，下载中断不会留下不完整的目标文件
+    :return: (字节数, 十六进制摘要)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.part'
+    digest = hashlib.new(hash_name)
+    size = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in iter_chunks(response, chunk_size):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size, digest.hexdigest()
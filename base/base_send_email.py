@@ -18,7 +18,8 @@ from email.mime.text import MIMEText
 
 # 项目内部公共库
 from base.base_path import BasePath as BP
-from base.utils import read_config_ini, make_zip
+from base.base_config import get_config
+from base.utils import make_zip
 
 
 class HandleEmail(object):
@@ -28,16 +29,15 @@ class HandleEmail(object):
     """
 
     def __init__(self):
-        # 读取全局配置文件
-        config = read_config_ini(BP.CONFIG_FILE)
-        email_config = config['邮件发送配置']
+        # 读取全局配置快照
+        email_config = get_config()['邮件发送配置']
 
         # 基本连接信息
         self.host = email_config['host']          # SMTP 服务器地址
-        self.port = int(email_config['port'])     # SMTP 端口（465/587/25）
+        self.port = email_config.get_int('port')  # SMTP 端口（465/587/25）
         self.sender = email_config['sender']      # 登录账号
         self.from_email = email_config['send_email']  # 发件人邮箱（可能同 sender）
-        self.receiver = eval(email_config['receiver'])  # 收件人列表，配置中是字符串，需要 eval 成 list
+        self.receiver = list(email_config.get_list('receiver'))  # 收件人列表，配置中是 Python 列表字面量
         self.password = email_config['password']  # 登录授权码/密码
         self.subject = email_config['subject']    # 邮件主题
 
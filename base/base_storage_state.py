@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+浏览器登录态快照（storage state）
+--------------------------------------------------
+需要已登录用户的 Web 用例不再每次填写登录表单：同一用户每轮运行只通过界面登录一次，
+抓取 cookie 与 localStorage / sessionStorage 保存为快照，之后注入到新启动或池中复用的浏览器。
+- capture_state ：抓取当前页面所在域名的 cookie 与 storage
+- inject_state  ：打开快照所在域名后写回 cookie 与 storage（之后由用例自行跳转到目标页面）
+- StorageStateCache：按 (用户, TEST_URL) 缓存快照，文件位于 data/temp/storage_state，
+  多个 worker 进程通过文件锁共享，只有一个进程真正登录
+快照有效期取 [WEB自动化配置] storage_state_ttl，cookie 自带的过期时间更早时以 cookie 为准
+专门测试登录流程的用例仍直接使用 LoginPage 走界面
+--------------------------------------------------
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from base.base_auth_cache import FileLock
+from base.base_config import get_config
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+
+logger = Logger('base_storage_state.py').get_logger()
+
+_READ_STORAGE_JS = '''
+function dump(storage) {
+    var values = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        values[key] = storage.getItem(key);
+    }
+    return values;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+'''
+
+_WRITE_STORAGE_JS = '''
+var state = arguments[0];
+for (var key in state.local) { window.localStorage.setItem(key, state.local[key]); }
+for (var key in state.session) { window.sessionStorage.setItem(key, state.session[key]); }
+'''
+
+# add_cookie 只接受这些字段
+_COOKIE_FIELDS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return '{}://{}'.format(parts.scheme, parts.netloc)
+
+
+def capture_state(driver) -> dict:
+    """抓取当前页面所在域名的登录态"""
+    storage = driver.execute_script(_READ_STORAGE_JS) or {}
+    return {
+        'origin': _origin(driver.current_url),
+        'cookies': driver.get_cookies(),
+        'local': storage.get('local') or {},
+        'session': storage.get('session') or {},
+    }
+
+
+def inject_state(driver, state: dict, landing: str = '/') -> None:
+    """
+    把快照写回浏览器
+    :param landing: 写入前打开的页面（相对快照域名），浏览器只允许给当前域名写 cookie 与 storage
+    """
+    driver.get(state['origin'] + landing)
+    for cookie in state['cookies']:
+        cookie = {key: cookie[key] for key in _COOKIE_FIELDS if key in cookie}
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            logger.debug('【登录态快照】写入 cookie %s 失败：%s', cookie.get('name'), e)
+    if state['local'] or state['session']:
+        driver.execute_script(_WRITE_STORAGE_JS, {'local': state['local'], 'session': state['session']})
+
+
+class StorageStateCache(object):
+    """
+    用法：
+        cache.apply(driver, 'admin', lambda d: LoginPage().login('admin', '123456'))
+    """
+
+    def __init__(self, directory: str, ttl: float = 1800):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._memo = {}
+        self.hits = 0
+        self.logins = 0
+
+    @staticmethod
+    def key(user: str, base_url: str) -> str:
+        return hashlib.blake2b('{}\n{}'.format(base_url, user).encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, key: str):
+        entry = self._memo.get(key)
+        if entry is None:
+            try:
+                with open(self._path(key, '.json'), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if time.time() >= entry['expires_at']:
+            return None
+        self._memo[key] = entry
+        return entry
+
+    def _write(self, key: str, state: dict) -> dict:
+        now = time.time()
+        expires_at = now + self.ttl
+        for cookie in state['cookies']:
+            if cookie.get('expiry'):
+                expires_at = min(expires_at, cookie['expiry'])
+        entry = dict(state, created_at=now, expires_at=expires_at)
+        path = self._path(key, '.json')
+        temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self._memo[key] = entry
+        return entry
+
+    def apply(self, driver, user: str, login, base_url: str = None) -> bool:
+        """
+        让 driver 处于 user 已登录的状态
+        :param user:     用户标识（缓存键的一部分，通常是账号）
+        :param login:    login(driver) 通过界面登录，返回后浏览器停留在已登录的页面
+        :param base_url: 缓存键的一部分，默认取 TEST_URL
+        :return:         True 为注入了缓存的快照，False 为本次通过界面登录
+        """
+        key = self.key(user, base_url or get_config()['项目运行设置']['TEST_URL'])
+        entry = self._read(key)
+        if entry is None:
+            with FileLock(self._path(key, '.lock')):
+                self._memo.pop(key, None)
+                entry = self._read(key)
+                if entry is None:
+                    start = time.perf_counter()
+                    login(driver)
+                    entry = self._write(key, capture_state(driver))
+                    self.logins += 1
+                    logger.info('【登录态快照】%s 通过界面登录并保存快照，耗时 %.2f 秒', user, time.perf_counter() - start)
+                    return False
+        inject_state(driver, entry)
+        self.hits += 1
+        logger.debug('【登录态快照】%s 注入快照', user)
+        return True
+
+    def invalidate(self, user: str, base_url: str = None) -> None:
+        """快照失效（如用例中修改了密码、退出了登录）"""
+        key = self.key(user, base_url or get_config()['项目运行设置']['TEST_URL'])
+        self._memo.pop(key, None)
+        try:
+            os.remove(self._path(key, '.json'))
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# 进程级缓存
+# ---------------------------------------------------------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_storage_state_cache() -> StorageStateCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                web_config = get_config()['WEB自动化配置']
+                _cache = StorageStateCache(BP.STORAGE_STATE_DIR, web_config.get_float('storage_state_ttl', 1800))
+    return _cache
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Web 元素等待
+--------------------------------------------------
+替代固定 0.5 秒轮询的 WebDriverWait + 隐式等待：
+- poll     ：退避轮询，首次立即检查，之后按 poll_start、2*poll_start ... 直到 poll_max 的间隔重试，
+             元素很快出现时只多等几毫秒，长时间等待时也不会频繁请求浏览器
+- observer ：在页面中注册 MutationObserver（execute_async_script），DOM 变化时立即检查，元素出现即返回；
+             只支持 id / name / class name / tag name / css selector / xpath，其余定位方式、
+             页面跳转导致脚本中断时自动改用轮询
+每次等待记录耗时、轮询次数与是否超时（WaitStats），可按定位表达式汇总，找出最耗时的元素
+配置取自 [WEB自动化配置]：wait_strategy、poll_start、poll_max、timeout
+浏览器不再设置隐式等待，否则每次未找到都会额外阻塞
+--------------------------------------------------
+"""
+
+import threading
+import time
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+
+from base.base_config import get_config
+from base.base_logger import Logger
+
+logger = Logger('base_wait.py').get_logger()
+
+WAIT_STRATEGIES = ('poll', 'observer')
+
+# Selenium 定位方式 -> CSS 选择器模板（xpath 单独处理）
+_CSS_TEMPLATES = {
+    'id': '[id="{}"]',
+    'name': '[name="{}"]',
+    'class name': '.{}',
+    'tag name': '{}',
+    'css selector': '{}',
+}
+
+_OBSERVER_JS = '''
+var kind = arguments[0], value = arguments[1], all = arguments[2], timeout = arguments[3];
+var done = arguments[arguments.length - 1];
+function find() {
+    var found = [];
+    if (kind === 'xpath') {
+        var result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < result.snapshotLength; i++) { found.push(result.snapshotItem(i)); }
+    } else {
+        found = Array.prototype.slice.call(document.querySelectorAll(value));
+    }
+    return found.length ? (all ? found : found[0]) : null;
+}
+var hit = find();
+if (hit) { done(hit); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    var element = find();
+    if (element) { observer.disconnect(); clearTimeout(timer); done(element); }
+});
+observer.observe(document, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () { observer.disconnect(); done(null); }, timeout);
+'''
+
+
+# ---------------------------------------------------------------------------
+# 等待统计
+# ---------------------------------------------------------------------------
+class WaitStats(object):
+    """按定位表达式汇总等待耗时（进程内，线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}        # 名称 -> [次数, 总耗时, 最长耗时, 轮询次数, 超时次数]
+
+    def record(self, name: str, elapsed: float, polls: int, timed_out: bool) -> None:
+        with self._lock:
+            item = self._items.get(name)
+            if item is None:
+                item = self._items[name] = [0, 0.0, 0.0, 0, 0]
+            item[0] += 1
+            item[1] += elapsed
+            item[2] = max(item[2], elapsed)
+            item[3] += polls
+            item[4] += timed_out
+
+    def summary(self, top: int = None) -> list:
+        """按总耗时降序：[{'name', 'count', 'total_s', 'avg_ms', 'max_ms', 'polls', 'timeouts'}, ...]"""
+        with self._lock:
+            items = sorted(self._items.items(), key=lambda kv: kv[1][1], reverse=True)
+        rows = [{'name': name, 'count': count, 'total_s': round(total, 3),
+                 'avg_ms': round(total / count * 1000, 1), 'max_ms': round(longest * 1000, 1),
+                 'polls': polls, 'timeouts': timeouts}
+                for name, (count, total, longest, polls, timeouts) in items]
+        return rows[:top] if top else rows
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(item[1] for item in self._items.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+wait_stats = WaitStats()
+
+
+# ---------------------------------------------------------------------------
+# 等待
+# ---------------------------------------------------------------------------
+class ElementWait(object):
+    """
+    用法：
+        wait = ElementWait(driver)
+        element = wait.find(('name', '_58_login'))
+        wait.until(EC.title_is('首页'), '标题')
+    """
+
+    def __init__(self, driver, timeout: float = None, poll_start: float = None, poll_max: float = None,
+                 strategy: str = None):
+        web_config = get_config()['WEB自动化配置']
+        self.driver = driver
+        self.timeout = timeout if timeout is not None else web_config.get_float('timeout', 5)
+        self.poll_start = poll_start if poll_start is not None else web_config.get_float('poll_start', 0.005)
+        self.poll_max = poll_max if poll_max is not None else web_config.get_float('poll_max', 0.2)
+        self.strategy = strategy or web_config.get('wait_strategy', 'poll').strip().lower() or 'poll'
+        if self.strategy not in WAIT_STRATEGIES:
+            raise ValueError('wait_strategy 只能是 {}，当前为 {!r}'.format('/'.join(WAIT_STRATEGIES), self.strategy))
+
+    def until(self, condition, name: str = '', timeout: float = None):
+        """
+        退避轮询直到 condition(driver) 返回真值
+        :param name: 统计与报错时显示的名称（通常是定位表达式）
+        :return:     condition 的返回值；超时抛出 TimeoutException
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        interval = self.poll_start
+        polls = 0
+        while True:
+            polls += 1
+            try:
+                value = condition(self.driver)
+                if value:
+                    wait_stats.record(name, time.perf_counter() - start, polls, False)
+                    return value
+            except NoSuchElementException:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                wait_stats.record(name, time.perf_counter() - start, polls, True)
+                raise TimeoutException('等待 {} 超时（{} 秒，检查 {} 次）'.format(name, timeout, polls))
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.poll_max)
+
+    def _observe(self, locator: tuple, is_all: bool, timeout: float):
+        """页面内等待；返回元素 / 元素列表 / None（超时），不支持的定位方式返回 NotImplemented"""
+        kind, value = locator
+        if kind == 'xpath':
+            selector = value
+        elif kind in _CSS_TEMPLATES:
+            selector = _CSS_TEMPLATES[kind].format(value)
+        else:
+            return NotImplemented
+        # 脚本超时比等待时间多留 1 秒，由页面内的 setTimeout 先返回；每个浏览器只设置一次
+        script_timeout = timeout + 1
+        if getattr(self.driver, '_observer_script_timeout', 0) < script_timeout:
+            self.driver.set_script_timeout(script_timeout)
+            self.driver._observer_script_timeout = script_timeout
+        return self.driver.execute_async_script(_OBSERVER_JS, kind, selector, is_all, int(timeout * 1000))
+
+    def find(self, locator: tuple, is_all: bool = False):
+        """
+        等待元素出现在 DOM 中
+        :param locator: (by, value)
+        :param is_all:  False 返回第一个 WebElement；True 返回全部
+        """
+        name = '{}={}'.format(*locator)
+        if self.strategy == 'observer':
+            start = time.perf_counter()
+            try:
+                found = self._observe(locator, is_all, self.timeout)
+            except WebDriverException as e:
+                # 页面跳转等原因中断了脚本，剩余时间改用轮询
+                logger.debug('页面内等待 %s 中断，改用轮询：%s', name, e)
+                found = NotImplemented
+            if found is not NotImplemented:
+                elapsed = time.perf_counter() - start
+                wait_stats.record(name, elapsed, 1, not found)
+                if not found:
+                    raise TimeoutException('等待 {} 超时（{} 秒）'.format(name, self.timeout))
+                return found
+            remaining = max(self.timeout - (time.perf_counter() - start), 0)
+        else:
+            remaining = self.timeout
+        elements = self.until(lambda driver: driver.find_elements(*locator), name, remaining)
+        return elements if is_all else elements[0]
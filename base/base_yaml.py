@@ -2,24 +2,134 @@
 """
 YAML 读写工具
 依赖：PyYAML（pip install pyyaml）
+
+- read_yaml / write_yaml：普通读写；安装了 libyaml 时自动使用 CSafeLoader 加速解析
+- 可选的编译缓存：按文件内容哈希把解析结果序列化到 data/temp/yaml_cache，
+  内容未变化时直接反序列化，跳过 YAML 解析（[数据缓存配置] YAML_COMPILED_CACHE）
+- load_compiled_yaml：按 (路径, mtime) 缓存解析结果，并预编译含 $placeholder 的叶子节点与键，
+  供 DataBase.get_data 这类高频读取使用；渲染结果与旧的"整篇文本替换后再解析"一致：
+  键中的占位符同样替换；未加引号的标量替换后按 YAML 规则重新识别类型（age: ${age} -> 18 为 int），
+  加引号的标量替换后始终是字符串（"${age}" -> '18'）；
+  只有替换后才是合法 YAML 的文件（如 json: {"id": ${id}}、ids: [${x}, ${y}]）改为每次整篇文本替换后再解析
 """
 
-import yaml
+import atexit
+import hashlib
 import os
+import pickle
+import re
+from functools import lru_cache
+from string import Template
+
+import yaml
+
+from base.base_config import get_config
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+
+logger = Logger('base_yaml.py').get_logger()
+
+# 优先使用 libyaml 的 C 实现，未编译 libyaml 时退回纯 Python 实现
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 编译缓存格式版本，缓存内容结构变化时递增，使旧缓存自动失效
+_COMPILED_CACHE_VERSION = b'2'
+
+
+class PlainTemplate(str):
+    """YAML 中未加引号、且含 $ 的标量；替换占位符后需要按 YAML 规则重新识别类型"""
+
+    __slots__ = ()
+
+
+def _construct_str(loader, node):
+    value = loader.construct_scalar(node)
+    if not node.style and '$' in value:       # C 实现中未加引号的 style 为 ''，纯 Python 实现为 None
+        return PlainTemplate(value)
+    return value
+
+
+class TemplateLoader(SafeLoader):
+    """标记未加引号的模板标量（PlainTemplate），供 load_compiled_yaml 使用"""
+
+
+TemplateLoader.add_constructor('tag:yaml.org,2002:str', _construct_str)
+
+# PlainTemplate 按普通字符串输出
+for _dumper in {yaml.Dumper, yaml.SafeDumper, getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+                getattr(yaml, 'CDumper', yaml.Dumper)}:
+    _dumper.add_representer(PlainTemplate, yaml.representer.SafeRepresenter.represent_str)
+
+_resolver = yaml.resolver.Resolver()
+_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+@lru_cache(maxsize=4096)
+def _resolve_plain(text: str):
+    """按未加引号的 YAML 标量识别替换后的文本：'18' -> 18、'true' -> True、'' -> None"""
+    if _resolver.resolve(yaml.ScalarNode, text, (True, False)) == _STR_TAG and text[:1] not in ('[', '{'):
+        return text
+    try:
+        return yaml.load(text, Loader=SafeLoader)
+    except yaml.YAMLError:
+        return text
+
+
+def _use_compiled_cache() -> bool:
+    config = get_config()
+    return '数据缓存配置' in config and config['数据缓存配置'].get_bool('YAML_COMPILED_CACHE', False)
 
 
-def read_yaml(path: str) -> dict:
+def _compiled_cache_path(content: bytes) -> str:
+    """编译缓存文件路径：以文件内容 + PyYAML 版本的哈希命名"""
+    digest = hashlib.sha1(_COMPILED_CACHE_VERSION)
+    digest.update(yaml.__version__.encode('utf-8'))
+    digest.update(content)
+    return os.path.join(BP.YAML_CACHE_DIR, digest.hexdigest() + '.pickle')
+
+
+def _load_with_compiled_cache(content: bytes, loader=SafeLoader):
+    cache_path = _compiled_cache_path(content + b'\0' + loader.__name__.encode('ascii'))
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        logger.warning('【YAML 编译缓存】%s 读取失败，重新解析：%s', cache_path, e)
+
+    data = yaml.load(content, Loader=loader) or {}
+    try:
+        os.makedirs(BP.YAML_CACHE_DIR, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning('【YAML 编译缓存】%s 写入失败：%s', cache_path, e)
+    return data
+
+
+def read_yaml(path: str, compiled_cache: bool = None, loader=SafeLoader) -> dict:
     """
     读取 YAML 文件并返回 Python 对象（通常是 dict）
     :param path: 文件绝对/相对路径
+    :param compiled_cache: 是否使用编译缓存；None 表示按 config.ini 的 YAML_COMPILED_CACHE 决定
+    :param loader: YAML Loader；load_compiled_yaml 使用 TemplateLoader
     :return: 反序列化后的 Python 对象
     :raises FileNotFoundError: 当路径不存在时
     """
     if not os.path.exists(path):
         raise FileNotFoundError(f'{path} 路径不存在')
 
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}   # 空文件返回空 dict，避免 None
+    if compiled_cache is None:
+        compiled_cache = _use_compiled_cache()
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    if compiled_cache:
+        return _load_with_compiled_cache(content, loader)
+    return yaml.load(content, Loader=loader) or {}   # 空文件返回空 dict，避免 None
 
 
 def write_yaml(path: str, data: dict) -> None:
@@ -33,3 +143,389 @@ def write_yaml(path: str, data: dict) -> None:
 
     with open(path, 'w', encoding='utf-8') as f:
         yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+
+
+# ---------------------------------------------------------------------------
+# 解析缓存 + 占位符预编译
+# ---------------------------------------------------------------------------
+def _copy_tree(node):
+    """只复制 dict/list 容器，叶子（字符串、数字等不可变对象）直接复用"""
+    if isinstance(node, dict):
+        return {k: _copy_tree(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_copy_tree(v) for v in node]
+    return node
+
+
+class CompiledString(object):
+    """
+    预编译的字符串模板：一次性找出所有占位符位置，渲染时只做拼接
+    语义与 Template.safe_substitute 一致：$$ 转义为 $，缺失的占位符原样保留
+    """
+
+    __slots__ = ('parts', 'names')
+
+    def __init__(self, text: str):
+        # parts：字面量 str，或 (占位符名, 原始文本)
+        self.parts = []
+        position = 0
+        for match in Template.pattern.finditer(text):
+            self.parts.append(text[position:match.start()])
+            name = match.group('named') or match.group('braced')
+            if name:
+                self.parts.append((name, match.group()))
+            elif match.group('escaped') is not None:
+                self.parts.append('$')
+            else:
+                self.parts.append(match.group())
+            position = match.end()
+        self.parts.append(text[position:])
+        self.parts = [part for part in self.parts if part != '']
+        self.names = tuple(part[0] for part in self.parts if isinstance(part, tuple))
+
+    def render(self, mapping) -> str:
+        return ''.join(
+            part if isinstance(part, str)
+            else (str(mapping[part[0]]) if part[0] in mapping else part[1])
+            for part in self.parts
+        )
+
+
+def _compile_leaf(text: str):
+    """
+    分析字符串叶子中的占位符
+    :return: None（无占位符）/ ('name', 占位符名)（整个叶子就是一个占位符）/ ('template', CompiledString)；
+             未加引号的标量（PlainTemplate）对应 'plain_name' / 'plain_template'
+    """
+    if '$' not in text:
+        return None
+    compiled = CompiledString(text)
+    if not compiled.names:
+        return None
+    prefix = 'plain_' if isinstance(text, PlainTemplate) else ''
+    if len(compiled.parts) == 1:
+        return prefix + 'name', compiled.names[0]
+    return prefix + 'template', compiled
+
+
+class CompiledYaml(object):
+    """
+    解析一次的 YAML 数据
+    - data  ：反序列化后的原始对象（只读，不要直接修改）
+    - slots ：含占位符的叶子位置列表 [(路径, 类型, 载荷), ...]；
+              类型为 'key' 时表示路径最后一级的键本身含占位符，载荷为 (CompiledString, 是否未加引号)
+    render() 每次返回一份容器级拷贝，调用方修改结果不会污染缓存；
+    select('login_api') 取子树，只拷贝/渲染需要的那一部分
+    """
+
+    def __init__(self, data, slots=None):
+        self.data = data
+        self._children = {}
+        if slots is None:
+            self.slots = []
+            self._collect(data, ())
+        else:
+            self.slots = slots
+
+    def _collect(self, node, path):
+        if isinstance(node, str):
+            compiled = _compile_leaf(node)
+            if compiled:
+                self.slots.append((path, compiled[0], compiled[1]))
+            return
+        if isinstance(node, dict):
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            return
+        for key, value in items:
+            if isinstance(node, dict) and isinstance(key, str) and '$' in key:
+                compiled = CompiledString(key)
+                if compiled.names:
+                    self.slots.append((path + (key,), 'key', (compiled, isinstance(key, PlainTemplate))))
+            self._collect(value, path + (key,))
+
+    def select(self, *path) -> 'CompiledYaml':
+        """
+        取子树（结果按路径缓存）
+        :param path: 逐级的 key / 下标，如 select('login', 'username')
+        """
+        child = self._children.get(path)
+        if child is None:
+            node = self.data
+            for key in path:
+                node = node[key]
+            depth = len(path)
+            # 选中节点自身的键不属于子树
+            slots = [(slot_path[depth:], kind, payload) for slot_path, kind, payload in self.slots
+                     if slot_path[:depth] == path and (kind != 'key' or len(slot_path) > depth)]
+            child = CompiledYaml(node, slots)
+            self._children[path] = child
+        return child
+
+    @staticmethod
+    def _applies(kind, payload, change_data) -> bool:
+        """该占位符是否需要替换（整体占位符在 change_data 中缺失时保留原文）"""
+        return bool(change_data) and (kind not in ('name', 'plain_name') or payload in change_data)
+
+    @staticmethod
+    def _resolve(kind, payload, change_data):
+        """与"文本替换后再解析"一致：替换值按 str 拼入文本，未加引号的标量再按 YAML 识别类型"""
+        if kind == 'name':
+            return str(change_data[payload])
+        if kind == 'plain_name':
+            return _resolve_plain(str(change_data[payload]))
+        if kind == 'template':
+            return payload.render(change_data)
+        if kind == 'plain_template':
+            return _resolve_plain(payload.render(change_data))
+        compiled, plain = payload
+        text = compiled.render(change_data)
+        return _resolve_plain(text) if plain else text
+
+    @staticmethod
+    def _rename(result, path, key) -> None:
+        """把 path 所在的键改名为 key（原地重建字典，保持键的顺序）"""
+        parent = result
+        for step in path[:-1]:
+            parent = parent[step]
+        old = path[-1]
+        if key == old:
+            return
+        items = [(key if k == old else k, v) for k, v in parent.items()]
+        parent.clear()
+        parent.update(items)
+
+    def _fill(self, result, change_data):
+        """在 result（data 的拷贝）上替换占位符；先替换值，再由深到浅替换键，保证路径有效"""
+        keys = []
+        for path, kind, payload in self.slots:
+            if kind == 'key':
+                keys.append((path, payload))
+                continue
+            if not self._applies(kind, payload, change_data):
+                continue
+            value = self._resolve(kind, payload, change_data)
+            if not path:
+                return value
+            parent = result
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = value
+        for path, payload in reversed(keys):
+            self._rename(result, path, self._resolve('key', payload, change_data))
+        return result
+
+    def render(self, change_data=None):
+        """
+        返回数据拷贝，并用 change_data 替换占位符（语义同整篇 Template.safe_substitute 后再解析 YAML）
+        - 替换值一律按 str 拼入；未加引号的标量（如 age: ${age}）替换后按 YAML 识别类型，
+          加引号的标量（如 "${username}"）替换后为字符串
+        - 键中的占位符同样替换
+        """
+        result = _copy_tree(self.data)
+        if not change_data or not self.slots:
+            return result
+        return self._fill(result, change_data)
+
+    def render_many(self, rows) -> list:
+        """
+        批量渲染：每个占位符位置只定位一次，对所有行依次替换
+        :param rows: 可迭代的 change_data（dict / CaseRow 等映射）
+        :return: 与 rows 一一对应的渲染结果列表
+        """
+        rows = list(rows)
+        if any(kind == 'key' for _, kind, _ in self.slots):
+            return [self._fill(_copy_tree(self.data), row) if row else _copy_tree(self.data) for row in rows]
+        results = [_copy_tree(self.data) for _ in rows]
+        for path, kind, payload in self.slots:
+            if not path:
+                return [self._resolve(kind, payload, row) if self._applies(kind, payload, row) else self.data
+                        for row in rows]
+            parent_path, last = path[:-1], path[-1]
+            for row, result in zip(rows, results):
+                if not self._applies(kind, payload, row):
+                    continue
+                parent = result
+                for key in parent_path:
+                    parent = parent[key]
+                parent[last] = self._resolve(kind, payload, row)
+        return results
+
+
+# ---------------------------------------------------------------------------
+# 退化：整篇文本替换后再解析
+# ---------------------------------------------------------------------------
+# 占位符在结构解析时临时替换成的标记（flow 集合中的 ${x} 不是合法 YAML，标记是合法的普通标量）
+_MARK = '__yaml_tpl_{}__'
+_MARK_PATTERN = re.compile(r'__yaml_tpl_(\d+)__')
+
+
+def _restore_marks(node, originals):
+    """把结构解析结果中的标记还原为占位符原文"""
+    if isinstance(node, str):
+        if '__yaml_tpl_' not in node:
+            return node
+        return _MARK_PATTERN.sub(lambda m: originals[int(m.group(1))], node)
+    if isinstance(node, dict):
+        return {_restore_marks(k, originals): _restore_marks(v, originals) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_restore_marks(v, originals) for v in node]
+    return node
+
+
+@lru_cache(maxsize=256)
+def _parse_text(text: str):
+    """替换后的文本 -> 解析结果（同一行数据渲染多个字段时只解析一次；调用方需自行拷贝）"""
+    return yaml.load(text, Loader=SafeLoader) or {}
+
+
+class TextTemplateYaml(CompiledYaml):
+    """
+    模板本身不是合法 YAML、只有替换后才合法的文件：每次渲染都对整篇文本做 safe_substitute 再解析，
+    与旧的 get_data 完全一致；data 为占位符保留原文的结构（供 select、checks、auth 等读取）
+    """
+
+    def __init__(self, template: CompiledString, data, path=()):
+        self.template = template
+        self.path = path
+        self.data = data
+        self._children = {}
+        # 每个顶层键都视为含占位符，RequestPlan 逐个字段渲染
+        if isinstance(data, dict):
+            self.slots = [((key,), 'text', None) for key in data]
+        else:
+            self.slots = [((), 'text', None)]
+
+    @classmethod
+    def from_text(cls, text: str) -> 'TextTemplateYaml':
+        """占位符换成标记后解析出结构，再把标记还原；仍然无法解析时抛出 yaml.YAMLError"""
+        originals = []
+
+        def mark(match):
+            if match.group('named') or match.group('braced'):
+                originals.append(match.group())
+                return _MARK.format(len(originals) - 1)
+            return match.group()
+
+        data = yaml.load(Template.pattern.sub(mark, text), Loader=SafeLoader) or {}
+        return cls(CompiledString(text), _restore_marks(data, originals))
+
+    def select(self, *path) -> 'TextTemplateYaml':
+        child = self._children.get(path)
+        if child is None:
+            node = self.data
+            for key in path:
+                node = node[key]
+            child = self._children[path] = TextTemplateYaml(self.template, node, self.path + path)
+        return child
+
+    def render(self, change_data=None):
+        """没有 change_data 时返回保留占位符原文的结构"""
+        if not change_data:
+            return _copy_tree(self.data)
+        node = _parse_text(self.template.render(change_data))
+        for key in self.path:
+            node = node[key]
+        return _copy_tree(node)
+
+    def render_many(self, rows) -> list:
+        return [self.render(row) for row in rows]
+
+
+# path -> (mtime_ns, size, CompiledYaml)
+_compiled_cache = {}
+_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def yaml_cache_info() -> dict:
+    """返回解析缓存统计：命中/未命中次数、命中率、缓存文件数"""
+    hits, misses = _cache_stats['hits'], _cache_stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'files': len(_compiled_cache),
+            'hit_rate': hits / total if total else 0.0}
+
+
+def load_compiled_yaml(path: str) -> CompiledYaml:
+    """
+    读取 YAML 并缓存解析结果；文件 mtime/大小未变化时直接命中缓存
+    :param path: 文件路径
+    :return: CompiledYaml，调用 render(change_data) 取得数据
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'{path} 路径不存在')
+
+    cached = _compiled_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _cache_stats['hits'] += 1
+        return cached[2]
+
+    _cache_stats['misses'] += 1
+    try:
+        compiled = CompiledYaml(read_yaml(path, loader=TemplateLoader))
+    except yaml.YAMLError as e:
+        with open(path, 'r', encoding='utf-8') as f:
+            compiled = TextTemplateYaml.from_text(f.read())
+        logger.debug('【YAML 缓存】%s 替换占位符前不是合法 YAML，改为每次整篇文本替换后再解析：%s',
+                     path, str(e).replace('\n', ' '))
+    _compiled_cache[path] = (stat.st_mtime_ns, stat.st_size, compiled)
+    info = yaml_cache_info()
+    logger.debug('【YAML 缓存】解析 %s（占位符 %s 处），命中率 %.1f%%（命中 %s / 未命中 %s）',
+                 path, len(compiled.slots), info['hit_rate'] * 100, info['hits'], info['misses'])
+    return compiled
+
+
+@atexit.register
+def _report_cache_info():
+    """进程退出时输出一次缓存命中率汇总"""
+    info = yaml_cache_info()
+    if info['hits'] or info['misses']:
+        logger.info('【YAML 缓存】共缓存 %s 个文件，命中率 %.1f%%（命中 %s / 未命中 %s）',
+                    info['files'], info['hit_rate'] * 100, info['hits'], info['misses'])
+
+
+# ---------------------------------------------------------------------------
+# 基准：5 万行用例文件，对比纯 Python / libyaml / 编译缓存
+# ---------------------------------------------------------------------------
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    import time
+
+    rows = [{'username': 'user{:05d}'.format(i), 'password': str(i % 1000),
+             'flag': 'student' if i % 2 else 'teacher', 'age': i % 80}
+            for i in range(50000)]
+    tmp_dir = tempfile.mkdtemp()
+    bench_file = os.path.join(tmp_dir, 'bench.yaml')
+    yaml.dump(rows, open(bench_file, 'w', encoding='utf-8'), allow_unicode=True, sort_keys=False,
+              Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper))
+    BP.YAML_CACHE_DIR = os.path.join(tmp_dir, 'yaml_cache')
+
+    def _bench(name, func):
+        start = time.perf_counter()
+        data = func()
+        assert data == rows
+        print('{:<12}{:>8.3f} s'.format(name, time.perf_counter() - start))
+
+    _bench('纯 Python', lambda: yaml.load(open(bench_file, 'rb').read(), Loader=yaml.SafeLoader))
+    if SafeLoader is not yaml.SafeLoader:
+        _bench('libyaml', lambda: read_yaml(bench_file, compiled_cache=False))
+    else:
+        print('libyaml     未安装，跳过')
+    read_yaml(bench_file, compiled_cache=True)  # 预热：生成编译缓存
+    _bench('编译缓存', lambda: read_yaml(bench_file, compiled_cache=True))
+
+    # 5 万行 change_data 渲染同一个接口模板：逐行 Template + 解析 vs 预编译批量渲染
+    api_file = os.path.join(BP.DATA_ELEMENTS_DIR, 'project_auto_test', '接口元素信息-登录.yaml')
+    raw = open(api_file, encoding='utf-8').read()
+    start = time.perf_counter()
+    expected = [yaml.load(Template(raw).safe_substitute(row), Loader=SafeLoader)['login_api'] for row in rows]
+    print('{:<12}{:>8.3f} s'.format('逐行渲染', time.perf_counter() - start))
+    start = time.perf_counter()
+    rendered = load_compiled_yaml(api_file).select('login_api').render_many(rows)
+    print('{:<12}{:>8.3f} s'.format('批量渲染', time.perf_counter() - start))
+    assert rendered == expected
+    shutil.rmtree(tmp_dir)
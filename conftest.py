@@ -4,12 +4,16 @@ from io import BytesIO
 from py.xml import html
 from base.utils import *
 from base.base_path import BasePath as BP
-from base.base_container import GlobalManager
+from base.base_config import get_config
+from base.base_context import get_context
+from base.base_driver_pool import DriverPool, create_driver
+from base.base_storage_state import get_storage_state_cache
 from base.base_yaml import write_yaml
+from base.base_cassette import RECORD_MODES, set_record_mode
 
-config = read_config_ini(BP.CONFIG_FILE)
-gm = GlobalManager()
-gm.set_value('CONFIG_INFO', config)
+config = get_config()
+context = get_context()
+context.set('CONFIG_INFO', config)
 insert_js_html = False
 
 
@@ -21,40 +25,92 @@ def pytest_addoption(parser):
     parser.addoption(
         "--host", action="store", default=config['项目运行设置']['test_url'], help="test host->http://10.11.1.171:8888"
     )
+    parser.addoption(
+        "--record-mode", action="store", default=None, choices=RECORD_MODES,
+        help="接口录制回放模式，覆盖 config.ini 中的 record_mode：off/record/replay/auto"
+    )
 
 
-@pytest.fixture(scope="function")
-def driver(request):
-    try:
-        from selenium import webdriver
-        test_driver = None
-        driver_name = request.config.getoption("--browser-name")
-        if driver_name == 'ie':
-            test_driver = webdriver.Ie(executable_path=os.path.join(BP.DRIVER_DIR, 'IEDriverServer.exe'))
-        elif driver_name == 'firefox':
-            test_driver = webdriver.Firefox(executable_path=os.path.join(BP.DRIVER_DIR, 'gecokdriver.exe'))
-        elif driver_name == 'chrome':
-            test_driver = webdriver.Chrome(executable_path=os.path.join(BP.DRIVER_DIR, 'chromedriver.exe'))
-        elif driver_name == 'chromeheadles':
-            from selenium.webdriver.chrome.options import Options as ChromeOptions
-            chrome_options = ChromeOptions()
-            chrome_options.add_argument('--headless')
-            test_driver = webdriver.Chrome(executable_path=os.path.join(BP.DRIVER_DIR, 'chromedriver.exe'))
-            test_driver.set_window_size(1920, 1080)
-        GlobalManager().set_value('driver', test_driver)
-        test_driver.implicitly_wait(5)
-        print("正在启动浏览器{}".format(driver_name))
+def pytest_configure(config):
+    set_record_mode(config.getoption("--record-mode"))
+    # pytest-xdist worker：还原主进程传递过来的 session 变量
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput and workerinput.get('context_handoff'):
+        context.receive(workerinput['context_handoff'])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """pytest-xdist 主进程：把 session 作用域中可序列化的变量传给每个 worker"""
+    node.workerinput['context_handoff'] = context.handoff()
 
-        def quit_driver():
-            print("当全部用例执行完成之后：teardown quit driver!")
-            test_driver.quit()
 
-        request.addfinalizer(quit_driver)
-        return test_driver
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """每个用例（含 setup / teardown / 生成报告）在自己的 test 作用域中执行，结束后清空"""
+    with context.test_scope(item.nodeid):
+        yield
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request):
+    """每个 worker 进程一个浏览器池：预启动 pool_size 个浏览器，用例之间只做重置"""
+    try:
+        import selenium  # noqa: F401
     except ImportError:
         pytest.exit("未安装selenium")
+    web_config = config['WEB自动化配置']
+    driver_name = request.config.getoption("--browser-name")
+    pool = DriverPool(lambda: create_driver(driver_name), web_config.get_int('pool_size', 1),
+                      web_config.get_int('pool_max_uses', 0))
+    try:
+        print("正在启动浏览器{}".format(driver_name))
+        pool.warm()
     except Exception as e:
+        pool.close()
         pytest.exit("启动webdriver错误：{}".format(e))
+    yield pool
+    from base.base_wait import wait_stats
+    print("当全部用例执行完成之后：teardown quit driver! 浏览器池统计：{}".format(pool.stats()))
+    print("元素等待共 {:.2f} 秒，耗时最多的元素：".format(wait_stats.total()))
+    for row in wait_stats.summary(top=10):
+        print("  {}".format(row))
+    pool.close()
+
+
+@pytest.fixture(scope="function")
+def driver(driver_pool):
+    try:
+        test_driver = driver_pool.lease()
+    except Exception as e:
+        pytest.exit("启动webdriver错误：{}".format(e))
+    context.set('driver', test_driver, scope='test')
+    yield test_driver
+    driver_pool.release(test_driver)
+
+
+@pytest.fixture(scope="function")
+def login_as(driver):
+    """
+    让 driver 处于已登录状态：login_as('admin', '123456')
+    同一用户每轮只通过界面登录一次，之后注入登录态快照；登录流程本身的用例请直接使用 LoginPage
+    """
+    from page_object.project_auto_test.login_page import LoginPage
+
+    def _ui_login(username, password):
+        page = LoginPage()
+        page.login(username, password)
+        if not page.is_logged_in():
+            pytest.fail("账号{}登录失败".format(username))
+
+    def _login_as(username, password):
+        if config['WEB自动化配置'].get_bool('storage_state', True):
+            get_storage_state_cache().apply(driver, username, lambda _: _ui_login(username, password))
+        else:
+            _ui_login(username, password)
+        return driver
+
+    return _login_as
 
 
 def pytest_html_results_summary(prefix, summary, postfix):
@@ -75,7 +131,7 @@ def pytest_html_results_table_row(report, cells):
 
 
 def _capture_screenshot_sel():
-    driver = GlobalManager().get_value('driver')
+    driver = context.get('driver')
     if not driver:
         pytest.exit('driver获取为空')
     driver.get_screenshot_as_file(os.path.join(BP.SCREENSHOT_PIC))
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+按接口 YAML 自动生成的本地 Mock 服务
+--------------------------------------------------
+读取 data/data_elements/<项目>/接口元素信息-*.yaml 中的接口定义（method + url），
+为每个接口注册一条路由，返回固定或模板化的响应，可把 TEST_URL 指向它脱离被测系统运行。
+
+接口节点可选的 mock 块（ApiBase 构建请求时会跳过该节点）：
+    login_api:
+      method: post
+      url: /web/guest/home
+      params: {"p_p_id": "58"}
+      data: {"_58_login": "${username}"}
+      mock:
+        status: 200
+        headers: {"X-Mock": "1"}
+        body: {"code": 0, "user": "${_58_login}"}   # ${字段} 取自请求的 query / 表单 / JSON 顶层字段
+        latency: [0.01, 0.05]                       # 秒；单个数值为固定延迟
+        error_rate: 0.1                             # 按概率返回 error_status
+        error_status: 500
+未定义 mock 块时返回 200 + {"code": 0, "msg": "ok", "api": 接口名}
+
+同一 method + path 下有多个接口时，按 params 中的固定取值区分（固定参数越多越优先）
+
+命令行：
+    python ext_tools/mock_server.py --project project_auto_test --port 8080 --latency 0.02 --error-rate 0.01
+--------------------------------------------------
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qsl, urlsplit
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from base.base_path import BasePath as BP
+from base.base_yaml import CompiledYaml, load_compiled_yaml
+from ext_tools.stub_server import StubServer
+
+# 接口 YAML 文件名模式
+API_YAML_PATTERN = '接口元素信息-*.yaml'
+
+
+def _is_placeholder(value) -> bool:
+    return isinstance(value, str) and '${' in value
+
+
+# ---------------------------------------------------------------------------
+# 路由
+# ---------------------------------------------------------------------------
+class MockRoute(object):
+    """一个接口的响应定义"""
+
+    def __init__(self, api_name: str, node: dict, latency=None, error_rate: float = None):
+        """
+        :param latency:    全局默认延迟（接口 mock 块未配置时使用）
+        :param error_rate: 全局默认错误率（接口 mock 块未配置时使用）
+        """
+        mock = node.get('mock') or {}
+        self.api_name = api_name
+        self.method = str(node['method']).upper()
+        self.path = urlsplit(str(node['url'])).path or '/'
+        # 请求中必须出现的固定查询参数（用于区分同一地址下的多个接口）
+        self.match_params = {str(k): str(v) for k, v in (node.get('params') or {}).items()
+                             if not _is_placeholder(v)}
+        self.status = int(mock.get('status', 200))
+        self.headers = dict(mock.get('headers') or {})
+        body = mock.get('body', {'code': 0, 'msg': 'ok', 'api': api_name})
+        self.body = CompiledYaml(body)
+        self.static_body = None if self.body.slots else self._encode(body)
+        latency = mock.get('latency', latency)
+        if isinstance(latency, (list, tuple)):
+            self.latency = (float(latency[0]), float(latency[1]))
+        else:
+            self.latency = (float(latency or 0),) * 2
+        self.error_rate = float(mock.get('error_rate', error_rate or 0))
+        self.error_status = int(mock.get('error_status', 500))
+        self.hits = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(body) -> bytes:
+        if isinstance(body, bytes):
+            return body
+        if isinstance(body, str):
+            return body.encode('utf-8')
+        return json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    def matches(self, query: dict) -> bool:
+        return all(query.get(k) == v for k, v in self.match_params.items())
+
+    def respond(self, fields: dict) -> tuple:
+        """返回 (状态码, 响应头, 响应体)"""
+        with self._lock:
+            self.hits += 1
+        low, high = self.latency
+        if high > 0:
+            time.sleep(low if low == high else random.uniform(low, high))
+        if self.error_rate and random.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            body = {'code': -1, 'msg': 'mock injected error', 'api': self.api_name}
+            return self.error_status, {}, self._encode(body)
+        body = self.static_body if self.static_body is not None else self._encode(self.body.render(fields))
+        return self.status, self.headers, body
+
+
+class MockRouter(object):
+    """(method, path) -> [MockRoute, ...]"""
+
+    def __init__(self):
+        self._routes = {}
+
+    def add(self, route: MockRoute) -> None:
+        routes = self._routes.setdefault((route.method, route.path), [])
+        routes.append(route)
+        routes.sort(key=lambda r: len(r.match_params), reverse=True)
+
+    def find(self, method: str, path: str, query: dict):
+        for route in self._routes.get((method, path), ()):
+            if route.matches(query):
+                return route
+        return None
+
+    def routes(self) -> list:
+        return [route for routes in self._routes.values() for route in routes]
+
+    def __len__(self):
+        return sum(len(routes) for routes in self._routes.values())
+
+
+def load_routes(project: str = None, latency=None, error_rate: float = None) -> MockRouter:
+    """
+    扫描接口 YAML 生成路由
+    :param project: data_elements 下的项目名；为空时加载所有项目
+    """
+    router = MockRouter()
+    pattern = os.path.join(BP.DATA_ELEMENTS_DIR, project or '*', API_YAML_PATTERN)
+    for path in sorted(glob.glob(pattern)):
+        for api_name, node in (load_compiled_yaml(path).data or {}).items():
+            if isinstance(node, dict) and 'method' in node and 'url' in node:
+                router.add(MockRoute(api_name, node, latency, error_rate))
+    return router
+
+
+# ---------------------------------------------------------------------------
+# HTTP 服务
+# ---------------------------------------------------------------------------
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    router = None       # 由 MockServer 注入
+
+    def _fields(self, query: dict) -> dict:
+        """合并 query / 表单 / JSON 顶层字段，作为响应模板的取值"""
+        fields = dict(query)
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return fields
+        raw = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '')
+        try:
+            if 'json' in content_type:
+                data = json.loads(raw)
+                if isinstance(data, dict):
+                    fields.update(data)
+            elif 'x-www-form-urlencoded' in content_type:
+                fields.update(parse_qsl(raw.decode('utf-8'), keep_blank_values=True))
+        except ValueError:
+            pass
+        return fields
+
+    def _reply(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        fields = self._fields(query)
+        route = self.router.find(self.command, parts.path, query)
+        if route is None:
+            status, headers = 404, {}
+            body = json.dumps({'code': 404, 'msg': 'mock 中没有匹配的接口',
+                               'method': self.command, 'path': parts.path}, ensure_ascii=False).encode('utf-8')
+        else:
+            status, headers, body = route.respond(fields)
+        self.send_response(status)
+        if not any(k.lower() == 'content-type' for k in headers):
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        for key, value in headers.items():
+            self.send_header(key, str(value))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(StubServer):
+    """
+    用法：
+        with MockServer(project='project_auto_test') as server:
+            ApiBase('接口元素信息-登录', base_url=server.url).request_base('login_api')
+    """
+
+    def __init__(self, project: str = None, host='127.0.0.1', port=0, latency=None, error_rate=None,
+                 router: MockRouter = None):
+        self.router = router or load_routes(project, latency, error_rate)
+        handler = type('MockHandler', (_MockHandler,), {'router': self.router})
+        super().__init__(host, port, handler)
+
+    def stats(self) -> dict:
+        return {route.api_name: {'hits': route.hits, 'errors': route.errors} for route in self.router.routes()}
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='按接口 YAML 定义启动本地 Mock 服务')
+    parser.add_argument('--project', help='data_elements 下的项目名，默认加载全部')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, nargs='+', help='默认延迟（秒），两个数值为随机区间')
+    parser.add_argument('--error-rate', type=float, default=0, help='默认错误注入概率')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    latency = args.latency if args.latency and len(args.latency) > 1 else (args.latency or [0])[0]
+    server = MockServer(args.project, args.host, args.port, latency, args.error_rate)
+    for item in server.router.routes():
+        print('{:<7} {:<40} -> {}'.format(item.method, item.path, item.api_name))
+    print('Mock 服务已启动：{}（config.ini 中 TEST_URL 指向该地址即可）'.format(server.url))
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
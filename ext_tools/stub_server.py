@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+本地 HTTP 桩服务，用于基准测试接口层自身的开销
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 才能保持长连接，便于测量连接复用
+    protocol_version = 'HTTP/1.1'
+    # 响应头与响应体分两次写出，关闭 Nagle 避免与客户端延迟 ACK 叠加出 40ms 停顿
+    disable_nagle_algorithm = True
+    body = json.dumps({'code': 0, 'msg': 'ok'}).encode('utf-8')
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # 默认 backlog 只有 5，并发压测时会出现连接被拒
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StubServer(object):
+    """
+    本地桩服务：任何请求都返回 200 + 固定 JSON，用于在没有被测系统时测量框架自身开销
+    用法：
+        with StubServer() as server:
+            requests.get(server.url + '/web/guest/home')
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, handler=_StubHandler):
+        self.httpd = _StubHTTPServer((host, port), handler)
+        self.url = 'http://{}:{}'.format(*self.httpd.server_address[:2])
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
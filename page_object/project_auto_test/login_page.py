@@ -0,0 +1,29 @@
+from base.base_auto_web import Operator
+from base.base_config import get_config
+from base.base_logger import Logger
+
+logger = Logger('login_page.py').get_logger()
+
+
+class LoginPage(Operator):
+    """登录页：登录流程本身的用例，以及登录态快照首次登录时使用"""
+
+    # 登录表单所在页面（相对 TEST_URL）
+    login_path = '/web/guest/home'
+
+    def __init__(self):
+        super().__init__('Web元素信息-登录')
+        self.base_url = get_config()['项目运行设置']['TEST_URL']
+
+    def open(self):
+        self.get_url(self.base_url + self.login_path)
+
+    def login(self, username, password):
+        self.open()
+        self.send_keys('login/username', username)
+        self.send_keys('login/password', password)
+        self.click('login/loginBtn')
+        logger.info('账号{}提交登录'.format(username))
+
+    def is_logged_in(self):
+        return bool(self.get_text('login/welcome'))
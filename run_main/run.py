@@ -15,12 +15,13 @@ sys.path.insert(0, PROJECT_ROOT)
 
 # ---------- 引入业务模块 ----------
 from base.base_path import BasePath as BP
-from base.utils import read_config_ini, delete_all_file
+from base.base_config import get_config
+from base.utils import delete_all_file
 from base.base_container import GlobalManager
 from base.base_send_email import HandleEmail
 
 # ---------- 读取全局配置 ----------
-config = read_config_ini(BP.CONFIG_FILE)
+config = get_config()
 gm = GlobalManager()
 gm.set_value('CONFIG_INFO', config)
 gm.set_value('DATA_DRIVER_PATH',
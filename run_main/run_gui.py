@@ -10,11 +10,12 @@ import multiprocessing
 import ctypes
 from base.run_qt import run
 from base.base_path import BasePath as BP
-from base.utils import read_config_ini, delete_all_file
+from base.base_config import get_config
+from base.utils import delete_all_file
 from contextlib import contextmanager
 from base.base_yaml import read_yaml
 
-config = read_config_ini(BP.CONFIG_FILE)
+config = get_config()
 gm = GlobalManager()
 gm.set_value('CONFIG_INFO', config)
 run_config = gm.get_value('CONFIG_INFO')['项目运行设置']
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+接口压测入口
+--------------------------------------------------
+重放元素层 接口元素信息-*.yaml 中定义的接口，change_data 由 DataDriver 用例数据循环提供
+- 开环（open） ：按固定速率发起请求，不受响应快慢影响；耗时从计划发起时刻算起（避免协调遗漏）
+- 闭环（closed）：N 个虚拟用户各自循环“发请求 - 等响应 - 思考时间”
+结果（延迟直方图、吞吐量、错误率）写入 reports/load 下的 JSON 与 HTML
+
+示例：
+    python run_main/run_load.py -y 接口元素信息-登录 -a login_api:3 -a home_api \
+        -f test --mode open --rate 200 --duration 30
+    python run_main/run_load.py -y 接口元素信息-登录 -a login_api -f test --mode closed --users 20 --mock
+--------------------------------------------------
+"""
+
+import argparse
+import html
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------- 项目根目录 ----------
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# ---------- 引入业务模块 ----------
+from base.base_auto_api import ApiBase, percentile
+from base.base_data import DataDriver
+from base.base_logger import Logger
+from base.base_path import BasePath as BP
+
+logger = Logger('run_load.py').get_logger()
+
+# 延迟直方图的桶上界（毫秒），最后一个桶收集超出部分
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+# ---------------------------------------------------------------------------
+# 压测目标：接口 + 数据
+# ---------------------------------------------------------------------------
+class LoadTarget(object):
+    """
+    按权重轮转的接口列表 + 循环使用的 change_data
+    :param api_specs: ['login_api:3', 'home_api']，冒号后为权重（默认 1）
+    """
+
+    def __init__(self, yaml_name: str, api_specs, feed=None, base_url: str = None):
+        self.api = ApiBase(yaml_name, base_url=base_url)
+        schedule = []
+        for spec in api_specs:
+            name, _, weight = spec.partition(':')
+            plan = self.api.get_plan(name)
+            schedule.extend([(name, plan)] * int(weight or 1))
+        self._schedule = schedule
+        self._feed = feed if feed is not None and len(feed) else None
+        self._counter = itertools.count()
+
+    def next_request(self):
+        """返回 (接口名, 请求字典)；线程安全"""
+        index = next(self._counter)
+        name, plan = self._schedule[index % len(self._schedule)]
+        change_data = self._feed[index % len(self._feed)] if self._feed is not None else None
+        yaml_dict = plan.build(change_data)
+        yaml_dict.setdefault('timeout', self.api.timeout)
+        return name, yaml_dict
+
+
+# ---------------------------------------------------------------------------
+# 结果记录与统计
+# ---------------------------------------------------------------------------
+class LoadRecorder(object):
+    """收集每次请求的 (接口名, 完成时刻, 耗时, 响应码, 错误)"""
+
+    def __init__(self):
+        self.records = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, api_name: str, latency: float, status, error: str = None) -> None:
+        # list.append 本身是原子操作，多线程写入无需加锁
+        self.records.append((api_name, time.perf_counter() - self.started, latency, status, error))
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @staticmethod
+    def _histogram(latencies) -> list:
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for latency in latencies:
+            ms = latency * 1000
+            for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if ms <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = ['<={}ms'.format(b) for b in HISTOGRAM_BOUNDS_MS] + ['>{}ms'.format(HISTOGRAM_BOUNDS_MS[-1])]
+        return [{'bucket': label, 'count': count} for label, count in zip(labels, counts)]
+
+    def _stats(self, records, elapsed: float) -> dict:
+        latencies = sorted(r[2] for r in records)
+        errors = sum(1 for r in records if r[4] is not None or (r[3] or 0) >= 400)
+        count = len(records)
+        to_ms = lambda value: round(value * 1000, 2)
+        return {
+            'count': count,
+            'errors': errors,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+            'throughput': round(count / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'min': to_ms(latencies[0]) if latencies else 0.0,
+                'mean': to_ms(sum(latencies) / count) if count else 0.0,
+                'p50': to_ms(percentile(latencies, 50)),
+                'p90': to_ms(percentile(latencies, 90)),
+                'p95': to_ms(percentile(latencies, 95)),
+                'p99': to_ms(percentile(latencies, 99)),
+                'max': to_ms(latencies[-1]) if latencies else 0.0,
+            },
+            'histogram': self._histogram(latencies),
+        }
+
+    def summary(self, options: dict) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        by_api = {}
+        for record in self.records:
+            by_api.setdefault(record[0], []).append(record)
+        timeline = {}
+        for record in self.records:
+            second = int(record[1])
+            timeline[second] = timeline.get(second, 0) + 1
+        error_samples = {}
+        for record in self.records:
+            if record[4] is not None and len(error_samples) < 20:
+                error_samples.setdefault(record[4], record[0])
+        return {
+            'options': options,
+            'elapsed': round(elapsed, 3),
+            'total': self._stats(self.records, elapsed),
+            'apis': {name: self._stats(records, elapsed) for name, records in by_api.items()},
+            'timeline': [{'second': s, 'requests': timeline[s]} for s in sorted(timeline)],
+            'error_samples': [{'api': api, 'error': error} for error, api in error_samples.items()],
+        }
+
+
+# ---------------------------------------------------------------------------
+# 发送
+# ---------------------------------------------------------------------------
+class _Sender(object):
+    """每个线程一个私有 Session（复制共享 session 的 headers/cookies，见 ApiBase._clone_session）"""
+
+    def __init__(self, target: LoadTarget, recorder: LoadRecorder):
+        self.target = target
+        self.recorder = recorder
+        self._local = threading.local()
+        self._sessions = []
+
+    def send(self, scheduled: float = None) -> None:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = ApiBase._clone_session()
+            self._sessions.append(session)
+        api_name, yaml_dict = self.target.next_request()
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            result = session.request(**yaml_dict)
+            result.content      # 读完响应体，计入耗时
+            self.recorder.add(api_name, time.perf_counter() - start, result.status_code)
+        except Exception as e:
+            self.recorder.add(api_name, time.perf_counter() - start, None, type(e).__name__ + ': ' + str(e))
+
+    def close(self) -> None:
+        for session in self._sessions:
+            session.close()
+
+
+def run_open_loop(sender: _Sender, rate: float, duration: float, max_workers: int) -> None:
+    """开环：每 1/rate 秒发起一个请求；线程池占满时请求排队，排队时间计入耗时"""
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index in range(total):
+            scheduled = start + index * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(sender.send, scheduled)
+
+
+def run_closed_loop(sender: _Sender, users: int, duration: float, think_time: float) -> None:
+    """闭环：users 个虚拟用户各自循环发请求，直到 duration 秒"""
+    deadline = time.perf_counter() + duration
+
+    def user():
+        while time.perf_counter() < deadline:
+            sender.send()
+            if think_time:
+                time.sleep(think_time)
+
+    threads = [threading.Thread(target=user, name='load-user-{}'.format(i), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+# ---------------------------------------------------------------------------
+# 报告
+# ---------------------------------------------------------------------------
+def _html_report(summary: dict) -> str:
+    def stats_rows(name, stats):
+        latency = stats['latency_ms']
+        return ('<tr><td>{}</td><td>{}</td><td>{}</td><td>{:.2%}</td><td>{}</td>'
+                '<td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>').format(
+            html.escape(name), stats['count'], stats['errors'], stats['error_rate'], stats['throughput'],
+            latency['mean'], latency['p50'], latency['p95'], latency['p99'], latency['max'])
+
+    def histogram(stats):
+        peak = max([b['count'] for b in stats['histogram']] + [1])
+        return ''.join(
+            '<tr><td>{}</td><td><div class="bar" style="width:{}px"></div></td><td>{}</td></tr>'.format(
+                b['bucket'], int(400 * b['count'] / peak), b['count'])
+            for b in stats['histogram'])
+
+    rows = [stats_rows('全部', summary['total'])]
+    rows += [stats_rows(name, stats) for name, stats in summary['apis'].items()]
+    errors = ''.join('<li>{}：{}</li>'.format(html.escape(e['api']), html.escape(e['error']))
+                     for e in summary['error_samples'])
+    return '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>接口压测报告</title>
+<style>
+body {{font-family: sans-serif; margin: 24px;}} table {{border-collapse: collapse; margin-bottom: 24px;}}
+td, th {{border: 1px solid #ccc; padding: 4px 8px; text-align: right;}} td:first-child {{text-align: left;}}
+.bar {{height: 12px; background: #4a90d9;}}
+</style></head><body>
+<h2>接口压测报告</h2>
+<pre>{options}</pre>
+<p>运行时长：{elapsed} 秒</p>
+<table><tr><th>接口</th><th>请求数</th><th>错误数</th><th>错误率</th><th>吞吐量(req/s)</th>
+<th>平均(ms)</th><th>p50</th><th>p95</th><th>p99</th><th>最大</th></tr>{rows}</table>
+<h3>延迟分布</h3>
+<table>{histogram}</table>
+<h3>错误示例</h3><ul>{errors}</ul>
+</body></html>'''.format(options=html.escape(json.dumps(summary['options'], ensure_ascii=False, indent=2)),
+                         elapsed=summary['elapsed'], rows=''.join(rows),
+                         histogram=histogram(summary['total']), errors=errors or '<li>无</li>')
+
+
+def write_report(summary: dict, out_dir: str = BP.LOAD_DIR) -> tuple:
+    """写出 JSON 与 HTML 报告，返回两个文件路径"""
+    os.makedirs(out_dir, exist_ok=True)
+    name = 'load_{}'.format(time.strftime('%Y%m%d_%H%M%S'))
+    json_path = os.path.join(out_dir, name + '.json')
+    html_path = os.path.join(out_dir, name + '.html')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(_html_report(summary))
+    return json_path, html_path
+
+
+# ---------------------------------------------------------------------------
+# 主运行函数
+# ---------------------------------------------------------------------------
+def run_load(yaml_name: str, apis, feed: str = None, mode: str = 'open', rate: float = 50,
+             users: int = 10, duration: float = 10, think_time: float = 0, max_workers: int = 64,
+             base_url: str = None, out_dir: str = BP.LOAD_DIR) -> dict:
+    """
+    执行一次压测并写出报告
+    :param yaml_name: 元素层接口 YAML 文件名，如 接口元素信息-登录
+    :param apis:      接口名列表，可带权重：['login_api:3', 'home_api']
+    :param feed:      DataDriver 用例文件名，逐行循环作为 change_data；为空时不替换占位符
+    :param mode:      open（固定速率）/ closed（固定用户数）
+    :return:          统计结果 dict（另含 report_json / report_html 路径）
+    """
+    feed_data = DataDriver().get_case_data(feed) if feed else None
+    if feed_data is not None and isinstance(feed_data, dict):
+        feed_data = [feed_data]
+    target = LoadTarget(yaml_name, apis, feed_data, base_url)
+    recorder = LoadRecorder()
+    sender = _Sender(target, recorder)
+    options = {'yaml': yaml_name, 'apis': list(apis), 'feed': feed, 'mode': mode,
+               'base_url': target.api.base_url, 'duration': duration}
+    if mode == 'open':
+        options.update(rate=rate, max_workers=max_workers)
+    else:
+        options.update(users=users, think_time=think_time)
+
+    logger.info('【压测开始】%s', options)
+    try:
+        if mode == 'open':
+            run_open_loop(sender, rate, duration, max_workers)
+        elif mode == 'closed':
+            run_closed_loop(sender, users, duration, think_time)
+        else:
+            raise ValueError('不支持的压测模式：{}'.format(mode))
+    finally:
+        recorder.finish()
+        sender.close()
+
+    summary = recorder.summary(options)
+    summary['report_json'], summary['report_html'] = write_report(summary, out_dir)
+    total = summary['total']
+    logger.info('【压测结束】请求 %s，错误率 %.2f%%，吞吐量 %s req/s，p50 %s ms，p99 %s ms，报告：%s',
+                total['count'], total['error_rate'] * 100, total['throughput'],
+                total['latency_ms']['p50'], total['latency_ms']['p99'], summary['report_html'])
+    return summary
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='按接口 YAML 定义进行压测')
+    parser.add_argument('-y', '--yaml', required=True, help='元素层接口 YAML 文件名，如 接口元素信息-登录')
+    parser.add_argument('-a', '--api', action='append', required=True, help='接口名，可带权重 login_api:3，可重复')
+    parser.add_argument('-f', '--feed', help='DataDriver 用例文件名，作为 change_data 循环使用')
+    parser.add_argument('--mode', choices=('open', 'closed'), default='open')
+    parser.add_argument('--rate', type=float, default=50, help='开环模式：每秒请求数')
+    parser.add_argument('--users', type=int, default=10, help='闭环模式：虚拟用户数')
+    parser.add_argument('--think-time', type=float, default=0, help='闭环模式：每次请求后的等待秒数')
+    parser.add_argument('--duration', type=float, default=10, help='压测时长（秒）')
+    parser.add_argument('--max-workers', type=int, default=64, help='开环模式：最大并发线程数')
+    parser.add_argument('--base-url', help='接口地址前缀，默认取 config.ini 中的 TEST_URL')
+    parser.add_argument('--mock', action='store_true',
+                        help='启动按接口 YAML 生成的本地 Mock 服务并对其压测（验证压测工具本身）')
+    parser.add_argument('--mock-latency', type=float, default=0, help='Mock 服务每个请求的延迟（秒）')
+    parser.add_argument('--out', default=BP.LOAD_DIR, help='报告目录')
+    return parser.parse_args(argv)
+
+
+# ---------- 入口 ----------
+if __name__ == '__main__':
+    args = _parse_args()
+    kwargs = dict(feed=args.feed, mode=args.mode, rate=args.rate, users=args.users, duration=args.duration,
+                  think_time=args.think_time, max_workers=args.max_workers, out_dir=args.out)
+    if args.mock:
+        from ext_tools.mock_server import MockServer
+        from base.base_config import get_config
+        project = get_config()['项目运行设置']['TEST_PROJECT']
+        with MockServer(project, latency=args.mock_latency) as server:
+            result = run_load(args.yaml, args.api, base_url=server.url, **kwargs)
+    else:
+        result = run_load(args.yaml, args.api, base_url=args.base_url, **kwargs)
+    print(json.dumps(result['total'], ensure_ascii=False, indent=2))
+    print('报告：{}'.format(result['report_html']))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""接口响应断言与提取：路径取值、checks 块、提取变量只在当前用例内有效"""
+
+import json
+
+import pytest
+
+from base.base_assert import (MISSING, CompiledPath, ResponseAssertionError, ResponseChecks, compile_path,
+                              get_extracted)
+from base.base_auto_api import ApiBase
+from base.base_response import build_response
+from ext_tools.stub_server import StubServer
+
+BODY = {'code': 0, 'data': {'name': 'admin', 'token': 'abc', 'items': [{'id': 1}, {'id': 2}, {'id': 3}],
+                            'key with space': 'yes'}}
+
+
+def _response(body=BODY, status=200):
+    content = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    return build_response(status, 'OK', {'Content-Type': 'application/json'}, content)
+
+
+class TestCompiledPath:
+    """路径语法"""
+
+    @pytest.mark.parametrize('text, expected', [
+        ('$.code', 0),
+        ('$.data.name', 'admin'),
+        ('data.name', 'admin'),
+        ('$.data.items[0].id', 1),
+        ('$.data.items[-1].id', 3),
+        ("$.data['key with space']", 'yes'),
+        ('$.data.items[*].id', [1, 2, 3]),
+        ('$.data.items.*.id', [1, 2, 3]),
+    ])
+    def test_find(self, text, expected):
+        assert CompiledPath(text).find(BODY) == expected
+
+    @pytest.mark.parametrize('text', ['$.missing', '$.data.items[9].id', '$.code.name', '$.data.items.id'])
+    def test_missing(self, text):
+        assert CompiledPath(text).find(BODY) is MISSING
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            CompiledPath('$.data[abc')
+
+    def test_cached(self):
+        assert compile_path('$.data.token') is compile_path('$.data.token')
+
+
+class TestResponseChecks:
+    """checks 块"""
+
+    def test_pass_and_extract(self):
+        checks = ResponseChecks('login_api', {
+            'status': [200, 302],
+            'expect': {'$.code': 0, '$.data.name': 'admin'},
+            'extract': {'token': '$.data.token', 'last_id': '$.data.items[-1].id'},
+            'schema': {'type': 'object', 'required': ['code', 'data'],
+                       'properties': {'code': {'type': 'integer', 'enum': [0]}}},
+        })
+        assert checks.run(_response()) == {'token': 'abc', 'last_id': 3}
+        assert get_extracted() == {'token': 'abc', 'last_id': 3}
+
+    def test_extracted_not_shared_between_tests(self):
+        """上一个用例提取的变量在本用例中不可见"""
+        assert get_extracted() == {}
+
+    def test_all_failures_reported(self):
+        checks = ResponseChecks('login_api', {
+            'status': 200,
+            'expect': {'$.code': 1, '$.data.missing': 'x'},
+            'schema': {'type': 'object', 'properties': {'data': {'type': 'array'}}},
+        })
+        with pytest.raises(ResponseAssertionError) as error:
+            checks.run(_response(status=500))
+        message = str(error.value)
+        for part in ('响应码', '$.code', '$.data.missing', '$.data'):
+            assert part in message
+
+    def test_templated_expect(self):
+        """期望值中的占位符按 change_data 渲染"""
+        checks = ResponseChecks('login_api', {'expect': {'$.data.name': '${username}'}})
+        checks.run(_response(), {'username': 'admin'})
+        with pytest.raises(ResponseAssertionError):
+            checks.run(_response(), {'username': 'guest'})
+
+    def test_memo_repeats_result(self):
+        """相同响应体命中检查结果缓存，结果与首次一致"""
+        checks = ResponseChecks('login_api', {'expect': {'$.code': 1}})
+        for _ in range(2):
+            with pytest.raises(ResponseAssertionError):
+                checks.run(_response())
+        assert len(checks._memo) == 1
+
+    def test_not_json(self):
+        checks = ResponseChecks('home_api', {'expect': {'$.code': 0}})
+        with pytest.raises(ResponseAssertionError) as error:
+            checks.run(_response(b'<html></html>'))
+        assert '不是合法的 JSON' in str(error.value)
+
+
+class TestBatchExtract:
+    """线程池批量请求"""
+
+    def test_extracted_visible_in_test(self, tmp_path):
+        """工作线程中 checks 提取的变量写入调用方用例的 test 作用域"""
+        path = tmp_path / 'batch.yaml'
+        path.write_text('home_api:\n'
+                        '  method: get\n'
+                        '  url: /home\n'
+                        '  checks:\n'
+                        '    status: 200\n'
+                        '    extract: {msg: $.msg}\n', encoding='utf-8')
+        with StubServer() as server:
+            api = ApiBase('batch', base_url=server.url)
+            api.abs_path = str(path)
+            result = api.request_batch('home_api', [{}] * 4, workers=2)
+        assert not result.errors
+        assert get_extracted() == {'msg': 'ok'}
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""登录态缓存：每个用户的条目只包含自己登录时下发的 cookie"""
+
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from base.base_auth_cache import AuthCache, AuthPolicy
+from ext_tools.stub_server import StubServer
+
+
+class _LoginHandler(BaseHTTPRequestHandler):
+    """POST /login 下发 sess_<用户> 会话 cookie"""
+    protocol_version = 'HTTP/1.1'
+    cookie_attributes = 'Path=/'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        user = parse_qs(self.rfile.read(length).decode('utf-8'))['user'][0]
+        body = json.dumps({'code': 0, 'user': user}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'sess_{0}={0}-token; {1}'.format(user, self.cookie_attributes))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ShortCookieHandler(_LoginHandler):
+    """会话 cookie 只有 10 秒有效期，短于默认的 refresh_before（60 秒）"""
+    cookie_attributes = 'Path=/; Max-Age=10'
+
+
+@pytest.fixture
+def server():
+    with StubServer(handler=_LoginHandler) as server:
+        yield server
+
+
+@pytest.fixture
+def short_cookie_server():
+    with StubServer(handler=_ShortCookieHandler) as server:
+        yield server
+
+
+def _login(cache, session, url, user):
+    policy = AuthPolicy('login_api', True)
+    yaml_dict = {'method': 'post', 'url': url + '/login', 'data': {'user': user}}
+    with cache.acquire(policy, session, yaml_dict) as slot:
+        response = slot.response or session.request(**yaml_dict)
+        if slot.response is None:
+            slot.store(response)
+    return slot.key
+
+
+class TestAuthCache:
+    """登录态缓存"""
+
+    def test_entry_only_has_own_cookies(self, tmp_path, server):
+        """同一个 session 先后登录两个用户，后者的条目中不能带上前者的会话 cookie"""
+        cache = AuthCache(str(tmp_path))
+        session = requests.Session()
+        key_a = _login(cache, session, server.url, 'alice')
+        key_b = _login(cache, session, server.url, 'bob')
+        assert 'sess_alice' in session.cookies
+        names_a = {c['name'] for c in cache._read(key_a)['cookies']}
+        names_b = {c['name'] for c in cache._read(key_b)['cookies']}
+        assert names_a == {'sess_alice'}
+        assert names_b == {'sess_bob'}
+
+    def test_replay_restores_cookies(self, tmp_path, server):
+        """缓存命中时把该用户的 cookie 写回新的 session"""
+        cache = AuthCache(str(tmp_path))
+        _login(cache, requests.Session(), server.url, 'alice')
+        session = requests.Session()
+        _login(cache, session, server.url, 'alice')
+        assert cache.hits == 1
+        assert session.cookies.get('sess_alice') == 'alice-token'
+
+    def test_short_lived_cookie_still_cached(self, tmp_path, short_cookie_server):
+        """有效期短于 refresh_before 时仍然命中缓存，而不是每次重新登录"""
+        cache = AuthCache(str(tmp_path), refresh_before=60)
+        for _ in range(3):
+            _login(cache, requests.Session(), short_cookie_server.url, 'alice')
+        assert cache.logins == 1
+        assert cache.hits == 2
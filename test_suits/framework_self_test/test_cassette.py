@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""接口录制 / 回放：录制后离线回放、指纹不匹配报错、auto 模式缺失时走真实请求"""
+
+import pytest
+import requests
+
+from base.base_cassette import Cassette, CassetteMismatchError
+from ext_tools.stub_server import StubServer
+
+
+@pytest.fixture
+def server():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    return str(tmp_path / 'cassettes' / 'demo.sqlite')
+
+
+def _login(url, username='admin'):
+    return {'method': 'post', 'url': url + '/login', 'data': {'username': username, 'password': '123456'},
+            'timeout': 5}
+
+
+class TestCassette:
+    """录制回放"""
+
+    def test_record_then_replay(self, server, cassette_path):
+        """record 模式录制的响应，在被测系统停止后仍能按同一请求回放"""
+        url = server.url
+        recorder = Cassette(cassette_path, mode='record')
+        live = recorder.play(requests.Session(), _login(url))
+        recorder.close()
+        server.stop()
+
+        player = Cassette(cassette_path, mode='replay')
+        response = player.play(requests.Session(), _login(url))
+        assert response.from_cassette is True
+        assert response.status_code == live.status_code
+        assert response.json() == live.json()
+        assert response.headers['Content-Type'] == 'application/json'
+        assert player.hits == 1
+        player.close()
+
+    def test_replay_mismatch(self, server, cassette_path):
+        """replay 模式找不到相同指纹的请求时抛出 CassetteMismatchError，并列出与已录制请求的差异"""
+        recorder = Cassette(cassette_path, mode='record')
+        recorder.play(requests.Session(), _login(server.url))
+        recorder.close()
+
+        player = Cassette(cassette_path, mode='replay')
+        with pytest.raises(CassetteMismatchError) as error:
+            player.play(requests.Session(), _login(server.url, username='guest'))
+        assert 'data.username' in str(error.value)
+        assert player.misses == 1
+        player.close()
+
+    def test_auto_falls_back_to_live(self, server, cassette_path):
+        """auto 模式：没有录制时请求被测系统并录制，之后同一请求直接回放"""
+        cassette = Cassette(cassette_path, mode='auto')
+        first = cassette.play(requests.Session(), _login(server.url))
+        assert not getattr(first, 'from_cassette', False)
+        assert cassette.misses == 1 and cassette.recorded == 1
+
+        second = cassette.play(requests.Session(), _login(server.url))
+        assert second.from_cassette is True
+        assert second.content == first.content
+        assert len(cassette) == 1
+        cassette.close()
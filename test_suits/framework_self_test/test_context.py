@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""分作用域的运行上下文：查找顺序、用例隔离、线程隔离、跨进程传递"""
+
+import pickle
+import threading
+
+import pytest
+
+from base.base_context import ContextMissingError, ContextStore
+
+
+@pytest.fixture
+def store():
+    return ContextStore()
+
+
+class TestContextStore:
+    """ContextStore 作用域"""
+
+    def test_lookup_order(self, store):
+        """不指定作用域时由内到外：thread -> test -> worker -> session"""
+        store.set('name', 'session')
+        store.set('name', 'worker', scope='worker')
+        assert store.get('name') == 'worker'
+        with store.test_scope('demo::test_a'):
+            store.set('name', 'test', scope='test')
+            assert store.get('name') == 'test'
+            store.set('name', 'thread', scope='thread')
+            assert store.get('name') == 'thread'
+            assert store.get('name', scope='session') == 'session'
+
+    def test_test_scope_cleared(self, store):
+        """用例结束后该用例的变量全部删除，其他用例看不到"""
+        with store.test_scope('demo::test_a'):
+            store.set('driver', 'a', scope='test')
+            with store.test_scope('demo::test_b'):
+                assert store.get('driver') is None
+                store.set('driver', 'b', scope='test')
+            assert store.get('driver') == 'a'
+        assert store.get('driver') is None
+        assert store._tests == {}
+
+    def test_tests_in_threads(self, store):
+        """并行线程各自进入自己的用例，互不干扰"""
+        barrier = threading.Barrier(4)
+        seen = {}
+
+        def run(index):
+            with store.test_scope('demo::test_%d' % index):
+                store.set('driver', index, scope='test')
+                barrier.wait()
+                seen[index] = store.get('driver')
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert seen == {i: i for i in range(4)}
+
+    def test_thread_scope(self, store):
+        store.set('value', 'main', scope='thread')
+        result = []
+        thread = threading.Thread(target=lambda: result.append(store.get('value')))
+        thread.start()
+        thread.join()
+        assert result == [None]
+        assert store.get('value') == 'main'
+
+    def test_copy_on_write(self, store):
+        """已取得的快照不会被后续写入修改"""
+        store.set('a', 1)
+        snapshot = store.snapshot('session')
+        store.set('b', 2)
+        store.pop('a')
+        assert dict(snapshot) == {'a': 1}
+        assert dict(store.snapshot('session')) == {'b': 2}
+
+    def test_require(self, store):
+        with pytest.raises(ContextMissingError):
+            store.require('missing')
+        with pytest.raises(ValueError):
+            store.get('a', scope='global')
+
+    def test_handoff(self, store):
+        """handoff 只打包 session 作用域中可序列化的变量"""
+        store.set('config', {'TEST_URL': 'http://127.0.0.1'})
+        store.set('lock', threading.Lock())
+        store.set('local', 1, scope='worker')
+        other = ContextStore()
+        assert other.receive(store.handoff()) == {'config': {'TEST_URL': 'http://127.0.0.1'}}
+        assert other.get('config', scope='session') == {'TEST_URL': 'http://127.0.0.1'}
+        assert pickle.loads(store.handoff(['config'])) == {'config': {'TEST_URL': 'http://127.0.0.1'}}
+        with pytest.raises(ContextMissingError):
+            store.handoff(['local'])
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""load_compiled_yaml 的渲染结果与旧的"整篇 Template.safe_substitute 后再解析"一致"""
+
+from string import Template
+
+import pytest
+import yaml
+
+from base.base_yaml import CompiledYaml, SafeLoader, TextTemplateYaml, load_compiled_yaml
+
+# 替换前就是合法 YAML：预编译占位符
+BLOCK = '''
+api:
+  url: /user/${id}/info
+  age: ${age}
+  qage: "${age}"
+  flag: ${flag}
+  empty: ${empty}
+  name: ${name}
+  missing: ${nope}
+  data:
+    ${field}: 1
+    "${qfield}": x
+    k_${field}:
+      - ${age}
+      - "${age}"
+      - a${name}
+  loc: ["xpath", "//div[text()='${name}']"]
+'''
+
+# 只有替换后才是合法 YAML（flow 集合中未加引号的占位符）：退化为整篇文本替换
+FLOW = '''
+api:
+  method: post
+  url: /user/${id}
+  json: {"id": ${id}, "name": "${name}"}
+  ids: [${x}, ${y}]
+'''
+
+ROWS = [
+    dict(id=5, age=18, flag='true', empty='', name='bob', field='f1', qfield=7, x=1, y=2),
+    dict(id='x', age='1.5', flag=False, empty='0', name='no', field='2', qfield='q', x='true', y=''),
+]
+
+
+def _old_render(text, row):
+    return yaml.load(Template(text).safe_substitute(row), Loader=SafeLoader)
+
+
+@pytest.fixture
+def load(tmp_path):
+    def load(text, name):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return load_compiled_yaml(str(path))
+    return load
+
+
+class TestCompiledYaml:
+    """与旧渲染方式等价"""
+
+    @pytest.mark.parametrize('text, kind', [(BLOCK, CompiledYaml), (FLOW, TextTemplateYaml)])
+    @pytest.mark.parametrize('row', ROWS)
+    def test_render_matches_text_substitution(self, load, text, kind, row):
+        compiled = load(text, 'case.yaml')
+        assert type(compiled) is kind
+        assert compiled.render(row) == _old_render(text, row)
+
+    @pytest.mark.parametrize('text', [BLOCK, FLOW])
+    def test_render_many(self, load, text):
+        compiled = load(text, 'case.yaml').select('api')
+        assert compiled.render_many(ROWS) == [_old_render(text, row)['api'] for row in ROWS]
+
+    def test_flow_examples(self, load):
+        compiled = load(FLOW, 'flow.yaml')
+        # 与旧方式一样整篇替换，change_data 需提供整个文件中 flow 集合用到的占位符
+        row = {'id': 5, 'name': 'bob', 'x': 1, 'y': 2}
+        assert compiled.select('api', 'json').render(row) == {'id': 5, 'name': 'bob'}
+        assert compiled.select('api', 'ids').render(row) == [1, 2]
+        # 不替换时保留占位符原文
+        assert compiled.data['api']['json'] == {'id': '${id}', 'name': '${name}'}
+
+    def test_render_returns_copy(self, load):
+        compiled = load(FLOW, 'flow.yaml')
+        first = compiled.render(ROWS[0])
+        first['api']['json']['id'] = 0
+        assert compiled.render(ROWS[0])['api']['json']['id'] == 5
+
+    def test_invalid_yaml_still_fails(self, load):
+        with pytest.raises(yaml.YAMLError):
+            load('api: [unclosed\n', 'bad.yaml')
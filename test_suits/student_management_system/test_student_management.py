@@ -6,7 +6,7 @@ from page_object.student_management_system.client_start_stop import ClientStartS
 class TestLogin:
     """登录类"""
 
-    @pytest.mark.parametrize('login_data', DataDriver().get_case_data('login'))
+    @pytest.mark.parametrize('login_data', DataDriver().get_lazy_case_data('login'))
     @pytest.mark.usefixtures('client')
     def test_01(self, login_data):
         """登录测试"""
@@ -14,7 +14,7 @@ class TestLogin:
         client.load_client(login_data['username'], login_data['password'])
         client.assert_login(login_data['flag'])
 
-    @pytest.mark.parametrize('register_data', DataDriver().get_case_data('register'))
+    @pytest.mark.parametrize('register_data', DataDriver().get_lazy_case_data('register'))
     @pytest.mark.usefixtures('client')
     def test_02(self, register_data):
         """注册测试"""